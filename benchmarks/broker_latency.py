@@ -0,0 +1,141 @@
+"""Benchmark of Celery task message transports for the RandoPony.
+
+For each broker URL, times how long messages take from being put on a
+queue to being received by a consumer, while another thread writes
+rows to the web app's SQLite database the way that registrations do.
+The django:// transport keeps its messages in that database, so its
+consumer polling competes with the writes.
+
+Usage:
+
+    DJANGO_SETTINGS_MODULE=randopony.settings \\
+    python benchmarks/broker_latency.py [n_messages [broker_url ...]]
+
+n_messages defaults to 200, and the broker URLs to django:// and
+redis://localhost:6379/0. Run syncdb for the djkombu tables, and start
+the Redis server, before running the benchmark.
+"""
+# Standard library:
+from Queue import Empty
+import sqlite3
+import sys
+import threading
+import time
+# Django:
+from django.conf import settings
+from django.db import DatabaseError
+# Kombu:
+from kombu import BrokerConnection
+
+
+QUEUE_NAME = 'randopony.benchmark'
+# Seconds between messages; the benchmark measures latency, not the
+# maximum message rate
+SEND_INTERVAL = 0.02
+# Seconds between database writes
+WRITE_INTERVAL = 0.005
+
+
+def consume(broker_url, n_messages, latencies):
+    """Receive n_messages from the queue, and append their latencies
+    in milliseconds to the latencies list.
+    """
+    connection = BrokerConnection(broker_url)
+    queue = connection.SimpleQueue(QUEUE_NAME)
+    while len(latencies) < n_messages:
+        try:
+            message = queue.get(block=True, timeout=10)
+        except Empty:
+            break
+        latencies.append((time.time() - message.payload['sent']) * 1000)
+        message.ack()
+    queue.close()
+    connection.close()
+
+
+def write_rows(db_path, done, counts):
+    """Insert and commit rows one at a time in the database until done
+    is set, and append the number of rows written to counts.
+    """
+    db = sqlite3.connect(db_path, timeout=30)
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS benchmark_writes '
+        '(id integer PRIMARY KEY, written real NOT NULL)')
+    db.commit()
+    n_rows = 0
+    while not done.is_set():
+        db.execute(
+            'INSERT INTO benchmark_writes (written) VALUES (?)',
+            (time.time(),))
+        db.commit()
+        n_rows += 1
+        time.sleep(WRITE_INTERVAL)
+    db.execute('DROP TABLE benchmark_writes')
+    db.commit()
+    db.close()
+    counts.append(n_rows)
+
+
+def run(broker_url, n_messages, db_path):
+    """Return the message latencies in milliseconds, the number of
+    messages that could not be sent, and the database write rate in
+    rows per second, for the transport at broker_url.
+    """
+    latencies = []
+    n_failed = 0
+    counts = []
+    done = threading.Event()
+    consumer = threading.Thread(
+        target=consume, args=(broker_url, n_messages, latencies))
+    writer = threading.Thread(target=write_rows, args=(db_path, done, counts))
+    connection = BrokerConnection(broker_url)
+    queue = connection.SimpleQueue(QUEUE_NAME)
+    queue.clear()
+    consumer.start()
+    writer.start()
+    start = time.time()
+    for i in range(n_messages):
+        try:
+            queue.put({'sent': time.time()})
+        except DatabaseError:
+            # The django:// transport gives up when the database is
+            # locked for longer than its timeout
+            n_failed += 1
+        time.sleep(SEND_INTERVAL)
+    consumer.join()
+    done.set()
+    writer.join()
+    elapsed = time.time() - start
+    queue.close()
+    connection.close()
+    return sorted(latencies), n_failed, counts[0] / elapsed
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main(n_messages=200, *broker_urls):
+    broker_urls = broker_urls or ('django://', 'redis://localhost:6379/0')
+    db_path = settings.DATABASES['default']['NAME']
+    print('{0} messages per transport; writing to {1}'
+          .format(n_messages, db_path))
+    print('')
+    print('{0:<28}{1:>10}{2:>8}{3:>10}{4:>10}{5:>12}'.format(
+        'transport', 'received', 'failed', 'median', '95%', 'writes/s'))
+    for broker_url in broker_urls:
+        latencies, n_failed, write_rate = run(
+            broker_url, n_messages, db_path)
+        if latencies:
+            median = '{0:.1f}'.format(percentile(latencies, 0.5))
+            p95 = '{0:.1f}'.format(percentile(latencies, 0.95))
+        else:
+            median = p95 = '-'
+        print('{0:<28}{1:>10}{2:>8}{3:>10}{4:>10}{5:>12.0f}'.format(
+            broker_url, len(latencies), n_failed, median, p95, write_rate))
+    print('')
+    print('Latencies are enqueue to receive times in ms')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]] + sys.argv[2:])
@@ -0,0 +1,233 @@
+"""Benchmark of the event page database lookups with and without the
+composite indexes added by the register and populaires 0004 and 0006
+South migrations.
+
+Builds an SQLite database with the register and populaires app tables,
+fills it with made up events and riders, and times the queries that
+the event pages, rider lists, and duplicate registration checks run.
+
+Usage:
+
+    python benchmarks/event_lookups.py [n_events [n_riders [db_path]]]
+
+n_events defaults to 10000 brevets and 10000 populaires, and n_riders
+to 500000 brevet riders and 500000 populaire riders. The database is
+built in memory unless db_path is given.
+"""
+# Standard library:
+from datetime import date
+from datetime import timedelta
+import random
+import sqlite3
+import sys
+import time
+
+
+SCHEMA = """
+CREATE TABLE register_brevet (
+    id integer NOT NULL PRIMARY KEY,
+    region varchar(20) NOT NULL,
+    date date NOT NULL,
+    location varchar(100) NOT NULL,
+    time time NOT NULL,
+    organizer_email varchar(100) NOT NULL,
+    info_question text NOT NULL,
+    google_doc_id varchar(200) NOT NULL,
+    event varchar(30) NOT NULL,
+    route_name varchar(100) NOT NULL,
+    alt_start_time time
+);
+CREATE TABLE register_brevetrider (
+    id integer NOT NULL PRIMARY KEY,
+    first_name varchar(30) NOT NULL,
+    last_name varchar(30) NOT NULL,
+    lowercase_last_name varchar(30) NOT NULL,
+    email varchar(75) NOT NULL,
+    info_answer varchar(100) NOT NULL,
+    club_member bool NOT NULL,
+    brevet_id integer NOT NULL REFERENCES register_brevet (id)
+);
+CREATE INDEX register_brevetrider_b1fc7d82
+    ON register_brevetrider (brevet_id);
+CREATE TABLE populaires_populaire (
+    id integer NOT NULL PRIMARY KEY,
+    event_name varchar(100) NOT NULL,
+    short_name varchar(20) NOT NULL,
+    distance varchar(100) NOT NULL,
+    date date NOT NULL,
+    location varchar(100) NOT NULL,
+    time time NOT NULL,
+    organizer_email varchar(100) NOT NULL,
+    registration_closes datetime NOT NULL,
+    entry_form_url varchar(200) NOT NULL,
+    entry_form_url_label varchar(30) NOT NULL,
+    google_doc_id varchar(200) NOT NULL
+);
+CREATE TABLE populaires_rider (
+    id integer NOT NULL PRIMARY KEY,
+    first_name varchar(30) NOT NULL,
+    last_name varchar(30) NOT NULL,
+    lowercase_last_name varchar(30) NOT NULL,
+    email varchar(75) NOT NULL,
+    distance integer NOT NULL,
+    populaire_id integer NOT NULL REFERENCES populaires_populaire (id)
+);
+CREATE INDEX populaires_rider_4f7ec0d1
+    ON populaires_rider (populaire_id);
+"""
+
+# Same indexes as the register and populaires 0004 and 0006 South
+# migrations
+INDEXES = """
+CREATE INDEX register_brevet_region_event_date
+    ON register_brevet (region, event, date);
+CREATE INDEX register_brevetrider_brevet_lowercase_last_name
+    ON register_brevetrider (brevet_id, lowercase_last_name);
+CREATE UNIQUE INDEX register_brevetrider_brevet_name_email
+    ON register_brevetrider (brevet_id, first_name, last_name, email);
+CREATE INDEX populaires_populaire_short_name_date
+    ON populaires_populaire (short_name, date);
+CREATE INDEX populaires_rider_populaire_lowercase_last_name
+    ON populaires_rider (populaire_id, lowercase_last_name);
+CREATE UNIQUE INDEX populaires_rider_populaire_name_email
+    ON populaires_rider (populaire_id, first_name, last_name, email);
+"""
+
+# The SQL that the Django ORM generates for the lookups, less the
+# columns that aren't needed to show the query plans
+QUERIES = (
+    ('brevet page lookup',
+     'SELECT id FROM register_brevet '
+     'WHERE region = ? AND event = ? AND date = ?',
+     lambda ev: (ev['region'], ev['event'], ev['date'])),
+    ('brevet rider list',
+     'SELECT id, first_name, last_name FROM register_brevetrider '
+     'WHERE brevet_id = ? ORDER BY lowercase_last_name ASC',
+     lambda ev: (ev['brevet_id'],)),
+    ('brevet duplicate check',
+     'SELECT id FROM register_brevetrider '
+     'WHERE first_name = ? AND last_name = ? AND email = ? '
+     'AND brevet_id = ?',
+     lambda ev: ('Some', ev['last_name'], ev['email'], ev['brevet_id'])),
+    ('populaire page lookup',
+     'SELECT id FROM populaires_populaire '
+     'WHERE short_name = ? AND date = ?',
+     lambda ev: (ev['short_name'], ev['date'])),
+    ('populaire rider list',
+     'SELECT id, first_name, last_name FROM populaires_rider '
+     'WHERE populaire_id = ? ORDER BY lowercase_last_name ASC',
+     lambda ev: (ev['populaire_id'],)),
+    ('populaire duplicate check',
+     'SELECT id FROM populaires_rider '
+     'WHERE first_name = ? AND last_name = ? AND email = ? '
+     'AND populaire_id = ?',
+     lambda ev: ('Some', ev['last_name'], ev['email'], ev['populaire_id'])),
+)
+
+REGIONS = ('Club', 'LM', 'PR', 'SI', 'SW', 'VI')
+EVENTS = ('200', '300', '400', '600', '1000')
+N_LOOKUPS = 200
+
+
+def build_database(db, n_events, n_riders):
+    """Create the tables and fill them with n_events brevets and
+    populaires, and n_riders riders for each kind of event.
+    """
+    db.executescript(SCHEMA)
+    start_date = date(2000, 1, 1)
+    brevets = (
+        (i + 1, REGIONS[i % len(REGIONS)], EVENTS[i % len(EVENTS)],
+         str(start_date + timedelta(days=i // 7)))
+        for i in range(n_events))
+    db.executemany(
+        "INSERT INTO register_brevet VALUES "
+        "(?, ?, ?, 'Somewhere', '07:00', 'org@example.com', '', "
+        "'spreadsheet:foo', ?, 'Some Route', NULL)",
+        ((pk, region, day, event) for pk, region, event, day in brevets))
+    db.executemany(
+        "INSERT INTO populaires_populaire VALUES "
+        "(?, 'Some Populaire', ?, '50 km, 100 km', ?, 'Somewhere', "
+        "'10:00', 'org@example.com', ?, '', '', 'spreadsheet:foo')",
+        ((i + 1, 'Pop{0}'.format(i % 50),
+          str(start_date + timedelta(days=i // 50)),
+          str(start_date + timedelta(days=i // 50 - 3)))
+         for i in range(n_events)))
+    db.executemany(
+        "INSERT INTO register_brevetrider VALUES "
+        "(?, 'Some', ?, ?, ?, '', 1, ?)",
+        ((i + 1, 'Rider{0}'.format(i), 'rider{0}'.format(i),
+          'rider{0}@example.com'.format(i), i % n_events + 1)
+         for i in range(n_riders)))
+    db.executemany(
+        "INSERT INTO populaires_rider VALUES "
+        "(?, 'Some', ?, ?, ?, 100, ?)",
+        ((i + 1, 'Rider{0}'.format(i), 'rider{0}'.format(i),
+          'rider{0}@example.com'.format(i), i % n_events + 1)
+         for i in range(n_riders)))
+    db.commit()
+
+
+def sample_events(db, n_events, n_riders):
+    """Return a list of dicts of lookup values for randomly chosen
+    events and riders.
+    """
+    samples = []
+    for i in random.sample(range(n_riders), N_LOOKUPS):
+        event_pk = i % n_events + 1
+        region, event, day = db.execute(
+            'SELECT region, event, date FROM register_brevet WHERE id = ?',
+            (event_pk,)).fetchone()
+        short_name, pop_day = db.execute(
+            'SELECT short_name, date FROM populaires_populaire '
+            'WHERE id = ?', (event_pk,)).fetchone()
+        samples.append({
+            'region': region,
+            'event': event,
+            'date': day,
+            'brevet_id': event_pk,
+            'short_name': short_name,
+            'pop_date': pop_day,
+            'populaire_id': event_pk,
+            'last_name': 'Rider{0}'.format(i),
+            'email': 'rider{0}@example.com'.format(i),
+        })
+    return samples
+
+
+def time_queries(db, samples):
+    """Return a dict of the mean milliseconds per lookup for each of
+    the QUERIES.
+    """
+    timings = {}
+    for name, sql, params in QUERIES:
+        start = time.time()
+        for sample in samples:
+            if name == 'populaire page lookup':
+                sample = dict(sample, date=sample['pop_date'])
+            db.execute(sql, params(sample)).fetchall()
+        timings[name] = (time.time() - start) * 1000 / len(samples)
+    return timings
+
+
+def main(n_events=10000, n_riders=500000, db_path=':memory:'):
+    db = sqlite3.connect(db_path)
+    start = time.time()
+    build_database(db, n_events, n_riders)
+    print('Built {0} events and {1} riders of each kind in {2:.1f} s'
+          .format(n_events, n_riders, time.time() - start))
+    samples = sample_events(db, n_events, n_riders)
+    before = time_queries(db, samples)
+    start = time.time()
+    db.executescript(INDEXES)
+    print('Created indexes in {0:.1f} s'.format(time.time() - start))
+    after = time_queries(db, samples)
+    print('')
+    print('{0:<28}{1:>14}{2:>14}'.format(
+        'ms per lookup', 'no indexes', 'indexes'))
+    for name, sql, params in QUERIES:
+        print('{0:<28}{1:>14.3f}{2:>14.3f}'.format(
+            name, before[name], after[name]))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]] + sys.argv[3:4])
@@ -0,0 +1,179 @@
+"""Load test of concurrent registrations against an SQLite database
+with the default connection settings, and with the SQLITE_PRAGMAS from
+production_settings.
+
+Starts worker processes, like the Apache processes and celery worker
+that share the production database, each of which repeatedly reads an
+event's rider list, checks for a duplicate registration, and inserts a
+rider while incrementing the event's rider count, in one transaction.
+
+Usage:
+
+    python benchmarks/registration_load.py [n_workers [seconds [db_dir]]]
+
+n_workers defaults to 8 processes, and seconds to 10 for each of the
+settings. The databases are built in a temporary directory unless
+db_dir is given; don't use a directory on a network file system
+because WAL mode needs shared memory.
+"""
+# Standard library:
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# production_settings.py has no Django imports, so it can be imported
+# from the project directory without configuring Django
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_path not in sys.path:
+    sys.path.append(project_path)
+# RandoPony:
+from production_settings import SQLITE_PRAGMAS
+
+
+SCHEMA = """
+CREATE TABLE register_brevet (
+    id integer NOT NULL PRIMARY KEY,
+    rider_count integer NOT NULL
+);
+CREATE TABLE register_brevetrider (
+    id integer NOT NULL PRIMARY KEY,
+    first_name varchar(30) NOT NULL,
+    last_name varchar(30) NOT NULL,
+    lowercase_last_name varchar(30) NOT NULL,
+    email varchar(75) NOT NULL,
+    brevet_id integer NOT NULL REFERENCES register_brevet (id)
+);
+CREATE INDEX register_brevetrider_brevet_lowercase_last_name
+    ON register_brevetrider (brevet_id, lowercase_last_name);
+CREATE UNIQUE INDEX register_brevetrider_brevet_name_email
+    ON register_brevetrider (brevet_id, first_name, last_name, email);
+"""
+
+N_EVENTS = 20
+# Seconds that a connection waits for a lock with the default settings;
+# the Python sqlite3 module default
+DEFAULT_TIMEOUT = 5
+
+
+def build_database(db_path):
+    db = sqlite3.connect(db_path)
+    db.executescript(SCHEMA)
+    db.executemany(
+        'INSERT INTO register_brevet VALUES (?, 0)',
+        ((i + 1,) for i in range(N_EVENTS)))
+    db.commit()
+    db.close()
+
+
+def connect(db_path, pragmas):
+    db = sqlite3.connect(db_path, timeout=DEFAULT_TIMEOUT)
+    for name, value in pragmas:
+        db.execute('PRAGMA {0} = {1}'.format(name, value)).fetchall()
+    return db
+
+
+def register(db, worker, i):
+    """Read an event's rider list and register a rider for it the way
+    that the pre-registration views do.
+    """
+    brevet_id = random.randint(1, N_EVENTS)
+    last_name = 'Rider{0}x{1}'.format(worker, i)
+    email = 'rider{0}x{1}@example.com'.format(worker, i)
+    db.execute(
+        'SELECT id, first_name, last_name FROM register_brevetrider '
+        'WHERE brevet_id = ? ORDER BY lowercase_last_name ASC',
+        (brevet_id,)).fetchall()
+    db.execute(
+        'SELECT id FROM register_brevetrider '
+        'WHERE first_name = ? AND last_name = ? AND email = ? '
+        'AND brevet_id = ?',
+        ('Some', last_name, email, brevet_id)).fetchall()
+    db.execute(
+        'INSERT INTO register_brevetrider '
+        '(first_name, last_name, lowercase_last_name, email, brevet_id) '
+        'VALUES (?, ?, ?, ?, ?)',
+        ('Some', last_name, last_name.lower(), email, brevet_id))
+    db.execute(
+        'UPDATE register_brevet SET rider_count = rider_count + 1 '
+        'WHERE id = ?', (brevet_id,))
+    db.commit()
+
+
+def worker(db_path, pragmas, worker_number, stop_at, results):
+    """Register riders until stop_at, and put the number registered,
+    the number of "database is locked" errors, and the sorted list of
+    registration times in ms on the results queue.
+    """
+    db = connect(db_path, pragmas)
+    n_registered = n_locked = 0
+    timings = []
+    while time.time() < stop_at:
+        start = time.time()
+        try:
+            register(db, worker_number, n_registered + n_locked)
+        except sqlite3.OperationalError:
+            db.rollback()
+            n_locked += 1
+            continue
+        timings.append((time.time() - start) * 1000)
+        n_registered += 1
+    db.close()
+    results.put((n_registered, n_locked, timings))
+
+
+def run(db_path, pragmas, n_workers, seconds):
+    """Return the registrations per second, number of locked errors,
+    and median and 95th percentile registration times in ms.
+    """
+    build_database(db_path)
+    results = multiprocessing.Queue()
+    stop_at = time.time() + seconds
+    workers = [
+        multiprocessing.Process(
+            target=worker, args=(db_path, pragmas, i, stop_at, results))
+        for i in range(n_workers)]
+    for process in workers:
+        process.start()
+    n_registered = n_locked = 0
+    timings = []
+    for process in workers:
+        registered, locked, worker_timings = results.get()
+        n_registered += registered
+        n_locked += locked
+        timings.extend(worker_timings)
+    for process in workers:
+        process.join()
+    timings.sort()
+    median = timings[len(timings) // 2] if timings else 0
+    p95 = timings[int(len(timings) * 0.95)] if timings else 0
+    return float(n_registered) / seconds, n_locked, median, p95
+
+
+def main(n_workers=8, seconds=10, db_dir=None):
+    tmp_dir = db_dir or tempfile.mkdtemp()
+    try:
+        default = run(
+            os.path.join(tmp_dir, 'default.db'), (), n_workers, seconds)
+        tuned = run(
+            os.path.join(tmp_dir, 'tuned.db'), SQLITE_PRAGMAS, n_workers,
+            seconds)
+    finally:
+        if db_dir is None:
+            shutil.rmtree(tmp_dir)
+    print('{0} worker processes for {1} s with each setting'
+          .format(n_workers, seconds))
+    print('')
+    print('{0:<16}{1:>14}{2:>10}{3:>12}{4:>10}'.format(
+        '', 'registered/s', 'locked', 'median ms', '95% ms'))
+    for name, results in (('default', default), ('SQLITE_PRAGMAS', tuned)):
+        print('{0:<16}{1:>14.1f}{2:>10}{3:>12.1f}{4:>10.1f}'.format(
+            name, *results))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]] + sys.argv[3:4])
@@ -0,0 +1,79 @@
+"""Benchmark of RandoPony template loading with and without Django's
+cached template loader.
+
+Times get_template() for each of the site and app templates, which is
+the reading and parsing that every request and email task repeats with
+the development TEMPLATE_LOADERS, and that the production cached
+loader does once per process when pasture.templatecache warms it.
+Rendering after the template is loaded costs the same either way.
+
+Usage:
+
+    DJANGO_SETTINGS_MODULE=randopony.settings \\
+    python benchmarks/template_loading.py [n_loads]
+
+n_loads defaults to 200 loads of each template.
+"""
+# Standard library:
+import sys
+import time
+# Django:
+from django.conf import settings
+from django.template import loader
+# RandoPony:
+from randopony.pasture.templatecache import template_names
+from randopony.pasture.templatecache import warm_template_cache
+
+
+UNCACHED_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
+CACHED_LOADERS = (
+    ('django.template.loaders.cached.Loader', UNCACHED_LOADERS),
+)
+
+
+def use_loaders(loaders):
+    """Make get_template() use loaders.
+    """
+    settings.TEMPLATE_LOADERS = loaders
+    # Django builds its loaders from the setting on first use
+    loader.template_source_loaders = None
+
+
+def time_loads(names, n_loads):
+    """Return a dict of the mean ms per get_template() call for each of
+    the template names.
+    """
+    timings = {}
+    for name in names:
+        start = time.time()
+        for i in range(n_loads):
+            loader.get_template(name)
+        timings[name] = (time.time() - start) * 1000 / n_loads
+    return timings
+
+
+def main(n_loads=200):
+    names = template_names()
+    use_loaders(UNCACHED_LOADERS)
+    before = time_loads(names, n_loads)
+    use_loaders(CACHED_LOADERS)
+    start = time.time()
+    warm_template_cache()
+    print('Warmed {0} templates in {1:.1f} ms'
+          .format(len(names), (time.time() - start) * 1000))
+    after = time_loads(names, n_loads)
+    print('')
+    print('{0:<44}{1:>12}{2:>12}'.format(
+        'ms per get_template', 'uncached', 'cached'))
+    for name in names:
+        print('{0:<44}{1:>12.3f}{2:>12.4f}'.format(
+            name, before[name], after[name]))
+    print('{0:<44}{1:>12.3f}{2:>12.4f}'.format(
+        'total', sum(before.values()), sum(after.values())))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -15,6 +15,17 @@ DATABASES = {
     }
 }
 
+# The cache is shared by the runserver and celeryd processes, so that
+# the admin sees the progress of the background jobs that the worker
+# runs, so it has to be outside of the process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': path.join(
+            path.dirname(project_path), 'randopony_dev_cache'),
+    }
+}
+
 STATIC_URL = '/static/'
 
 # SMTP server settings
@@ -24,3 +35,11 @@ STATIC_URL = '/static/'
 #    python -m smtpd -n -c DebuggingServer localhost:1025
 EMAIL_HOST = '127.0.0.1'
 EMAIL_PORT = 1025
+
+# Celery task message transport
+#
+# The django transport keeps the messages in the development database
+# so that no broker server is needed. To use a local Redis server
+# instead, like production does, use:
+#    BROKER_URL = 'redis://localhost:6379/0'
+BROKER_URL = 'django://'
@@ -27,6 +27,9 @@ def deploy():
     deploy_code()
     collect_static()
     restart_apache()
+    # The celeryd workers keep compiled templates, so restart them to
+    # pick up template changes
+    restart_supervisord()
 
 
 @task
@@ -39,6 +42,7 @@ def deploy_code():
         'htmlcov '
         'manage.py '
         'requirements* '
+        'test_settings.py '
         '.DS_Store '
         '.hg* '
         '*.db '
@@ -91,11 +95,11 @@ def tail_supervisord_log():
 
 
 @task
-def tail_celeryd_log():
-    """Tail celeryd log on webfaction
+def tail_celeryd_log(queue='email'):
+    """Tail celeryd log for a task queue worker on webfaction
     """
     with cd('logs/user'):
-        run('tail randopony_celeryd.log')
+        run('tail randopony_celeryd_{0}.log'.format(queue))
 
 
 @task
@@ -145,9 +149,9 @@ def coverage_report():
     """
     omit_files = (
         'dev_settings.py,fabfile.py,manage.py,private_settings.py,'
-        'production_settings.py,settings.py'
+        'production_settings.py,settings.py,test_settings.py'
         )
     env.warn_only = True
-    local('coverage run --source . manage.py test')
+    local('coverage run --source . manage.py test --settings=test_settings')
     local('coverage report --omit "{0}"'.format(omit_files))
     local('coverage html --omit "{0}"'.format(omit_files))
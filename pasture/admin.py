@@ -3,9 +3,25 @@
 # Django:
 from django.contrib import admin
 # RandoPony:
+from .jobs import job_reports
 from .models import EmailAddress
 from .models import Link
 
 
+class JobStatusAdminMixin(object):
+    """Mixin for ModelAdmin classes with actions that run as background
+    jobs.
+
+    Reports the progress of the user's jobs at the top of the
+    change-list page.
+    """
+    def changelist_view(self, request, extra_context=None):
+        if request.method == 'GET':
+            for report in job_reports(request.user):
+                self.message_user(request, report)
+        return super(JobStatusAdminMixin, self).changelist_view(
+            request, extra_context)
+
+
 admin.site.register(EmailAddress)
 admin.site.register(Link)
@@ -0,0 +1,88 @@
+"""Archiving of past events for the RandoPony apps.
+
+Events that are older than the ARCHIVE_EVENTS_AFTER_DAYS setting, and
+their riders, are moved to archive tables so that the live event and
+rider tables only hold the recent and upcoming events. The event pages
+fall back to the archive tables to show the past event page for an
+archived event.
+"""
+# Standard library:
+from datetime import date
+from datetime import timedelta
+# Django:
+from django.conf import settings
+from django.db import transaction
+# RandoPony:
+from .models import RiderListSnapshot
+from ..populaires.models import ArchivedPopulaire
+from ..populaires.models import ArchivedRider
+from ..populaires.models import Populaire
+from ..populaires.models import Rider
+from ..register.models import ArchivedBrevet
+from ..register.models import ArchivedBrevetRider
+from ..register.models import Brevet
+from ..register.models import BrevetRider
+
+
+# Events are in the past, and have a results page link instead of a
+# rider list, once they are more than 7 days old; see in_past
+MIN_ARCHIVE_DAYS = 7
+
+# (event model, event archive model, rider model, rider archive model,
+#  rider foreign key field name)
+ARCHIVES = (
+    (Brevet, ArchivedBrevet, BrevetRider, ArchivedBrevetRider, 'brevet'),
+    (Populaire, ArchivedPopulaire, Rider, ArchivedRider, 'populaire'),
+)
+
+
+def archive_events(days=None):
+    """Move events more than days old, and their riders, to the archive
+    tables, and return a dict of the number of events archived keyed by
+    event model name.
+
+    days defaults to the ARCHIVE_EVENTS_AFTER_DAYS setting, and is
+    never less than MIN_ARCHIVE_DAYS.
+    """
+    if days is None:
+        days = settings.ARCHIVE_EVENTS_AFTER_DAYS
+    before = date.today() - timedelta(days=max(days, MIN_ARCHIVE_DAYS))
+    counts = {}
+    for archive in ARCHIVES:
+        event_model = archive[0]
+        counts[event_model.__name__] = _archive_events(before, *archive)
+    return counts
+
+
+@transaction.commit_on_success
+def _archive_events(before, event_model, archive_model, rider_model,
+                    archive_rider_model, event_field):
+    """Move events dated before the date before, and their riders, to
+    the archive models, and return the number of events moved.
+    """
+    # Only the events that were copied are deleted, so an event that
+    # becomes old enough while the archive runs is left for next time
+    archived_pks = []
+    for event in event_model.objects.filter(date__lt=before):
+        archived_event = archive_model(**_field_values(event))
+        archived_event.save()
+        riders = rider_model.objects.filter(**{event_field: event})
+        for rider in riders:
+            archived_rider = archive_rider_model(**_field_values(rider))
+            setattr(archived_rider, event_field, archived_event)
+            archived_rider.save()
+        riders.delete()
+        RiderListSnapshot.objects.filter(
+            google_doc_id=event.google_doc_id).delete()
+        archived_pks.append(event.pk)
+    event_model.objects.filter(pk__in=archived_pks).delete()
+    return len(archived_pks)
+
+
+def _field_values(instance):
+    """Return a dict of instance's field values, other than its primary
+    key, keyed by attribute name.
+    """
+    return dict((field.attname, getattr(instance, field.attname))
+                for field in instance._meta.fields
+                if not field.primary_key)
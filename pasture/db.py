@@ -0,0 +1,126 @@
+"""Database connection setup and routing for the RandoPony apps.
+
+ReplicaRouter sends the database reads of public page requests to the
+REPLICA_DATABASE alias, when it is configured in DATABASES, so that
+read traffic can be served by a copy of the database. Writes, and the
+reads of the admin, celery tasks, and management commands, go to the
+default database. ReplicaMiddleware marks the requests that may read
+from the replica, and pins a client to the default database for
+REPLICA_PIN_SECONDS after it posts a form, so that the registration
+confirmation page that the post redirects to shows the new rider
+before the replica has caught up.
+
+The page, upcoming events, and rider list caches are shared by all
+requests, so they are filled with default_reads() rather than from a
+replica that may lag the default database.
+"""
+# Standard library:
+from contextlib import contextmanager
+import threading
+# Django:
+from django.conf import settings
+from django.core.urlresolvers import NoReverseMatch
+from django.core.urlresolvers import reverse
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Cookie set on the responses to posts that pins the client's
+# requests to the default database
+PIN_COOKIE = 'pin_primary'
+
+_state = threading.local()
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Run the SQLITE_PRAGMAS setting (name, value) pairs on a new
+    SQLite database connection.
+
+    Receiver for database backend connection_created signal.
+    """
+    if connection.settings_dict['ENGINE'] != 'django.db.backends.sqlite3':
+        return
+    cursor = connection.connection.cursor()
+    for name, value in settings.SQLITE_PRAGMAS:
+        cursor.execute('PRAGMA {0} = {1}'.format(name, value))
+    cursor.close()
+
+
+def use_replica(enabled):
+    """Enable or disable replica reads for the current thread.
+    """
+    _state.use_replica = enabled
+
+
+def reading_replica():
+    """Return True if the current thread's reads go to the replica.
+    """
+    return (getattr(_state, 'use_replica', False)
+            and settings.REPLICA_DATABASE in settings.DATABASES)
+
+
+@contextmanager
+def default_reads():
+    """Send the current thread's reads to the default database in the
+    with block.
+    """
+    enabled = getattr(_state, 'use_replica', False)
+    use_replica(False)
+    try:
+        yield
+    finally:
+        use_replica(enabled)
+
+
+def reread_from_default(instance):
+    """Return instance if the current thread's reads go to the default
+    database, otherwise a copy of it read from the default database.
+    """
+    if not reading_replica():
+        return instance
+    return (instance.__class__._default_manager
+            .using(DEFAULT_DB_ALIAS).get(pk=instance.pk))
+
+
+class ReplicaRouter(object):
+    """Database router for a read replica of the default database.
+    """
+    def db_for_read(self, model, **hints):
+        if reading_replica():
+            return settings.REPLICA_DATABASE
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the default database
+        return True
+
+    def allow_syncdb(self, db, model):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware(object):
+    """Allow replica reads for GET and HEAD requests to public pages
+    from clients that aren't pinned to the default database.
+    """
+    def process_request(self, request):
+        use_replica(
+            request.method in ('GET', 'HEAD')
+            and PIN_COOKIE not in request.COOKIES
+            and not self._is_admin_path(request.path))
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD'):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS)
+        use_replica(False)
+        return response
+
+    def _is_admin_path(self, path):
+        try:
+            admin_path = reverse('admin:index')
+        except NoReverseMatch:
+            # The URLconf has no admin site
+            return False
+        return path.startswith(admin_path)
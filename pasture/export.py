@@ -0,0 +1,64 @@
+"""Rider list exports for the RandoPony apps.
+
+The rider lists are streamed to the client as CSV or JSON, one rider
+row at a time, from a database cursor so that an export uses the same
+small amount of memory regardless of how many riders it includes.
+"""
+# Standard library:
+import csv
+import json
+from cStringIO import StringIO
+# Django:
+from django.http import HttpResponse
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+
+
+def rider_export_response(riders, fields, format, filename):
+    """Return a response that streams the fields values of the riders
+    in the queryset in format, with a download filename.
+
+    format is one of the EXPORT_FORMATS keys.
+    """
+    rows = riders.values_list(*fields).iterator()
+    if format == 'csv':
+        content = _csv_rows(fields, rows)
+    else:
+        content = _json_rows(fields, rows)
+    response = HttpResponse(content, mimetype=EXPORT_FORMATS[format])
+    response['Content-Disposition'] = (
+        'attachment; filename={0}.{1}'.format(filename, format))
+    return response
+
+
+def _csv_rows(fields, rows):
+    """Generate a header line of fields, and a CSV line for each of
+    the rows.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([
+            value.encode('utf-8') if isinstance(value, unicode) else value
+            for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header line for an export with no riders
+    yield buffer.getvalue()
+
+
+def _json_rows(fields, rows):
+    """Generate a JSON list of objects keyed by fields for the rows.
+    """
+    yield '['
+    separator = '\n'
+    for row in rows:
+        yield separator + json.dumps(dict(zip(fields, row)))
+        separator = ',\n'
+    yield '\n]\n'
@@ -1,9 +1,17 @@
 """Helper functions for the RandoPony apps.
 """
+# Standard library:
+import threading
+import time
 # Google Docs:
+import atom.data
 import gdata.acl.data
+import gdata.client
+import gdata.docs.data
+import gdata.service
 # Django:
 from django.conf import settings
+from django.core.cache import cache
 #RandoPony:
 from .models import EmailAddress
 
@@ -16,25 +24,161 @@ def email2words(email):
     return email.replace('@', ' at ').replace('.', ' dot ')
 
 
+def delay_coalesced(task, event_pk):
+    """Queue task to run for event_pk after the
+    COALESCE_TASK_WINDOW settings delay, unless a run for the same
+    event is already pending.
+
+    All of the requests made during the window are handled by the one
+    pending run, so task must read the event's current state when it
+    runs, and call clear_coalesced() before it does so.
+    """
+    key = _coalesce_key(task, event_pk)
+    window = settings.COALESCE_TASK_WINDOW
+    if cache.add(key, True, window):
+        task.apply_async(args=[event_pk], countdown=window)
+
+
+def clear_coalesced(task, event_pk):
+    """Allow the next delay_coalesced() call for task and event_pk to
+    queue another run.
+    """
+    cache.delete(_coalesce_key(task, event_pk))
+
+
+def _coalesce_key(task, event_pk):
+    return 'coalesce:{0}:{1}'.format(task.name, event_pk)
+
+
+# Seconds after which a pooled Google Docs client logs in again;
+# ClientLogin tokens are good for about 2 weeks
+GOOGLE_DOCS_LOGIN_TTL = 24 * 60 * 60
+
+# Process-level pool of authenticated Google Docs clients, keyed by
+# service class; values are (client, login time) tuples
+_google_docs_clients = {}
+_google_docs_clients_lock = threading.Lock()
+
+
 def google_docs_login(service):
-    client = service()
-    client.ssl = True
-    username = EmailAddress.objects.get(key='google_docs').email
-    client.ClientLogin(username, settings.GOOGLE_DOCS_PASSWORD, 'randopony')
+    """Return an authenticated client for the Google Docs service
+    class.
+
+    Clients are kept in a process-level pool so that the ClientLogin
+    handshake is only done when a client is first needed, or its login
+    has reached GOOGLE_DOCS_LOGIN_TTL.
+    """
+    with _google_docs_clients_lock:
+        client, login_time = _google_docs_clients.get(service, (None, 0))
+        if client is None or time.time() - login_time > GOOGLE_DOCS_LOGIN_TTL:
+            client = service()
+            client.ssl = True
+            username = EmailAddress.objects.lookup('google_docs')
+            client.ClientLogin(
+                username, settings.GOOGLE_DOCS_PASSWORD, 'randopony')
+            _google_docs_clients[service] = (client, time.time())
     return client
 
 
+def reset_google_docs_login(service):
+    """Drop the pooled client for the Google Docs service class so that
+    the next google_docs_login() call logs in again.
+    """
+    with _google_docs_clients_lock:
+        _google_docs_clients.pop(service, None)
+
+
+def call_google_docs(service, func, *args, **kwargs):
+    """Return the result of func(client, *args, **kwargs) using the
+    pooled client for the Google Docs service class.
+
+    If Google rejects the client's auth token func is called once more
+    with a freshly logged in client, so func must be safe to repeat.
+    """
+    try:
+        return func(google_docs_login(service), *args, **kwargs)
+    except (gdata.client.Unauthorized, gdata.service.RequestError) as e:
+        if not _is_auth_failure(e):
+            raise
+    reset_google_docs_login(service)
+    return func(google_docs_login(service), *args, **kwargs)
+
+
+def _is_auth_failure(exc):
+    """Is exc a Google Docs rejection of an expired or invalid token?
+
+    gdata.client clients (e.g. DocsClient) raise Unauthorized;
+    gdata.service clients (e.g. SpreadsheetsService) raise RequestError
+    with a dict of response info.
+    """
+    if isinstance(exc, gdata.client.Unauthorized):
+        return True
+    info = exc.args[0] if exc.args else None
+    return isinstance(info, dict) and info.get('status') == 401
+
+
+# Seconds to keep the index of Google Docs resources by title that is
+# used to find the rider list templates
+RIDER_LIST_TEMPLATES_TTL = 24 * 60 * 60
+
+RIDER_LIST_TEMPLATES_KEY = 'rider-list-templates'
+
+
+class RiderListTemplateError(Exception):
+    """Raised when there is no Google Docs rider list template with the
+    requested title.
+    """
+
+
 def get_rider_list_template(template_name, client):
-    docs = client.get_resources()
-    for doc in docs.entry:
-        if doc.title.text == template_name:
-            template = doc
-            break
-    return template
+    """Return a Google Docs resource entry for the rider list template
+    titled template_name that is sufficient to copy it.
+
+    The resources' self link URLs are kept in the cache, indexed by
+    title, so that the resource feed is only downloaded when the index
+    has expired or doesn't include template_name.
+    """
+    index = cache.get(RIDER_LIST_TEMPLATES_KEY)
+    if index is None or template_name not in index:
+        docs = client.get_resources()
+        index = dict(
+            (doc.title.text, doc.GetSelfLink().href) for doc in docs.entry)
+        cache.set(RIDER_LIST_TEMPLATES_KEY, index, RIDER_LIST_TEMPLATES_TTL)
+    try:
+        self_link = index[template_name]
+    except KeyError:
+        raise RiderListTemplateError(
+            'Google Docs rider list template not found: {0}'
+            .format(template_name))
+    return gdata.docs.data.Resource(
+        link=[atom.data.Link(rel='self', href=self_link)])
+
+
+def copy_rider_list_template(client, template_name, title):
+    """Copy the Google Docs rider list template, and return the copy's
+    resource entry.
+
+    If the copy fails the template may have been moved or deleted since
+    its self link was cached, so the cached index is dropped and the
+    template is looked up and copied once more.
+    """
+    template = get_rider_list_template(template_name, client)
+    try:
+        created_doc = client.copy_resource(template, title)
+    except gdata.client.RequestError:
+        cache.delete(RIDER_LIST_TEMPLATES_KEY)
+        template = get_rider_list_template(template_name, client)
+        created_doc = client.copy_resource(template, title)
+    return created_doc
 
 
 def share_rider_list_publicly(doc, client):
     scope = gdata.acl.data.AclScope(type='default')
     role = gdata.acl.data.AclRole(value='reader')
     acl_entry = gdata.acl.data.AclEntry(scope=scope, role=role)
-    client.Post(acl_entry, doc.get_acl_feed_link().href)
+    try:
+        client.Post(acl_entry, doc.get_acl_feed_link().href)
+    except gdata.client.RequestError as e:
+        # A retried share finds the doc already shared
+        if e.status != 409:
+            raise
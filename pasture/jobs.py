@@ -0,0 +1,147 @@
+"""Progress reports for admin actions that run as background tasks.
+
+Job status is kept in the cache so that the celery worker can update
+it, and the admin can show it to the user who started the job, so the
+cache has to be shared by the web and worker processes.
+
+A job is either handled by one task that reports its progress with
+update_job(), or fanned out to a task per item, each of which reports
+its outcome with finish_job_item(). Item outcomes are kept in separate
+cache keys so that tasks running in parallel don't overwrite each
+other's progress.
+"""
+# Standard library:
+import uuid
+# Django:
+from django.core.cache import cache
+# RandoPony:
+from .mailer import send_messages
+
+
+# Seconds to keep job status for
+JOB_TIMEOUT = 24 * 60 * 60
+
+# Number of email messages to send between job progress updates
+MESSAGES_PER_UPDATE = 10
+
+
+def start_job(user, total, done_message, items=None):
+    """Record the start of a background job for user that will handle
+    total items, and return the job id.
+
+    done_message is reported to the user when the job finishes.
+
+    items is the list of item ids for a job that is fanned out to a
+    task per item.
+    """
+    job_id = uuid.uuid4().hex
+    status = {
+        'total': total,
+        'done': 0,
+        'finished': False,
+        'message': done_message,
+    }
+    if items is not None:
+        status['items'] = items
+    cache.set(_job_key(job_id), status, JOB_TIMEOUT)
+    user_jobs = cache.get(_user_key(user), [])
+    cache.set(_user_key(user), user_jobs + [job_id], JOB_TIMEOUT)
+    return job_id
+
+
+def update_job(job_id, done, finished=False, message=None):
+    """Record the number of items done by a background job, and
+    whether it has finished.
+
+    message replaces the job's done message; e.g. to report failure.
+    """
+    status = cache.get(_job_key(job_id))
+    if status is None:
+        # Job status has expired
+        return
+    status.update(done=done, finished=finished)
+    if message is not None:
+        status['message'] = message
+    cache.set(_job_key(job_id), status, JOB_TIMEOUT)
+
+
+def finish_job_item(job_id, item, failed=False):
+    """Record that a fanned out background job's task for item has
+    finished, or failed.
+    """
+    cache.set(
+        _item_key(job_id, item), 'failed' if failed else 'done', JOB_TIMEOUT)
+
+
+def job_reports(user):
+    """Return a list of progress messages for user's background jobs.
+
+    Finished jobs are reported once, with their done message, and then
+    forgotten.
+    """
+    reports = []
+    running_jobs = []
+    for job_id in cache.get(_user_key(user), []):
+        status = cache.get(_job_key(job_id))
+        if status is None:
+            continue
+        if 'items' in status:
+            status = _item_status(job_id, status)
+        if status['finished']:
+            reports.append(status['message'])
+            cache.delete(_job_key(job_id))
+            cache.delete_many([
+                _item_key(job_id, item) for item in status.get('items', [])])
+        else:
+            reports.append(
+                'In progress ({0[done]} of {0[total]} done): {0[message]}'
+                .format(status))
+            running_jobs.append(job_id)
+    cache.set(_user_key(user), running_jobs, JOB_TIMEOUT)
+    return reports
+
+
+def _item_status(job_id, status):
+    """Return status updated with the item outcomes of a fanned out
+    background job.
+    """
+    outcomes = cache.get_many([
+        _item_key(job_id, item) for item in status['items']]).values()
+    status = dict(
+        status, done=len(outcomes), finished=len(outcomes) == status['total'])
+    failed = outcomes.count('failed')
+    if status['finished'] and failed:
+        status['message'] = '{0} ({1} of {2} failed)'.format(
+            status['message'], failed, status['total'])
+    return status
+
+
+def send_job_messages(job_id, messages):
+    """Send email messages over the shared mail connection, updating
+    the progress of the background job as they go.
+    """
+    sent = 0
+    try:
+        for start in range(0, len(messages), MESSAGES_PER_UPDATE):
+            batch = messages[start:start + MESSAGES_PER_UPDATE]
+            sent += send_messages(batch)
+            update_job(job_id, start + len(batch))
+    except Exception:
+        update_job(
+            job_id, sent, finished=True,
+            message='Failed after sending {0} of {1} emails'
+                    .format(sent, len(messages)))
+        raise
+    update_job(job_id, len(messages), finished=True)
+
+
+def _job_key(job_id):
+    return 'job:{0}'.format(job_id)
+
+
+def _item_key(job_id, item):
+    return 'job:{0}:item:{1}'.format(job_id, item)
+
+
+def _user_key(user):
+    return 'jobs:user:{0}'.format(user.pk)
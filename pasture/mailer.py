@@ -0,0 +1,99 @@
+"""Email dispatch for the RandoPony apps.
+
+Messages are sent over a mail connection that is kept open and shared
+by the tasks and admin actions that run in a process, instead of each
+message opening its own SMTP connection.
+"""
+# Standard library:
+import logging
+import smtplib
+import socket
+import threading
+import time
+# Django:
+from django.core import mail
+
+
+# Seconds that the shared connection can be idle before it is closed
+# and re-opened; SMTP servers drop idle connections after a while
+CONNECTION_IDLE_TIMEOUT = 60
+
+_connection = None
+_last_used = 0
+_lock = threading.Lock()
+
+log = logging.getLogger(__name__)
+
+
+def send_messages(messages):
+    """Send the list of EmailMessage objects over the shared mail
+    connection, and return the number of messages sent.
+
+    If the server has dropped the connection it is re-opened, and the
+    message that was being sent is sent again. Other SMTP errors, like
+    the server refusing a message's recipients, are logged, and the
+    rest of the messages are still sent.
+    """
+    global _last_used
+    sent = 0
+    with _lock:
+        connection = _get_connection()
+        for message in messages:
+            try:
+                sent += _send_message(connection, message)
+            except smtplib.SMTPServerDisconnected:
+                _close_connection()
+                connection = _get_connection()
+                sent += _send_message(connection, message)
+        _last_used = time.time()
+    return sent
+
+
+def close_connection():
+    """Close the shared mail connection.
+    """
+    with _lock:
+        _close_connection()
+
+
+def _get_connection():
+    """Return the open shared mail connection, opening a new one if
+    there isn't one, or it has been idle for too long.
+    """
+    global _connection
+    if (_connection is not None
+            and time.time() - _last_used > CONNECTION_IDLE_TIMEOUT):
+        _close_connection()
+    if _connection is None:
+        _connection = mail.get_connection()
+        _connection.open()
+    return _connection
+
+
+def _send_message(connection, message):
+    """Send message over connection, and return the number of messages
+    sent.
+
+    SMTP errors other than the server dropping the connection are
+    logged instead of raised.
+    """
+    try:
+        return connection.send_messages([message]) or 0
+    except smtplib.SMTPServerDisconnected:
+        raise
+    except smtplib.SMTPException:
+        log.exception(
+            'Sending "{0}" email to {1} failed'
+            .format(message.subject, ', '.join(message.recipients())))
+        return 0
+
+
+def _close_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except (smtplib.SMTPException, socket.error):
+            # Connection was already dropped by the server
+            pass
+        _connection = None
@@ -0,0 +1,26 @@
+"""Management command to move past events and their riders to the
+archive tables.
+"""
+# Standard library:
+from optparse import make_option
+# Django:
+from django.core.management.base import BaseCommand
+# RandoPony:
+from ...archive import archive_events
+
+
+class Command(BaseCommand):
+    help = ('Move events older than the ARCHIVE_EVENTS_AFTER_DAYS setting, '
+            'and their riders, to the archive tables.')
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--days', type='int', dest='days', default=None,
+            help='Archive events more than this many days old.'),
+    )
+
+    def handle(self, **options):
+        counts = archive_events(options['days'])
+        for model_name in sorted(counts):
+            self.stdout.write(
+                'Archived {0} {1} events\n'.format(
+                    counts[model_name], model_name))
@@ -0,0 +1,47 @@
+# encoding: utf-8
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        
+        # Adding model 'RiderListSnapshot'
+        db.create_table('pasture_riderlistsnapshot', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('google_doc_id', self.gf('django.db.models.fields.CharField')(unique=True, max_length=200)),
+            ('rows', self.gf('django.db.models.fields.TextField')(blank=True)),
+        ))
+        db.send_create_signal('pasture', ['RiderListSnapshot'])
+
+
+    def backwards(self, orm):
+        
+        # Deleting model 'RiderListSnapshot'
+        db.delete_table('pasture_riderlistsnapshot')
+
+
+    models = {
+        'pasture.emailaddress': {
+            'Meta': {'object_name': 'EmailAddress'},
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'key': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        'pasture.link': {
+            'Meta': {'object_name': 'Link'},
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'key': ('django.db.models.fields.CharField', [], {'max_length': '50'}),
+            'url': ('django.db.models.fields.URLField', [], {'max_length': '200'})
+        },
+        'pasture.riderlistsnapshot': {
+            'Meta': {'object_name': 'RiderListSnapshot'},
+            'google_doc_id': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '200'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'rows': ('django.db.models.fields.TextField', [], {'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['pasture']
@@ -1,8 +1,225 @@
 """Model classes for RandoPony pasture app.
 """
 # Standard library:
+from datetime import datetime
+import json
 # Django:
+from django.core.cache import cache
 from django.db import models
+from django.db.backends.signals import connection_created
+from django.db.models import signals
+# RandoPony:
+from .db import default_reads
+from .db import set_sqlite_pragmas
+
+
+# Seconds to cache LookupManager values for; they are also removed
+# from the cache when their instance is changed
+LOOKUP_CACHE_TTL = 24 * 60 * 60
+
+# Seconds to cache UpcomingEventsManager event lists for
+UPCOMING_EVENTS_TIMEOUT = 24 * 60 * 60
+
+
+class LookupManager(models.Manager):
+    """Model manager with a cache of key to value lookups.
+
+    The values are kept in the cache so that they are shared by
+    processes. A value is removed from the cache when its instance is
+    saved or deleted, and when the instance's key is changed the value
+    of the old key is removed too.
+    """
+    def __init__(self, value_field):
+        super(LookupManager, self).__init__()
+        self.value_field = value_field
+
+    def contribute_to_class(self, model, name):
+        super(LookupManager, self).contribute_to_class(model, name)
+        signals.pre_save.connect(
+            self.clear_old_lookup, sender=model,
+            dispatch_uid='{0}_old_lookup'.format(model.__name__))
+        signals.post_save.connect(
+            self.clear_lookup, sender=model,
+            dispatch_uid='{0}_lookups'.format(model.__name__))
+        signals.post_delete.connect(
+            self.clear_lookup, sender=model,
+            dispatch_uid='{0}_lookups'.format(model.__name__))
+
+    def lookup(self, key):
+        """Return the value field of the instance with key.
+
+        Raises the model's DoesNotExist exception if there is no
+        instance with key.
+        """
+        value = cache.get(self._lookup_key(key))
+        if value is None:
+            value = getattr(self.get(key=key), self.value_field)
+            cache.set(self._lookup_key(key), value, LOOKUP_CACHE_TTL)
+        return value
+
+    def clear_lookup(self, instance, **kwargs):
+        """Remove the cached value of instance's key.
+
+        Receiver for model post_save and post_delete signals.
+        """
+        cache.delete(self._lookup_key(instance.key))
+
+    def clear_old_lookup(self, instance, raw=False, **kwargs):
+        """Remove the cached value of the key that an existing instance
+        had before it was changed.
+
+        Receiver for model pre_save signal.
+        """
+        if instance.pk is None or raw:
+            return
+        old_keys = self.filter(pk=instance.pk).values_list('key', flat=True)
+        for old_key in old_keys:
+            cache.delete(self._lookup_key(old_key))
+
+    def _lookup_key(self, key):
+        return 'lookup:{0}.{1}:{2}'.format(
+            self.model._meta.app_label, self.model._meta.object_name, key)
+
+
+class UpcomingEventsManager(models.Manager):
+    """Model manager for events with a cached list of the upcoming
+    events that the landing pages are built from.
+
+    The list is kept in the cache so that it is shared by processes.
+    It is cleared when an instance of the model is saved or deleted,
+    and rebuilt when the start of the upcoming events window moves on
+    to the next day.
+    """
+    def contribute_to_class(self, model, name):
+        super(UpcomingEventsManager, self).contribute_to_class(model, name)
+        signals.post_save.connect(
+            self.clear_upcoming, sender=model,
+            dispatch_uid='{0}_upcoming'.format(model.__name__))
+        signals.post_delete.connect(
+            self.clear_upcoming, sender=model,
+            dispatch_uid='{0}_upcoming'.format(model.__name__))
+
+    def upcoming(self, since):
+        """Return a list of the events on or after the date since, in
+        date order.
+        """
+        cached = cache.get(self._upcoming_key())
+        if cached is not None and cached[0] == since:
+            return cached[1]
+        # The cached list is shared by all requests, so read it from
+        # the default database rather than a replica that may lag it
+        with default_reads():
+            events = list(self.exclude(date__lt=since))
+        cache.set(
+            self._upcoming_key(), (since, events), UPCOMING_EVENTS_TIMEOUT)
+        return events
+
+    def clear_upcoming(self, **kwargs):
+        """Remove the cached list of upcoming events.
+
+        Receiver for model post_save and post_delete signals.
+        """
+        cache.delete(self._upcoming_key())
+
+    def _upcoming_key(self):
+        return 'upcoming:{0}.{1}'.format(
+            self.model._meta.app_label, self.model._meta.object_name)
+
+
+class EventRiderManager(models.Manager):
+    """Model manager for riders with a foreign key to the event that
+    they have registered for.
+
+    The event's rider_count field is incremented when a rider is
+    added, and decremented when a rider is deleted, by single UPDATE
+    statements so that concurrent registrations are counted correctly.
+    The same statements set the event's modified field, which the event
+    page validators are calculated from, and it is also set when a
+    rider is changed. A rider that is moved to another event is
+    uncounted from the old event and counted in the new one, and the
+    old event's id is left in the rider's _moved_from_event_id
+    attribute for the model's other post_save receivers.
+    Riders loaded from fixtures are not counted because the event
+    fixtures include their rider counts.
+    """
+    def __init__(self, event_field):
+        super(EventRiderManager, self).__init__()
+        self.event_field = event_field
+
+    def contribute_to_class(self, model, name):
+        super(EventRiderManager, self).contribute_to_class(model, name)
+        signals.pre_save.connect(
+            self.note_event_move, sender=model,
+            dispatch_uid='{0}_note_event_move'.format(model.__name__))
+        signals.post_save.connect(
+            self.count_rider, sender=model,
+            dispatch_uid='{0}_count_rider'.format(model.__name__))
+        signals.post_delete.connect(
+            self.uncount_rider, sender=model,
+            dispatch_uid='{0}_uncount_rider'.format(model.__name__))
+
+    def note_event_move(self, instance, raw=False, **kwargs):
+        """Record the id of the event that an existing rider is being
+        moved from, or None, as the rider's _moved_from_event_id.
+
+        Receiver for model pre_save signal.
+        """
+        instance._moved_from_event_id = None
+        if instance.pk is None or raw:
+            return
+        attname = self._event_attname()
+        old_event_ids = list(
+            self.filter(pk=instance.pk).values_list(attname, flat=True))
+        if old_event_ids and old_event_ids[0] != getattr(instance, attname):
+            instance._moved_from_event_id = old_event_ids[0]
+
+    def count_rider(self, instance, created, raw=False, **kwargs):
+        """Increment the rider count of a new rider's event, move the
+        count of a rider that has moved to another event, or mark the
+        event of a changed rider as modified.
+
+        Receiver for model post_save signal.
+        """
+        if raw:
+            return
+        event_id = getattr(instance, self._event_attname())
+        moved_from_event_id = getattr(instance, '_moved_from_event_id', None)
+        if created:
+            self._update_rider_count(event_id, 1)
+        elif moved_from_event_id is not None:
+            self._update_rider_count(moved_from_event_id, -1)
+            self._update_rider_count(event_id, 1)
+        else:
+            self._update_rider_count(event_id, 0)
+
+    def uncount_rider(self, instance, **kwargs):
+        """Decrement the rider count of a deleted rider's event.
+
+        Receiver for model post_delete signal.
+        """
+        self._update_rider_count(
+            getattr(instance, self._event_attname()), -1)
+
+    def _event_attname(self):
+        return self.model._meta.get_field(self.event_field).attname
+
+    def _update_rider_count(self, event_id, change):
+        event_model = self.model._meta.get_field(self.event_field).rel.to
+        event_model._default_manager.filter(pk=event_id).update(
+            rider_count=models.F('rider_count') + change,
+            modified=datetime.now())
+
+    def for_event(self, event, *fields):
+        """Return a queryset of the riders registered for event.
+
+        The riders are filtered on the event foreign key column so that
+        the query doesn't join to the event table. If fields are given,
+        only those columns are loaded.
+        """
+        riders = self.filter(**{self.event_field: event.pk})
+        if fields:
+            riders = riders.only(*fields)
+        return riders
 
 
 class EmailAddress(models.Model):
@@ -14,6 +231,8 @@ class EmailAddress(models.Model):
     key = models.CharField(max_length=50)
     email = models.EmailField()
 
+    objects = LookupManager('email')
+
 
     def __unicode__(self):
         return '{0.key} <{0.email}>'.format(self)
@@ -28,6 +247,38 @@ class Link(models.Model):
     key = models.CharField(max_length=50)
     url = models.URLField()
 
+    objects = LookupManager('url')
+
 
     def __unicode__(self):
         return self.key
+
+
+class RiderListSnapshot(models.Model):
+    """Copy of the rows most recently pushed to a Google Docs rider
+    list spreadsheet.
+
+    Lets spreadsheet updates send only the rows that have changed
+    since the last update.
+    """
+    google_doc_id = models.CharField(max_length=200, unique=True)
+    rows = models.TextField(blank=True)
+
+
+    def __unicode__(self):
+        return self.google_doc_id
+
+    def _get_row_list(self):
+        """Return the snapshot rows as a list of lists of cell values.
+        """
+        return json.loads(self.rows) if self.rows else []
+
+    def _set_row_list(self, row_list):
+        self.rows = json.dumps(row_list)
+    row_list = property(_get_row_list, _set_row_list)
+
+
+# Connecting the receiver here ensures that it is connected in the web
+# app and the celery workers before they query the database
+connection_created.connect(
+    set_sqlite_pragmas, dispatch_uid='set_sqlite_pragmas')
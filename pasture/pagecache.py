@@ -0,0 +1,138 @@
+"""Rendered event page cache for the RandoPony apps.
+
+An event page only changes when a rider registers or is changed, the
+event or a Link that the page shows is edited, or the event passes one
+of its registration closed, started, or in past boundaries. So the
+page content is cached per event until the next boundary, and cleared
+by the signal receivers connected in the register and populaires
+models modules.
+
+The same things are used to calculate the page's ETag and
+Last-Modified validators, so that a client that already has the
+current page gets a 304 Not Modified response without the page being
+rendered.
+"""
+# Standard library:
+from datetime import datetime
+import hashlib
+import time
+# Django:
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.utils.http import parse_etags
+from django.utils.http import parse_http_date_safe
+from django.utils.http import quote_etag
+# RandoPony:
+from .db import default_reads
+from .db import reread_from_default
+
+
+# Maximum seconds to cache an event page for
+EVENT_PAGE_TIMEOUT = 60 * 60
+
+# Seconds that browsers and front proxies may use an event page for
+# without revalidating it; short so that riders see new registrations
+EVENT_PAGE_MAX_AGE = 60
+
+
+def cached_event_page(event, render):
+    """Return the response for event's page from the cache, or call
+    render(event) to get the response and cache its content.
+
+    event must have a next_state_change property that is the datetime
+    at which its page next changes due to the passage of time, or None.
+    """
+    key = _event_page_key(event.__class__, event.pk)
+    content = cache.get(key)
+    if content is not None:
+        return HttpResponse(content)
+    # The cached page is served to all requests, so render it from the
+    # default database rather than a replica that may lag it
+    event = reread_from_default(event)
+    with default_reads():
+        response = render(event)
+    timeout = _event_page_timeout(event)
+    if response.status_code == 200 and timeout >= 1:
+        cache.set(key, response.content, timeout)
+    return response
+
+
+def conditional_event_page(request, event, render):
+    """Return a 304 Not Modified response if the request's
+    If-None-Match or If-Modified-Since header matches the validators
+    of event's page, otherwise the response from cached_event_page().
+
+    event must have modified and last_state_change properties, as well
+    as the next_state_change property that cached_event_page() uses.
+    """
+    etag, last_modified = _event_page_validators(event)
+    if _not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+    else:
+        response = cached_event_page(event, render)
+        if response.status_code != 200:
+            return response
+    response['ETag'] = quote_etag(etag)
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(
+        response, public=True,
+        max_age=min(EVENT_PAGE_MAX_AGE, _event_page_timeout(event)))
+    return response
+
+
+def clear_event_page(model, event_pk):
+    """Remove the cached page for the model instance with event_pk.
+    """
+    cache.delete(_event_page_key(model, event_pk))
+
+
+def _event_page_timeout(event):
+    """Return the number of whole seconds until event's page next
+    changes, up to EVENT_PAGE_TIMEOUT.
+    """
+    next_change = event.next_state_change
+    if next_change is None:
+        return EVENT_PAGE_TIMEOUT
+    seconds = int((next_change - datetime.now()).total_seconds())
+    return min(seconds, EVENT_PAGE_TIMEOUT)
+
+
+def _event_page_validators(event):
+    """Return the ETag, and the Last-Modified time in seconds since the
+    epoch, of event's page.
+
+    The page changes when the event is modified, which includes riders
+    registering for it or changing, and Link URLs changing, and when it
+    passes a state change boundary.
+    """
+    last_modified = event.modified
+    if event.last_state_change is not None:
+        last_modified = max(last_modified, event.last_state_change)
+    etag = hashlib.md5('{0}.{1}:{2}:{3}:{4}'.format(
+        event._meta.app_label, event._meta.object_name, event.pk,
+        event.rider_count, last_modified.isoformat())).hexdigest()
+    return etag, int(time.mktime(last_modified.timetuple()))
+
+
+def _not_modified(request, etag, last_modified):
+    """Return True if the request's conditional headers match etag or
+    last_modified.
+
+    If-None-Match takes precedence over If-Modified-Since.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return etag in etags or '*' in etags
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return (if_modified_since is not None
+            and last_modified <= if_modified_since)
+
+
+def _event_page_key(model, event_pk):
+    return 'page:{0}.{1}:{2}'.format(
+        model._meta.app_label, model._meta.object_name, event_pk)
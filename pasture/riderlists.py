@@ -0,0 +1,288 @@
+"""Rider list backends for the RandoPony apps.
+
+The RIDER_LIST_BACKEND setting is the dotted path of the backend class
+that creates and updates the event rider lists:
+
+* GoogleDocsBackend copies the Google Docs rider list template for
+  each event, and pushes the rider list to the copy as riders
+  register.
+
+* LocalBackend has no remote service; the rider list is rendered from
+  the database as a CSV, ODS, or XLSX file when it is requested, and
+  cached until the event or its riders change.
+
+The event's google_doc_id field holds the id of its rider list for
+either backend.
+"""
+# Standard library:
+import csv
+from cStringIO import StringIO
+from xml.sax.saxutils import escape
+import zipfile
+# Django:
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.utils.importlib import import_module
+# Google Docs:
+from gdata.docs.client import DocsClient
+from gdata.spreadsheet.service import SpreadsheetsService
+# RandoPony:
+from .db import default_reads
+from .db import reread_from_default
+from .helpers import call_google_docs
+from .helpers import copy_rider_list_template
+from .helpers import share_rider_list_publicly
+from .spreadsheets import sync_rider_list
+
+
+# Seconds to cache a rendered rider list for; it is also removed from
+# the cache when the event or its riders change
+RIDER_LIST_TIMEOUT = 24 * 60 * 60
+
+RIDER_LIST_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ods': 'application/vnd.oasis.opendocument.spreadsheet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument'
+            '.spreadsheetml.sheet',
+}
+
+
+def get_backend():
+    """Return an instance of the RIDER_LIST_BACKEND setting class.
+    """
+    module_name, class_name = settings.RIDER_LIST_BACKEND.rsplit('.', 1)
+    try:
+        backend_class = getattr(import_module(module_name), class_name)
+    except (ImportError, AttributeError) as e:
+        raise ImproperlyConfigured(
+            'Error loading rider list backend {0}: {1}'
+            .format(settings.RIDER_LIST_BACKEND, e))
+    return backend_class()
+
+
+class GoogleDocsBackend(object):
+    """Rider lists in publicly shared Google Docs spreadsheets.
+    """
+    def create(self, event, template_name):
+        """Copy the template_name spreadsheet for event, and return
+        the copy's id.
+
+        The copy is shared by share() so that the id can be stored
+        first, and a failed share retried without making another copy.
+        """
+        created_doc = call_google_docs(
+            DocsClient, copy_rider_list_template,
+            template_name, unicode(event))
+        return created_doc.resource_id.text
+
+    def share(self, event):
+        """Share event's rider list spreadsheet publicly.
+        """
+        call_google_docs(
+            DocsClient,
+            lambda client: share_rider_list_publicly(
+                client.get_resource_by_id(event.google_doc_id), client))
+
+    def set_heading(self, event, col, heading):
+        """Set the text of the col heading of event's rider list.
+        """
+        key = event.google_doc_id.split(':')[1]
+        call_google_docs(
+            SpreadsheetsService,
+            lambda client: client.UpdateCell(1, col, heading, key))
+
+    def update(self, event, n_columns, rows):
+        """Make event's rider list spreadsheet rows match rows.
+        """
+        call_google_docs(
+            SpreadsheetsService, sync_rider_list, event.google_doc_id,
+            n_columns, rows)
+
+    def url(self, event, event_page_url):
+        """Return the URL of event's rider list.
+        """
+        return ('https://spreadsheets.google.com/ccc?key={0}'
+                .format(event.google_doc_id.split(':')[1]))
+
+
+class LocalBackend(object):
+    """Rider lists rendered from the database by the rider-list views.
+    """
+    def create(self, event, template_name):
+        return 'local:{0}'.format(event.uuid)
+
+    def share(self, event):
+        # Rider list views are public
+        pass
+
+    def set_heading(self, event, col, heading):
+        # Headings are rendered with the list
+        pass
+
+    def update(self, event, n_columns, rows):
+        # Rider list is rendered when it is requested
+        pass
+
+    def url(self, event, event_page_url):
+        return '{0}rider-list/{1}/xlsx/'.format(event_page_url, event.uuid)
+
+
+def cached_rider_list(event, format, render_rows, filename):
+    """Return a response with event's rider list as a format file from
+    the cache, or call render_rows(event) to get the list of rows, the
+    first of which is the headings, and cache the rendered file.
+    """
+    key = _rider_list_key(event.__class__, event.pk, format)
+    content = cache.get(key)
+    if content is None:
+        # Render the cached list from the default database rather than
+        # a replica that may lag it
+        with default_reads():
+            rows = render_rows(reread_from_default(event))
+        content = _RENDERERS[format](rows)
+        cache.set(key, content, RIDER_LIST_TIMEOUT)
+    response = HttpResponse(content, mimetype=RIDER_LIST_FORMATS[format])
+    response['Content-Disposition'] = (
+        'attachment; filename={0}.{1}'.format(filename, format))
+    return response
+
+
+def clear_rider_list(model, event_pk):
+    """Remove the cached rider lists for the model instance with
+    event_pk.
+    """
+    cache.delete_many([
+        _rider_list_key(model, event_pk, format)
+        for format in RIDER_LIST_FORMATS])
+
+
+def _rider_list_key(model, event_pk, format):
+    return 'riderlist:{0}.{1}:{2}:{3}'.format(
+        model._meta.app_label, model._meta.object_name, event_pk, format)
+
+
+def _render_csv(rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([value.encode('utf-8') for value in row])
+    return buffer.getvalue()
+
+
+def _render_ods(rows):
+    """Return an OpenDocument spreadsheet of rows.
+    """
+    table_rows = u''.join(
+        u'<table:table-row>{0}</table:table-row>'.format(u''.join(
+            u'<table:table-cell office:value-type="string">'
+            u'<text:p>{0}</text:p></table:table-cell>'.format(escape(value))
+            for value in row))
+        for row in rows)
+    content = (
+        u'<?xml version="1.0" encoding="UTF-8"?>'
+        u'<office:document-content'
+        u' xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+        u' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+        u' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"'
+        u' office:version="1.2">'
+        u'<office:body><office:spreadsheet>'
+        u'<table:table table:name="Riders">{0}</table:table>'
+        u'</office:spreadsheet></office:body>'
+        u'</office:document-content>'.format(table_rows))
+    manifest = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<manifest:manifest'
+        ' xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0"'
+        ' manifest:version="1.2">'
+        '<manifest:file-entry manifest:full-path="/"'
+        ' manifest:media-type="{0}"/>'
+        '<manifest:file-entry manifest:full-path="content.xml"'
+        ' manifest:media-type="text/xml"/>'
+        '</manifest:manifest>'.format(RIDER_LIST_FORMATS['ods']))
+    # The mimetype member must be first, and not compressed
+    return _zip_file((
+        ('mimetype', RIDER_LIST_FORMATS['ods'], zipfile.ZIP_STORED),
+        ('META-INF/manifest.xml', manifest, zipfile.ZIP_DEFLATED),
+        ('content.xml', content.encode('utf-8'), zipfile.ZIP_DEFLATED),
+    ))
+
+
+def _render_xlsx(rows):
+    """Return an Office Open XML spreadsheet of rows.
+    """
+    sheet_rows = u''.join(
+        u'<row>{0}</row>'.format(u''.join(
+            u'<c t="inlineStr"><is><t>{0}</t></is></c>'.format(escape(value))
+            for value in row))
+        for row in rows)
+    sheet = (
+        u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        u'<worksheet'
+        u' xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        u'<sheetData>{0}</sheetData></worksheet>'.format(sheet_rows))
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+        'content-types">'
+        '<Default Extension="rels" ContentType="application/'
+        'vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml"'
+        ' ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>')
+    package_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument"'
+        ' Target="xl/workbook.xml"/>'
+        '</Relationships>')
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook'
+        ' xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+        ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships">'
+        '<sheets><sheet name="Riders" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>')
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet"'
+        ' Target="worksheets/sheet1.xml"/>'
+        '</Relationships>')
+    return _zip_file((
+        ('[Content_Types].xml', content_types, zipfile.ZIP_DEFLATED),
+        ('_rels/.rels', package_rels, zipfile.ZIP_DEFLATED),
+        ('xl/workbook.xml', workbook, zipfile.ZIP_DEFLATED),
+        ('xl/_rels/workbook.xml.rels', workbook_rels, zipfile.ZIP_DEFLATED),
+        ('xl/worksheets/sheet1.xml', sheet.encode('utf-8'),
+         zipfile.ZIP_DEFLATED),
+    ))
+
+
+def _zip_file(members):
+    """Return the content of a zip file of the (name, data,
+    compression) members.
+    """
+    buffer = StringIO()
+    archive = zipfile.ZipFile(buffer, 'w')
+    for name, data, compression in members:
+        archive.writestr(zipfile.ZipInfo(name), data, compression)
+    archive.close()
+    return buffer.getvalue()
+
+
+_RENDERERS = {
+    'csv': _render_csv,
+    'ods': _render_ods,
+    'xlsx': _render_xlsx,
+}
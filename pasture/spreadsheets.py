@@ -0,0 +1,164 @@
+"""Google Docs rider list spreadsheet sync for the RandoPony apps.
+"""
+# Google Docs:
+import gdata.spreadsheet
+import gdata.spreadsheet.service
+# RandoPony:
+from .models import RiderListSnapshot
+
+
+class SpreadsheetBatchError(Exception):
+    """Raised when Google Docs rejects cell updates in a batch request.
+    """
+
+
+class CellBatch(object):
+    """Batching layer over a gdata SpreadsheetsService client.
+
+    Cells are read in bulk from the worksheet cells feed by fetch().
+    Changes to them are queued by set(), and sent by flush() in cells
+    feed batch requests of up to max_batch_size cells each.
+    """
+    max_batch_size = 500
+
+    def __init__(self, client, key, wksht_id='od6'):
+        self.client = client
+        self.key = key
+        self.wksht_id = wksht_id
+        self.row_count = 0
+        self._cells = {}
+        self._changes = []
+        self._batch_url = None
+
+    def fetch(self, min_row, max_col, max_row=None):
+        """Get the cells, including empty ones, in the range of
+        worksheet rows starting at min_row, and columns 1 to max_col.
+
+        Return a dict of cell values keyed by (row, col).
+        """
+        query = gdata.spreadsheet.service.CellQuery()
+        query['min-row'] = str(min_row)
+        query['min-col'] = '1'
+        query['max-col'] = str(max_col)
+        if max_row is not None:
+            query['max-row'] = str(max_row)
+        query['return-empty'] = 'true'
+        feed = self.client.GetCellsFeed(
+            self.key, wksht_id=self.wksht_id, query=query)
+        self.row_count = int(feed.row_count.text)
+        self._batch_url = feed.GetBatchLink().href
+        values = {}
+        for entry in feed.entry:
+            cell = (int(entry.cell.row), int(entry.cell.col))
+            self._cells[cell] = entry
+            values[cell] = entry.cell.inputValue or ''
+        return values
+
+    def grow(self, row_count):
+        """Increase the number of rows in the worksheet to row_count.
+        """
+        worksheet = self.client.GetWorksheetsFeed(
+            self.key, wksht_id=self.wksht_id)
+        worksheet.row_count.text = str(row_count)
+        self.client.UpdateWorksheet(worksheet)
+        self.row_count = row_count
+
+    def set(self, row, col, value):
+        """Queue a change to the value of a fetched cell.
+        """
+        self._changes.append((row, col, value))
+
+    def flush(self):
+        """Send the queued cell changes to the worksheet.
+        """
+        changes, self._changes = self._changes, []
+        for start in range(0, len(changes), self.max_batch_size):
+            batch = gdata.spreadsheet.SpreadsheetsCellsFeed()
+            for row, col, value in changes[start:start + self.max_batch_size]:
+                entry = self._cells[(row, col)]
+                entry.cell.inputValue = value
+                batch.AddUpdate(entry)
+            result = self.client.ExecuteBatch(batch, self._batch_url)
+            failures = [entry for entry in result.entry
+                        if entry.batch_status.code != '200']
+            if failures:
+                raise SpreadsheetBatchError(
+                    '{0} of {1} cell updates rejected for spreadsheet {2}: '
+                    '{3}'.format(
+                        len(failures), len(batch.entry), self.key,
+                        failures[0].batch_status.reason))
+
+
+class RiderListSync(object):
+    """Push a rider list to a Google Docs spreadsheet, sending only the
+    cells that differ from the sheet's content.
+
+    Each row is a list of n_columns cell values in spreadsheet column
+    order. Row 1 of the sheet is the column headings.
+
+    The snapshot of the previous push sets the range of rows that is
+    read from the sheet. If the sheet content doesn't agree with the
+    snapshot (e.g. the organizer has edited the sheet, or there is no
+    snapshot yet) the whole sheet is read and diffed.
+    """
+    # Number of rows to add when the worksheet needs to grow
+    grow_rows = 50
+
+    def __init__(self, client, google_doc_id, n_columns):
+        self.client = client
+        self.google_doc_id = google_doc_id
+        self.key = google_doc_id.split(':')[1]
+        self.n_columns = n_columns
+
+    def sync(self, rows):
+        """Make the spreadsheet rows match rows, and record them as
+        the new snapshot.
+        """
+        snapshot, created = RiderListSnapshot.objects.get_or_create(
+            google_doc_id=self.google_doc_id)
+        old_rows = snapshot.row_list
+        batch = CellBatch(self.client, self.key)
+        # Read 1 row past the snapshot and new rows to catch rows added
+        # outside of the pony
+        n_rows = max(len(rows), len(old_rows)) + 1
+        sheet = batch.fetch(2, self.n_columns, max_row=n_rows + 1)
+        if not self._snapshot_matches(sheet, old_rows, n_rows):
+            sheet = batch.fetch(2, self.n_columns)
+            n_rows = max(n_rows, batch.row_count - 1)
+        if len(rows) + 1 > batch.row_count:
+            first_new_row = batch.row_count + 1
+            batch.grow(len(rows) + 1 + self.grow_rows)
+            sheet.update(
+                batch.fetch(first_new_row, self.n_columns, batch.row_count))
+        blank_row = [''] * self.n_columns
+        for i in range(n_rows):
+            row = rows[i] if i < len(rows) else blank_row
+            for col, value in enumerate(row):
+                cell = (i + 2, col + 1)
+                if cell in sheet and sheet[cell] != value:
+                    batch.set(cell[0], cell[1], value)
+        batch.flush()
+        snapshot.row_list = rows
+        snapshot.save()
+
+    def _snapshot_matches(self, sheet, old_rows, n_rows):
+        """Does the content of the rows read from the spreadsheet agree
+        with the snapshot rows?
+        """
+        blank_row = [''] * self.n_columns
+        for i in range(n_rows):
+            old_row = old_rows[i] if i < len(old_rows) else blank_row
+            for col in range(self.n_columns):
+                cell = (i + 2, col + 1)
+                old_value = old_row[col] if col < len(old_row) else ''
+                if cell in sheet and sheet[cell] != old_value:
+                    return False
+        return True
+
+
+def sync_rider_list(client, google_doc_id, n_columns, rows):
+    """Push rows to the rider list spreadsheet with a RiderListSync.
+
+    Signature suits call_google_docs().
+    """
+    RiderListSync(client, google_doc_id, n_columns).sync(rows)
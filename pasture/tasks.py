@@ -0,0 +1,21 @@
+"""Asynchronous tasks for RandoPony pasture app.
+"""
+# Celery:
+from celery.schedules import crontab
+from celery.signals import worker_process_init
+from celery.task import periodic_task
+# RandoPony:
+from .archive import archive_events
+from .templatecache import warm_template_cache
+
+
+# Compile the page and email templates once in each worker process,
+# rather than in the first tasks that render them
+worker_process_init.connect(warm_template_cache)
+
+
+@periodic_task(run_every=crontab(hour=3, minute=30), ignore_result=True)
+def archive_past_events():
+    """Move past events and their riders to the archive tables.
+    """
+    archive_events()
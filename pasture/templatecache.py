@@ -0,0 +1,49 @@
+"""Template cache warming for the RandoPony apps.
+
+In production the templates are loaded by Django's cached template
+loader, which compiles each template the first time that a process
+uses it, and keeps it. warm_template_cache() loads all of the site and
+app templates, including the email templates that the celery tasks
+render, so that they are compiled when a web or worker process starts
+instead of during its first requests and tasks.
+"""
+# Standard library:
+import os
+# Django:
+from django.conf import settings
+from django.template.loader import get_template
+from django.template.loaders.app_directories import app_template_dirs
+
+
+# Template file extensions; .html pages and .txt email bodies
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def template_names():
+    """Return the sorted names of the templates in the TEMPLATE_DIRS,
+    and in the templates directories of the RandoPony apps.
+    """
+    project_path = os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__)))
+    template_dirs = list(settings.TEMPLATE_DIRS) + [
+        template_dir for template_dir in app_template_dirs
+        if os.path.abspath(template_dir).startswith(project_path)]
+    names = set()
+    for template_dir in template_dirs:
+        for dirpath, dirnames, filenames in os.walk(template_dir):
+            for filename in filenames:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.relpath(
+                        os.path.join(dirpath, filename), template_dir)
+                    names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_template_cache(**kwargs):
+    """Load and compile all of the template_names() templates.
+
+    Receiver for the celery worker_process_init signal, and called by
+    the randopony.wsgi script when mod_wsgi starts a process.
+    """
+    for name in template_names():
+        get_template(name)
@@ -1,3 +1,12 @@
+from test_archive import *
+from test_db import *
 from test_helpers import *
+from test_jobs import *
+from test_mailer import *
 from test_models import *
+from test_pagecache import *
+from test_riderlists import *
+from test_spreadsheets import *
+from test_tasks import *
+from test_templatecache import *
 from test_views import *
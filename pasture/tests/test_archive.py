@@ -0,0 +1,115 @@
+"""Unit tests for RandoPony pasture app past events archiving.
+"""
+# Standard library:
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+# Mock:
+from mock import patch
+# Django:
+import django.test
+from django.conf import settings
+from django.core.urlresolvers import reverse
+
+
+class TestArchiveEvents(django.test.TestCase):
+    """Unit tests for archive_events function.
+    """
+    fixtures = ['brevets.yaml', 'riders.yaml', 'populaires.yaml']
+
+    def _call_target_function(self, today, *args):
+        from .. import archive
+        with patch.object(archive, 'date') as mock_date:
+            mock_date.today.return_value = today
+            return archive.archive_events(*args)
+
+    def test_archive_events_moves_brevets(self):
+        """archive_events moves brevets older than days to archive
+        """
+        from ...register.models import ArchivedBrevet
+        from ...register.models import Brevet
+        self._call_target_function(date(2010, 6, 1), 7)
+        self.assertEqual(
+            sorted(brevet.date for brevet in ArchivedBrevet.objects.all()),
+            [date(2010, 4, 17), date(2010, 5, 1), date(2010, 5, 22)])
+        self.assertFalse(
+            Brevet.objects.filter(date__lt=date(2010, 5, 25)).exists())
+
+    def test_archive_events_moves_brevet_riders(self):
+        """archive_events moves riders of archived brevets to archive
+        """
+        from ...register.models import ArchivedBrevetRider
+        from ...register.models import BrevetRider
+        self._call_target_function(date(2010, 6, 1), 7)
+        archived = ArchivedBrevetRider.objects.get(last_name='Latornell')
+        self.assertEqual(archived.brevet.date, date(2010, 5, 22))
+        self.assertEqual(archived.lowercase_last_name, 'latornell')
+        self.assertFalse(
+            BrevetRider.objects.filter(last_name='Latornell').exists())
+
+    def test_archive_events_moves_populaires(self):
+        """archive_events moves populaires older than days to archive
+        """
+        from ...populaires.models import ArchivedPopulaire
+        self._call_target_function(date(2011, 4, 5), 7)
+        self.assertEqual(
+            sorted(pop.short_name for pop in ArchivedPopulaire.objects.all()),
+            ['NewYearsPop', 'VicPop'])
+
+    def test_archive_events_returns_counts(self):
+        """archive_events returns number of events archived by model
+        """
+        counts = self._call_target_function(date(2010, 6, 1), 7)
+        self.assertEqual(counts, {'Brevet': 3, 'Populaire': 0})
+
+    def test_archive_events_keeps_uncopied_brevets(self):
+        """archive_events only deletes the brevets it copied to archive
+        """
+        from .. import archive
+        from ..models import RiderListSnapshot
+        from ...register.models import Brevet
+
+        def add_brevet(**kwargs):
+            # Brevet dated in the past, added while the archive runs
+            if not Brevet.objects.filter(location='Late').exists():
+                late = Brevet.objects.all()[0]
+                late.pk = None
+                late.date = date(2010, 4, 1)
+                late.location = 'Late'
+                late.save()
+            return RiderListSnapshot.objects.filter(**kwargs)
+        with patch.object(archive, 'RiderListSnapshot') as mock_snapshot:
+            mock_snapshot.objects.filter.side_effect = add_brevet
+            counts = self._call_target_function(date(2010, 6, 1), 7)
+        self.assertEqual(counts, {'Brevet': 3, 'Populaire': 0})
+        self.assertTrue(Brevet.objects.filter(location='Late').exists())
+
+    def test_archive_events_min_days(self):
+        """archive_events doesn't archive events less than 7 days old
+        """
+        counts = self._call_target_function(date(2010, 5, 5), 0)
+        self.assertEqual(counts, {'Brevet': 1, 'Populaire': 0})
+
+    def test_archive_events_default_days(self):
+        """archive_events uses ARCHIVE_EVENTS_AFTER_DAYS setting by default
+        """
+        with patch.object(settings, 'ARCHIVE_EVENTS_AFTER_DAYS', 30):
+            counts = self._call_target_function(date(2010, 6, 1))
+        self.assertEqual(counts, {'Brevet': 2, 'Populaire': 0})
+
+    def test_archived_brevet_page(self):
+        """brevet view shows past event page for archived brevet
+        """
+        from ...register import models
+        self._call_target_function(date(2010, 6, 1), 7)
+        url = reverse('register:brevet', args=('LM', 300, '01May2010'))
+        with patch.object(models, 'datetime') as mock_datetime:
+            mock_datetime.today.return_value = datetime(2010, 6, 1)
+            mock_datetime.now.return_value = datetime(2010, 6, 1, 11, 0)
+            mock_datetime.combine = datetime.combine
+            mock_datetime.timedelta = timedelta
+            response = self.client.get(url)
+        self.assertContains(
+            response,
+            'The LM300 01-May-2010 event is over, and the RandoPony '
+            'has moved on!')
@@ -0,0 +1,183 @@
+"""Unit tests for RandoPony pasture app database connection setup.
+"""
+# Mock:
+from mock import Mock
+from mock import patch
+# Django:
+from django.conf import settings
+from django.utils import unittest
+
+
+class TestSetSqlitePragmas(unittest.TestCase):
+    """Unit tests for set_sqlite_pragmas connection_created receiver.
+    """
+    def _call_fut(self, *args, **kwargs):
+        from ..db import set_sqlite_pragmas
+        return set_sqlite_pragmas(*args, **kwargs)
+
+    def _make_connection(self, engine):
+        connection = Mock(name='connection')
+        connection.settings_dict = {'ENGINE': engine}
+        return connection
+
+    def test_pragmas_run_in_order(self):
+        """set_sqlite_pragmas runs SQLITE_PRAGMAS in order on connection
+        """
+        connection = self._make_connection('django.db.backends.sqlite3')
+        pragmas = (('journal_mode', 'WAL'), ('busy_timeout', 20000))
+        with patch.object(settings, 'SQLITE_PRAGMAS', pragmas):
+            self._call_fut(None, connection=connection)
+        cursor = connection.connection.cursor.return_value
+        self.assertEqual(
+            cursor.execute.call_args_list,
+            [(('PRAGMA journal_mode = WAL',), {}),
+             (('PRAGMA busy_timeout = 20000',), {})])
+
+    def test_other_database_engines_ignored(self):
+        """set_sqlite_pragmas does nothing for non-SQLite connection
+        """
+        connection = self._make_connection(
+            'django.db.backends.postgresql_psycopg2')
+        pragmas = (('journal_mode', 'WAL'),)
+        with patch.object(settings, 'SQLITE_PRAGMAS', pragmas):
+            self._call_fut(None, connection=connection)
+        self.assertFalse(connection.connection.cursor.called)
+
+
+class TestReplicaRouting(unittest.TestCase):
+    """Unit tests for ReplicaMiddleware and ReplicaRouter.
+    """
+    def setUp(self):
+        from django.test.client import RequestFactory
+        self.factory = RequestFactory()
+        self.databases = dict(settings.DATABASES, replica={})
+
+    def tearDown(self):
+        from ..db import use_replica
+        use_replica(False)
+
+    def _db_for_read(self, request, databases=None):
+        from ..db import ReplicaMiddleware
+        from ..db import ReplicaRouter
+        from ..models import Link
+        ReplicaMiddleware().process_request(request)
+        with patch.object(
+                settings, 'DATABASES', databases or self.databases):
+            return ReplicaRouter().db_for_read(Link)
+
+    def test_public_page_get_reads_replica(self):
+        """GET request for public page reads from replica
+        """
+        request = self.factory.get('/register/')
+        self.assertEqual(self._db_for_read(request), 'replica')
+
+    def test_post_reads_default(self):
+        """POST request reads from default database
+        """
+        request = self.factory.post('/register/LM400/22May2010/form')
+        self.assertEqual(self._db_for_read(request), 'default')
+
+    def test_admin_get_reads_default(self):
+        """GET request for admin page reads from default database
+        """
+        request = self.factory.get('/admin/register/brevet/')
+        self.assertEqual(self._db_for_read(request), 'default')
+
+    def test_urlconf_without_admin(self):
+        """GET request reads from replica if there is no admin site
+        """
+        from django.core.urlresolvers import NoReverseMatch
+        from .. import db
+        request = self.factory.get('/register/')
+        with patch.object(db, 'reverse') as mock_reverse:
+            mock_reverse.side_effect = NoReverseMatch
+            self.assertEqual(self._db_for_read(request), 'replica')
+
+    def test_pinned_client_reads_default(self):
+        """GET request with pin cookie reads from default database
+        """
+        from ..db import PIN_COOKIE
+        request = self.factory.get('/register/LM400/22May2010/1/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self._db_for_read(request), 'default')
+
+    def test_no_replica_configured(self):
+        """GET request reads from default database if there is no replica
+        """
+        request = self.factory.get('/register/')
+        self.assertEqual(
+            self._db_for_read(request, settings.DATABASES), 'default')
+
+    def test_post_response_sets_pin_cookie(self):
+        """response to POST request sets pin cookie
+        """
+        from django.http import HttpResponseRedirect
+        from ..db import PIN_COOKIE
+        from ..db import ReplicaMiddleware
+        request = self.factory.post('/register/LM400/22May2010/form')
+        response = ReplicaMiddleware().process_response(
+            request, HttpResponseRedirect('/register/LM400/22May2010/1/'))
+        self.assertEqual(
+            response.cookies[PIN_COOKIE]['max-age'],
+            settings.REPLICA_PIN_SECONDS)
+
+    def test_response_ends_replica_reads(self):
+        """reads after the response are from the default database
+        """
+        from django.http import HttpResponse
+        from ..db import ReplicaMiddleware
+        from ..db import ReplicaRouter
+        from ..models import Link
+        request = self.factory.get('/register/')
+        middleware = ReplicaMiddleware()
+        middleware.process_request(request)
+        middleware.process_response(request, HttpResponse())
+        with patch.object(settings, 'DATABASES', self.databases):
+            self.assertEqual(ReplicaRouter().db_for_read(Link), 'default')
+
+    def test_writes_to_default(self):
+        """writes go to default database during public page request
+        """
+        from ..db import ReplicaMiddleware
+        from ..db import ReplicaRouter
+        from ..models import Link
+        ReplicaMiddleware().process_request(self.factory.get('/register/'))
+        with patch.object(settings, 'DATABASES', self.databases):
+            self.assertEqual(ReplicaRouter().db_for_write(Link), 'default')
+
+    def test_default_reads(self):
+        """reads in default_reads block are from the default database
+        """
+        from ..db import ReplicaRouter
+        from ..db import default_reads
+        from ..models import Link
+        self._db_for_read(self.factory.get('/register/'))
+        with patch.object(settings, 'DATABASES', self.databases):
+            with default_reads():
+                self.assertEqual(
+                    ReplicaRouter().db_for_read(Link), 'default')
+            self.assertEqual(ReplicaRouter().db_for_read(Link), 'replica')
+
+    def test_reread_from_default(self):
+        """reread_from_default gets instance from default database
+        """
+        from ..db import reread_from_default
+        from ..models import Link
+        link = Link(pk=42)
+        self._db_for_read(self.factory.get('/register/'))
+        with patch.object(Link, '_default_manager') as mock_manager:
+            with patch.object(settings, 'DATABASES', self.databases):
+                reread = reread_from_default(link)
+        mock_manager.using.assert_called_once_with('default')
+        mock_manager.using.return_value.get.assert_called_once_with(pk=42)
+        self.assertIs(reread, mock_manager.using.return_value.get.return_value)
+
+    def test_reread_from_default_not_needed(self):
+        """reread_from_default returns instance read from default database
+        """
+        from ..db import reread_from_default
+        from ..models import Link
+        link = Link(pk=42)
+        self._db_for_read(self.factory.post('/register/'))
+        with patch.object(settings, 'DATABASES', self.databases):
+            self.assertIs(reread_from_default(link), link)
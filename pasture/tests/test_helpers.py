@@ -1,8 +1,12 @@
 """Unit tests for helpers module.
 
 """
+# Mock:
+from mock import Mock
+from mock import patch
 # Django:
 import django.test
+from django.conf import settings
 # RandoPony:
 from ..helpers import email2words
 
@@ -13,3 +17,243 @@ class TestHelpers(django.test.TestCase):
         """
         self.assertEqual(
             email2words('djl@example.bc.ca'), 'djl at example dot bc dot ca')
+
+
+class TestDelayCoalesced(django.test.TestCase):
+    """Unit tests for delay_coalesced and clear_coalesced helpers.
+    """
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _make_task(self, name='randopony.register.tasks.update'):
+        task = Mock(name='task')
+        task.name = name
+        return task
+
+    def test_first_request_queues_task(self):
+        """delay_coalesced queues task with countdown of coalesce window
+        """
+        from ..helpers import delay_coalesced
+        task = self._make_task()
+        with patch.object(settings, 'COALESCE_TASK_WINDOW', 30):
+            delay_coalesced(task, 42)
+        task.apply_async.assert_called_once_with(args=[42], countdown=30)
+
+    def test_pending_requests_coalesced(self):
+        """delay_coalesced queues 1 task for many requests for same event
+        """
+        from ..helpers import delay_coalesced
+        task = self._make_task()
+        for i in range(50):
+            delay_coalesced(task, 42)
+        self.assertEqual(task.apply_async.call_count, 1)
+
+    def test_other_events_not_coalesced(self):
+        """delay_coalesced queues separate tasks for different events
+        """
+        from ..helpers import delay_coalesced
+        task = self._make_task()
+        delay_coalesced(task, 42)
+        delay_coalesced(task, 43)
+        self.assertEqual(task.apply_async.call_count, 2)
+
+    def test_other_tasks_not_coalesced(self):
+        """delay_coalesced queues separate tasks for different task names
+        """
+        from ..helpers import delay_coalesced
+        task1 = self._make_task('randopony.register.tasks.update')
+        task2 = self._make_task('randopony.populaires.tasks.update')
+        delay_coalesced(task1, 42)
+        delay_coalesced(task2, 42)
+        self.assertEqual(task1.apply_async.call_count, 1)
+        self.assertEqual(task2.apply_async.call_count, 1)
+
+    def test_clear_allows_next_request(self):
+        """delay_coalesced queues another task after clear_coalesced
+        """
+        from ..helpers import clear_coalesced
+        from ..helpers import delay_coalesced
+        task = self._make_task()
+        delay_coalesced(task, 42)
+        clear_coalesced(task, 42)
+        delay_coalesced(task, 42)
+        self.assertEqual(task.apply_async.call_count, 2)
+
+
+class TestGoogleDocsClientPool(django.test.TestCase):
+    """Unit tests for pooled Google Docs client helpers.
+    """
+    def setUp(self):
+        from ..models import EmailAddress
+        EmailAddress.objects.create(
+            key='google_docs', email='randopony@example.com')
+        self.service = Mock(name='service')
+        self.addCleanup(self._reset_pool)
+
+    def _reset_pool(self):
+        from ..helpers import reset_google_docs_login
+        reset_google_docs_login(self.service)
+
+    def test_login_once_for_many_calls(self):
+        """google_docs_login logs in once and reuses pooled client
+        """
+        from ..helpers import google_docs_login
+        client1 = google_docs_login(self.service)
+        client2 = google_docs_login(self.service)
+        self.assertIs(client1, client2)
+        self.assertEqual(client1.ClientLogin.call_count, 1)
+        self.assertTrue(client1.ssl)
+
+    def test_login_again_after_ttl(self):
+        """google_docs_login logs in again when pooled login is stale
+        """
+        import time
+        from .. import helpers
+        helpers.google_docs_login(self.service)
+        later = time.time() + helpers.GOOGLE_DOCS_LOGIN_TTL + 1
+        with patch.object(helpers, 'time') as mock_time:
+            mock_time.time.return_value = later
+            client = helpers.google_docs_login(self.service)
+        self.assertEqual(client.ClientLogin.call_count, 2)
+
+    def test_call_google_docs_returns_result(self):
+        """call_google_docs returns result of function called with client
+        """
+        from ..helpers import call_google_docs
+        func = Mock(return_value='foo')
+        result = call_google_docs(self.service, func, 'bar', baz=42)
+        self.assertEqual(result, 'foo')
+        func.assert_called_once_with(
+            self.service.return_value, 'bar', baz=42)
+
+    def test_call_google_docs_rejected_token(self):
+        """call_google_docs logs in again & retries when token is rejected
+        """
+        import gdata.service
+        from ..helpers import call_google_docs
+        responses = [
+            gdata.service.RequestError(
+                {'status': 401, 'reason': 'Token expired', 'body': ''}),
+            'foo',
+        ]
+
+        def respond(client):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        func = Mock(side_effect=respond)
+        result = call_google_docs(self.service, func)
+        self.assertEqual(result, 'foo')
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(
+            self.service.return_value.ClientLogin.call_count, 2)
+
+    def test_call_google_docs_other_error(self):
+        """call_google_docs raises errors other than rejected tokens
+        """
+        import gdata.service
+        from ..helpers import call_google_docs
+        func = Mock()
+        func.side_effect = gdata.service.RequestError(
+            {'status': 500, 'reason': 'Server error', 'body': ''})
+        self.assertRaises(
+            gdata.service.RequestError, call_google_docs, self.service, func)
+        self.assertEqual(func.call_count, 1)
+
+
+class TestGetRiderListTemplate(django.test.TestCase):
+    """Unit tests for get_rider_list_template helper.
+    """
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Mock(name='client')
+        self.client.get_resources.return_value.entry = [
+            self._make_doc('Brevet Rider List Template', 'brevet'),
+            self._make_doc('Populaire Rider List Template', 'populaire'),
+        ]
+
+    def _make_doc(self, title, self_link):
+        doc = Mock(name=title)
+        doc.title.text = title
+        doc.GetSelfLink.return_value.href = self_link
+        return doc
+
+    def test_template_self_link(self):
+        """get_rider_list_template returns entry with template self link
+        """
+        from ..helpers import get_rider_list_template
+        template = get_rider_list_template(
+            'Brevet Rider List Template', self.client)
+        self.assertEqual(template.GetSelfLink().href, 'brevet')
+
+    def test_one_feed_request_for_many_lookups(self):
+        """get_rider_list_template reads resource feed once for many calls
+        """
+        from ..helpers import get_rider_list_template
+        get_rider_list_template('Brevet Rider List Template', self.client)
+        get_rider_list_template('Populaire Rider List Template', self.client)
+        get_rider_list_template('Brevet Rider List Template', self.client)
+        self.assertEqual(self.client.get_resources.call_count, 1)
+
+    def test_index_refreshed_on_miss(self):
+        """get_rider_list_template reads resource feed for unknown title
+        """
+        from ..helpers import get_rider_list_template
+        from ..helpers import RiderListTemplateError
+        get_rider_list_template('Brevet Rider List Template', self.client)
+        self.assertRaises(
+            RiderListTemplateError,
+            get_rider_list_template, 'Foo Template', self.client)
+        self.assertEqual(self.client.get_resources.call_count, 2)
+
+
+class TestCopyRiderListTemplate(django.test.TestCase):
+    """Unit tests for copy_rider_list_template helper.
+    """
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Mock(name='client')
+        doc = Mock(name='template')
+        doc.title.text = 'Brevet Rider List Template'
+        doc.GetSelfLink.return_value.href = 'old-link'
+        self.client.get_resources.return_value.entry = [doc]
+
+    def test_stale_template_link_refetched(self):
+        """copy_rider_list_template refetches index when copy fails
+        """
+        import gdata.client
+        from ..helpers import copy_rider_list_template
+        from ..helpers import get_rider_list_template
+        get_rider_list_template('Brevet Rider List Template', self.client)
+        moved_doc = Mock(name='moved_template')
+        moved_doc.title.text = 'Brevet Rider List Template'
+        moved_doc.GetSelfLink.return_value.href = 'new-link'
+        self.client.get_resources.return_value.entry = [moved_doc]
+        responses = [gdata.client.RequestError(), Mock(name='created_doc')]
+
+        def respond(template, title):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        self.client.copy_resource.side_effect = respond
+        copy_rider_list_template(
+            self.client, 'Brevet Rider List Template', 'LM200 01-Jan-2012')
+        self.assertEqual(self.client.get_resources.call_count, 2)
+        template = self.client.copy_resource.call_args[0][0]
+        self.assertEqual(template.GetSelfLink().href, 'new-link')
+
+    def test_second_copy_failure_raised(self):
+        """copy_rider_list_template raises error if retried copy fails
+        """
+        import gdata.client
+        from ..helpers import copy_rider_list_template
+        self.client.copy_resource.side_effect = gdata.client.RequestError()
+        self.assertRaises(
+            gdata.client.RequestError, copy_rider_list_template,
+            self.client, 'Brevet Rider List Template', 'LM200 01-Jan-2012')
+        self.assertEqual(self.client.copy_resource.call_count, 2)
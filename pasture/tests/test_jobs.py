@@ -0,0 +1,136 @@
+"""Unit tests for RandoPony pasture app background job progress.
+"""
+# Mock:
+from mock import Mock
+from mock import patch
+# Django:
+from django.core import mail
+from django.core.cache import cache
+from django.utils import unittest
+
+
+class TestJobs(unittest.TestCase):
+    """Unit tests for background job progress functions.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = Mock(name='user')
+        self.user.pk = 42
+
+    def test_new_job_in_progress(self):
+        """job_reports reports new job as in progress
+        """
+        from ..jobs import job_reports
+        from ..jobs import start_job
+        start_job(self.user, 40, 'URLs for 40 brevets sent')
+        self.assertEqual(
+            job_reports(self.user),
+            ['In progress (0 of 40 done): URLs for 40 brevets sent'])
+
+    def test_job_progress(self):
+        """job_reports reports number of items done by job
+        """
+        from ..jobs import job_reports
+        from ..jobs import start_job
+        from ..jobs import update_job
+        job_id = start_job(self.user, 40, 'URLs for 40 brevets sent')
+        update_job(job_id, 10)
+        self.assertEqual(
+            job_reports(self.user),
+            ['In progress (10 of 40 done): URLs for 40 brevets sent'])
+
+    def test_finished_job_reported_once(self):
+        """job_reports reports done message for finished job only once
+        """
+        from ..jobs import job_reports
+        from ..jobs import start_job
+        from ..jobs import update_job
+        job_id = start_job(self.user, 40, 'URLs for 40 brevets sent')
+        update_job(job_id, 40, finished=True)
+        self.assertEqual(
+            job_reports(self.user), ['URLs for 40 brevets sent'])
+        self.assertEqual(job_reports(self.user), [])
+
+    def test_other_users_jobs_not_reported(self):
+        """job_reports only reports the user's own jobs
+        """
+        from ..jobs import job_reports
+        from ..jobs import start_job
+        other_user = Mock(name='other_user')
+        other_user.pk = 43
+        start_job(other_user, 40, 'URLs for 40 brevets sent')
+        self.assertEqual(job_reports(self.user), [])
+
+    def test_fanned_out_job_progress(self):
+        """job_reports reports number of items finished by item tasks
+        """
+        from ..jobs import finish_job_item
+        from ..jobs import job_reports
+        from ..jobs import start_job
+        job_id = start_job(
+            self.user, 3, 'Rider lists created', items=[1, 2, 3])
+        finish_job_item(job_id, 1)
+        finish_job_item(job_id, 3)
+        self.assertEqual(
+            job_reports(self.user),
+            ['In progress (2 of 3 done): Rider lists created'])
+
+    def test_fanned_out_job_failures(self):
+        """job_reports reports number of failed items for finished job
+        """
+        from ..jobs import finish_job_item
+        from ..jobs import job_reports
+        from ..jobs import start_job
+        job_id = start_job(
+            self.user, 3, 'Rider lists created', items=[1, 2, 3])
+        finish_job_item(job_id, 1)
+        finish_job_item(job_id, 2, failed=True)
+        finish_job_item(job_id, 3)
+        self.assertEqual(
+            job_reports(self.user), ['Rider lists created (1 of 3 failed)'])
+        self.assertEqual(job_reports(self.user), [])
+
+
+class TestSendJobMessages(unittest.TestCase):
+    """Unit tests for send_job_messages function.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = Mock(name='user')
+        self.user.pk = 42
+
+    def _make_messages(self, count):
+        return [mail.EmailMessage(subject='msg {0}'.format(i))
+                for i in range(count)]
+
+    def test_send_job_messages_finishes_job(self):
+        """send_job_messages sends messages and marks job as finished
+        """
+        from .. import jobs
+        job_id = jobs.start_job(self.user, 25, 'Emails sent')
+        with patch.object(jobs, 'send_messages') as mock_send:
+            mock_send.side_effect = len
+            jobs.send_job_messages(job_id, self._make_messages(25))
+        self.assertEqual(mock_send.call_count, 3)
+        self.assertEqual(jobs.job_reports(self.user), ['Emails sent'])
+
+    def test_send_job_messages_failure(self):
+        """send_job_messages reports failure and re-raises exception
+        """
+        from .. import jobs
+        job_id = jobs.start_job(self.user, 25, 'Emails sent')
+        responses = [10, IOError()]
+
+        def respond(messages):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        with patch.object(jobs, 'send_messages') as mock_send:
+            mock_send.side_effect = respond
+            self.assertRaises(
+                IOError,
+                jobs.send_job_messages, job_id, self._make_messages(25))
+        self.assertEqual(
+            jobs.job_reports(self.user),
+            ['Failed after sending 10 of 25 emails'])
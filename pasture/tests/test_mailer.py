@@ -0,0 +1,113 @@
+"""Unit tests for RandoPony pasture app email dispatch.
+"""
+# Standard library:
+import smtplib
+# Mock:
+from mock import Mock
+from mock import patch
+# Django:
+from django.core import mail
+from django.utils import unittest
+
+
+class TestSendMessages(unittest.TestCase):
+    """Unit tests for send_messages function.
+    """
+    def setUp(self):
+        from .. import mailer
+        mailer.close_connection()
+        patcher = patch.object(mailer.mail, 'get_connection')
+        self.mock_get_conn = patcher.start()
+        self.mock_get_conn.return_value.send_messages.return_value = 1
+        self.addCleanup(patcher.stop)
+        self.addCleanup(mailer.close_connection)
+
+    def _get_target_function(self):
+        from ..mailer import send_messages
+        return send_messages
+
+    def _make_messages(self, count):
+        return [mail.EmailMessage(subject='msg {0}'.format(i))
+                for i in range(count)]
+
+    def test_send_messages_1_connection(self):
+        """send_messages sends all messages over 1 connection
+        """
+        send_messages = self._get_target_function()
+        sent = send_messages(self._make_messages(3))
+        self.assertEqual(sent, 3)
+        self.assertEqual(self.mock_get_conn.call_count, 1)
+        self.mock_get_conn.return_value.open.assert_called_once_with()
+
+    def test_connection_reused_by_next_call(self):
+        """send_messages reuses open connection for consecutive calls
+        """
+        send_messages = self._get_target_function()
+        send_messages(self._make_messages(2))
+        send_messages(self._make_messages(2))
+        self.assertEqual(self.mock_get_conn.call_count, 1)
+        self.assertFalse(self.mock_get_conn.return_value.close.called)
+
+    def test_idle_connection_reopened(self):
+        """send_messages replaces connection that has been idle too long
+        """
+        import time
+        from .. import mailer
+        send_messages = self._get_target_function()
+        send_messages(self._make_messages(1))
+        later = time.time() + mailer.CONNECTION_IDLE_TIMEOUT + 1
+        with patch.object(mailer, 'time') as mock_time:
+            mock_time.time.return_value = later
+            send_messages(self._make_messages(1))
+        self.assertEqual(self.mock_get_conn.call_count, 2)
+        self.assertTrue(self.mock_get_conn.return_value.close.called)
+
+    def test_dropped_connection_reopened(self):
+        """send_messages re-opens dropped connection and resends message
+        """
+        send_messages = self._get_target_function()
+        responses = [smtplib.SMTPServerDisconnected(), 1, 1]
+
+        def respond(messages):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        connection = self.mock_get_conn.return_value
+        connection.send_messages = Mock(side_effect=respond)
+        sent = send_messages(self._make_messages(2))
+        self.assertEqual(sent, 2)
+        self.assertEqual(self.mock_get_conn.call_count, 2)
+        self.assertEqual(connection.send_messages.call_count, 3)
+
+    def test_refused_message_does_not_stop_others(self):
+        """send_messages sends remaining messages after one is refused
+        """
+        from .. import mailer
+        send_messages = self._get_target_function()
+        responses = [smtplib.SMTPRecipientsRefused({}), 1]
+
+        def respond(messages):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        connection = self.mock_get_conn.return_value
+        connection.send_messages = Mock(side_effect=respond)
+        with patch.object(mailer, 'log') as mock_log:
+            sent = send_messages(self._make_messages(2))
+        self.assertEqual(sent, 1)
+        self.assertEqual(connection.send_messages.call_count, 2)
+        self.assertTrue(mock_log.exception.called)
+        self.assertEqual(self.mock_get_conn.call_count, 1)
+
+    def test_socket_error_on_close_ignored(self):
+        """close_connection ignores socket error from dropped connection
+        """
+        import socket
+        from .. import mailer
+        send_messages = self._get_target_function()
+        send_messages(self._make_messages(1))
+        self.mock_get_conn.return_value.close.side_effect = socket.error
+        mailer.close_connection()
+        self.assertIsNone(mailer._connection)
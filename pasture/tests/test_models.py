@@ -1,6 +1,8 @@
 """Unit test for RandoPony pasture app models.
 """
 # Django:
+import django.test
+from django.core.cache import cache
 from django.utils import unittest
 
 
@@ -42,3 +44,69 @@ class TestLink(unittest.TestCase):
             key='event_waiver_url',
             url='http://www.randonneurs.bc.ca/organize/eventform.pdf')
         self.assertEqual(unicode(link), 'event_waiver_url')
+
+
+class TestLookupManager(django.test.TestCase):
+    """Unit tests for LookupManager cached key to value lookups.
+    """
+    fixtures = ['links.yaml']
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup(self):
+        """lookup returns value field of instance with key
+        """
+        from ..models import Link
+        self.assertEqual(
+            Link.objects.lookup('event_waiver_url'),
+            'http://www.randonneurs.bc.ca/organize/eventform.pdf')
+
+    def test_lookup_cached(self):
+        """repeated lookup does not query database
+        """
+        from ..models import Link
+        Link.objects.lookup('event_waiver_url')
+        with self.assertNumQueries(0):
+            Link.objects.lookup('event_waiver_url')
+
+    def test_lookup_cleared_by_save(self):
+        """lookup returns new value after instance is saved
+        """
+        from ..models import Link
+        Link.objects.lookup('event_waiver_url')
+        link = Link.objects.get(key='event_waiver_url')
+        link.url = 'http://example.com/waiver.pdf'
+        link.save()
+        self.assertEqual(
+            Link.objects.lookup('event_waiver_url'),
+            'http://example.com/waiver.pdf')
+
+    def test_lookup_cleared_by_delete(self):
+        """lookup raises DoesNotExist after instance is deleted
+        """
+        from ..models import Link
+        Link.objects.lookup('event_waiver_url')
+        Link.objects.get(key='event_waiver_url').delete()
+        self.assertRaises(
+            Link.DoesNotExist, Link.objects.lookup, 'event_waiver_url')
+
+    def test_lookup_cleared_by_key_change(self):
+        """lookup of old key raises DoesNotExist after key is changed
+        """
+        from ..models import Link
+        Link.objects.lookup('event_waiver_url')
+        link = Link.objects.get(key='event_waiver_url')
+        link.key = 'waiver_url'
+        link.save()
+        self.assertRaises(
+            Link.DoesNotExist, Link.objects.lookup, 'event_waiver_url')
+
+    def test_lookup_shared_by_processes(self):
+        """lookup value is kept in the cache shared by processes
+        """
+        from ..models import Link
+        Link.objects.lookup('event_waiver_url')
+        self.assertEqual(
+            cache.get('lookup:pasture.Link:event_waiver_url'),
+            'http://www.randonneurs.bc.ca/organize/eventform.pdf')
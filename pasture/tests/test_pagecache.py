@@ -0,0 +1,58 @@
+"""Unit tests for RandoPony pasture app event page cache.
+"""
+# Standard library:
+from datetime import date
+from datetime import time
+# Mock:
+from mock import patch
+# Django:
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import unittest
+
+
+class TestCachedEventPage(unittest.TestCase):
+    """Unit tests for cached_event_page function.
+    """
+    def setUp(self):
+        from ...register.models import Brevet
+        self.event = Brevet(pk=42, date=date(2010, 5, 22), time=time(7, 0))
+        cache.clear()
+
+    def _call_target_function(self, render):
+        from ..pagecache import cached_event_page
+        return cached_event_page(self.event, render)
+
+    def test_cached(self):
+        """repeated request for event page does not render it
+        """
+        self._call_target_function(lambda event: HttpResponse('foo'))
+        response = self._call_target_function(
+            lambda event: self.fail('page rendered'))
+        self.assertEqual(response.content, 'foo')
+
+    def test_rendered_from_default_database(self):
+        """event page is rendered from default database not replica
+        """
+        from .. import pagecache
+        from ..db import reading_replica
+        from ..db import use_replica
+        rendered = []
+
+        def render(event):
+            rendered.append((event, reading_replica()))
+            return HttpResponse('foo')
+        databases = dict(settings.DATABASES, replica={})
+        use_replica(True)
+        self.addCleanup(use_replica, False)
+        reread_patch = patch.object(pagecache, 'reread_from_default')
+        with patch.object(settings, 'DATABASES', databases):
+            with reread_patch as mock_reread:
+                mock_reread.return_value.next_state_change = None
+                self._call_target_function(render)
+        mock_reread.assert_called_once_with(self.event)
+        self.assertEqual(rendered, [(mock_reread.return_value, False)])
+        self.assertEqual(
+            cache.get(pagecache._event_page_key(self.event.__class__, 42)),
+            'foo')
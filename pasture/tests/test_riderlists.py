@@ -0,0 +1,199 @@
+"""Unit tests for RandoPony pasture app rider list backends.
+"""
+# Standard library:
+from cStringIO import StringIO
+import zipfile
+# Mock:
+from mock import Mock
+from mock import patch
+# Django:
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import unittest
+
+
+class TestGetBackend(unittest.TestCase):
+    """Unit tests for get_backend function.
+    """
+    def test_get_backend_from_setting(self):
+        """get_backend returns instance of RIDER_LIST_BACKEND class
+        """
+        from ..riderlists import get_backend
+        from ..riderlists import LocalBackend
+        with patch.object(settings, 'RIDER_LIST_BACKEND',
+                          'randopony.pasture.riderlists.LocalBackend'):
+            backend = get_backend()
+        self.assertIsInstance(backend, LocalBackend)
+
+    def test_get_backend_bad_setting(self):
+        """get_backend raises ImproperlyConfigured for unknown class
+        """
+        from ..riderlists import get_backend
+        with patch.object(settings, 'RIDER_LIST_BACKEND',
+                          'randopony.pasture.riderlists.FooBackend'):
+            self.assertRaises(ImproperlyConfigured, get_backend)
+
+
+class TestGoogleDocsBackend(unittest.TestCase):
+    """Unit tests for GoogleDocsBackend rider list backend.
+    """
+    def _make_one(self):
+        from ..riderlists import GoogleDocsBackend
+        return GoogleDocsBackend()
+
+    def _patch_login(self, client):
+        from .. import helpers
+        return patch.object(
+            helpers, 'google_docs_login', Mock(return_value=client))
+
+    def test_create_does_not_share(self):
+        """create copies the template and returns the copy's id
+        """
+        from .. import riderlists
+        client = Mock(name='client')
+        template_patch = patch.object(riderlists, 'copy_rider_list_template')
+        with self._patch_login(client), template_patch as mock_copy:
+            mock_copy.return_value.resource_id.text = 'spreadsheet:f00'
+            doc_id = self._make_one().create('LM200', 'foo')
+        self.assertEqual(doc_id, 'spreadsheet:f00')
+        self.assertEqual(mock_copy.call_count, 1)
+        self.assertFalse(client.Post.called)
+
+    def test_share_retried_after_rejected_login(self):
+        """rejected login when sharing retries the share
+        """
+        import gdata.client
+        client = Mock(name='client')
+        responses = [gdata.client.Unauthorized(), None]
+
+        def respond(*args):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        client.Post = Mock(side_effect=respond)
+        event = type('Event', (object,), {'google_doc_id': 'spreadsheet:f00'})
+        with self._patch_login(client):
+            self._make_one().share(event())
+        client.get_resource_by_id.assert_called_with('spreadsheet:f00')
+        self.assertEqual(client.Post.call_count, 2)
+
+    def test_share_already_shared(self):
+        """share of a doc that is already shared succeeds
+        """
+        import gdata.client
+        client = Mock(name='client')
+        conflict = gdata.client.RequestError()
+        conflict.status = 409
+        client.Post.side_effect = conflict
+        event = type('Event', (object,), {'google_doc_id': 'spreadsheet:f00'})
+        with self._patch_login(client):
+            self._make_one().share(event())
+
+
+class TestLocalBackend(unittest.TestCase):
+    """Unit tests for LocalBackend rider list backend.
+    """
+    def _make_one(self):
+        from ..riderlists import LocalBackend
+        return LocalBackend()
+
+    def test_create(self):
+        """create returns local rider list id from event uuid
+        """
+        event = type('Event', (object,), {'uuid': 'f00'})()
+        self.assertEqual(self._make_one().create(event, 'foo'), 'local:f00')
+
+    def test_url(self):
+        """url is event page rider-list XLSX download URL
+        """
+        event = type('Event', (object,), {'uuid': 'f00'})()
+        url = self._make_one().url(event, 'http://testserver/foo/')
+        self.assertEqual(url, 'http://testserver/foo/rider-list/f00/xlsx/')
+
+
+class TestCachedRiderList(unittest.TestCase):
+    """Unit tests for cached_rider_list function.
+    """
+    rows = [[u'Rider #', u'Last Name'], [u'1', u'M\xfcller & Sons']]
+
+    def setUp(self):
+        from ...register.models import Brevet
+        self.event = Brevet(pk=42)
+        cache.clear()
+
+    def _call_target_function(self, format, render_rows=None):
+        from ..riderlists import cached_rider_list
+        return cached_rider_list(
+            self.event, format, render_rows or (lambda event: self.rows),
+            'foo')
+
+    def test_csv(self):
+        """CSV rider list has a line per row
+        """
+        response = self._call_target_function('csv')
+        self.assertEqual(
+            response.content.splitlines(),
+            ['Rider #,Last Name', '1,M\xc3\xbcller & Sons'])
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename=foo.csv')
+
+    def test_ods(self):
+        """ODS rider list is a zip with uncompressed mimetype first
+        """
+        response = self._call_target_function('ods')
+        archive = zipfile.ZipFile(StringIO(response.content))
+        info = archive.infolist()[0]
+        self.assertEqual(info.filename, 'mimetype')
+        self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+        self.assertIn(
+            'M\xc3\xbcller &amp; Sons', archive.read('content.xml'))
+
+    def test_xlsx(self):
+        """XLSX rider list is a zip with worksheet of rows
+        """
+        response = self._call_target_function('xlsx')
+        archive = zipfile.ZipFile(StringIO(response.content))
+        self.assertIn(
+            'M\xc3\xbcller &amp; Sons',
+            archive.read('xl/worksheets/sheet1.xml'))
+
+    def test_cached(self):
+        """repeated request for rider list does not render rows
+        """
+        self._call_target_function('xlsx')
+        render_rows = lambda event: self.fail('rows rendered')
+        self._call_target_function('xlsx', render_rows)
+
+    def test_clear_rider_list(self):
+        """clear_rider_list removes cached rider lists
+        """
+        from ..riderlists import clear_rider_list
+        self._call_target_function('xlsx')
+        clear_rider_list(self.event.__class__, self.event.pk)
+        rendered = []
+        self._call_target_function(
+            'xlsx', lambda event: rendered.append(True) or self.rows)
+        self.assertTrue(rendered)
+
+    def test_rendered_from_default_database(self):
+        """rider list is rendered from default database not replica
+        """
+        from .. import riderlists
+        from ..db import reading_replica
+        from ..db import use_replica
+        rendered = []
+
+        def render_rows(event):
+            rendered.append((event, reading_replica()))
+            return self.rows
+        databases = dict(settings.DATABASES, replica={})
+        use_replica(True)
+        self.addCleanup(use_replica, False)
+        reread_patch = patch.object(riderlists, 'reread_from_default')
+        with patch.object(settings, 'DATABASES', databases):
+            with reread_patch as mock_reread:
+                self._call_target_function('xlsx', render_rows)
+        mock_reread.assert_called_once_with(self.event)
+        self.assertEqual(rendered, [(mock_reread.return_value, False)])
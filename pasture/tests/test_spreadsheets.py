@@ -0,0 +1,259 @@
+"""Unit tests for RandoPony pasture app rider list spreadsheet sync.
+"""
+# Django:
+import django.test
+
+
+class FakeText(object):
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeLink(object):
+    def __init__(self, href):
+        self.href = href
+
+
+class FakeCell(object):
+    def __init__(self, row, col, input_value):
+        self.row = str(row)
+        self.col = str(col)
+        self.inputValue = input_value
+
+
+class FakeCellEntry(object):
+    def __init__(self, row, col, input_value):
+        self.cell = FakeCell(row, col, input_value)
+        self.batch_id = None
+
+
+class FakeCellsFeed(object):
+    def __init__(self, entry, row_count):
+        self.entry = entry
+        self.row_count = FakeText(str(row_count))
+
+    def GetBatchLink(self):
+        return FakeLink('https://example.com/cells/batch')
+
+
+class FakeBatchStatus(object):
+    code = '200'
+    reason = 'Success'
+
+
+class FakeBatchResultEntry(object):
+    def __init__(self):
+        self.batch_status = FakeBatchStatus()
+
+
+class FakeBatchResultFeed(object):
+    def __init__(self, entry):
+        self.entry = entry
+
+
+class FakeWorksheet(object):
+    def __init__(self, row_count):
+        self.row_count = FakeText(str(row_count))
+
+
+class FakeSpreadsheetsService(object):
+    """Local stand-in for gdata SpreadsheetsService that keeps a
+    worksheet in memory and counts the requests made to it.
+    """
+    def __init__(self, rows=(), row_count=100):
+        self.cells = {}
+        for i, row in enumerate(rows):
+            for col, value in enumerate(row):
+                self.cells[(i + 2, col + 1)] = value
+        self.row_count = row_count
+        self.requests = []
+        self.batch_sizes = []
+
+    def GetCellsFeed(self, key, wksht_id='default', query=None):
+        self.requests.append('GetCellsFeed')
+        max_row = min(
+            int(query.get('max-row', self.row_count)), self.row_count)
+        entry = [
+            FakeCellEntry(row, col, self.cells.get((row, col), ''))
+            for row in range(int(query['min-row']), max_row + 1)
+            for col in range(int(query['min-col']),
+                             int(query['max-col']) + 1)
+        ]
+        return FakeCellsFeed(entry, self.row_count)
+
+    def ExecuteBatch(self, batch, url):
+        self.requests.append('ExecuteBatch')
+        self.batch_sizes.append(len(batch.entry))
+        for entry in batch.entry:
+            cell = (int(entry.cell.row), int(entry.cell.col))
+            self.cells[cell] = entry.cell.inputValue
+        return FakeBatchResultFeed(
+            [FakeBatchResultEntry() for entry in batch.entry])
+
+    def GetWorksheetsFeed(self, key, wksht_id=None):
+        self.requests.append('GetWorksheetsFeed')
+        return FakeWorksheet(self.row_count)
+
+    def UpdateWorksheet(self, worksheet):
+        self.requests.append('UpdateWorksheet')
+        self.row_count = int(worksheet.row_count.text)
+
+    def sheet_rows(self, n_columns):
+        """Return the non-empty rows below the column headings.
+        """
+        rows = []
+        for row in range(2, self.row_count + 1):
+            values = [self.cells.get((row, col), '')
+                      for col in range(1, n_columns + 1)]
+            if not any(values):
+                break
+            rows.append(values)
+        return rows
+
+
+class TestRiderListSync(django.test.TestCase):
+    """Unit tests for RiderListSync.
+    """
+    n_columns = 4
+
+    def _get_target_class(self):
+        from ..spreadsheets import RiderListSync
+        return RiderListSync
+
+    def _make_one(self, client):
+        return self._get_target_class()(
+            client, 'spreadsheet:foo', self.n_columns)
+
+    def _make_rows(self, count):
+        return [[str(i + 1), 'Rider{0:03d}'.format(i), 'Some', 'Y']
+                for i in range(count)]
+
+    def test_sync_empty_sheet(self):
+        """sync writes all rows to empty sheet in 1 batch request
+        """
+        client = FakeSpreadsheetsService()
+        rows = [['1', 'Bonner', 'Ken', ''], ['2', 'McGee', 'Fibber', 'x']]
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(client.requests, ['GetCellsFeed', 'ExecuteBatch'])
+        self.assertEqual(client.batch_sizes, [7])
+
+    def test_sync_no_changes(self):
+        """sync sends no updates when the rider list hasn't changed
+        """
+        client = FakeSpreadsheetsService()
+        rows = self._make_rows(3)
+        self._make_one(client).sync(rows)
+        client.requests = []
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.requests, ['GetCellsFeed'])
+
+    def test_sync_new_rider_at_end(self):
+        """sync sends only the new row's cells for a rider added at end
+        """
+        client = FakeSpreadsheetsService()
+        rows = [['1', 'Bonner', 'Ken', 'a']]
+        self._make_one(client).sync(rows)
+        client.requests, client.batch_sizes = [], []
+        rows = rows + [['2', 'McGee', 'Fibber', 'b']]
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(client.requests, ['GetCellsFeed', 'ExecuteBatch'])
+        self.assertEqual(client.batch_sizes, [4])
+
+    def test_sync_shifted_rows(self):
+        """sync sends changed cells of rows shifted by an inserted rider
+        """
+        client = FakeSpreadsheetsService()
+        rows = [['1', 'Bonner', 'Ken', 'a'], ['2', 'McGee', 'Fibber', 'b']]
+        self._make_one(client).sync(rows)
+        client.requests, client.batch_sizes = [], []
+        rows = [
+            ['1', 'Bonner', 'Ken', 'a'],
+            ['2', 'Latornell', 'Doug', 'c'],
+            ['3', 'McGee', 'Fibber', 'b'],
+        ]
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(client.requests, ['GetCellsFeed', 'ExecuteBatch'])
+        self.assertEqual(client.batch_sizes, [7])
+
+    def test_sync_edited_cell(self):
+        """sync sends only the changed cell of an edited row
+        """
+        client = FakeSpreadsheetsService()
+        self._make_one(client).sync([['1', 'Bonner', 'Ken', 'a']])
+        client.batch_sizes = []
+        rows = [['1', 'Bonner', 'Ken', 'b']]
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(client.batch_sizes, [1])
+
+    def test_sync_deleted_rider(self):
+        """sync clears the row left over from a deleted rider
+        """
+        client = FakeSpreadsheetsService()
+        rows = [['1', 'Bonner', 'Ken', ''], ['2', 'McGee', 'Fibber', '']]
+        self._make_one(client).sync(rows)
+        rows = [['1', 'Bonner', 'Ken', '']]
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+
+    def test_sync_sheet_edited_outside_pony(self):
+        """sync re-reads whole sheet when it disagrees with snapshot
+        """
+        client = FakeSpreadsheetsService()
+        rows = [['1', 'Bonner', 'Ken', 'a'], ['2', 'McGee', 'Fibber', 'b']]
+        self._make_one(client).sync(rows)
+        client.cells[(3, 2)] = 'Mcgee'
+        client.cells[(10, 2)] = 'Stray'
+        client.requests, client.batch_sizes = [], []
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(client.cells[(10, 2)], '')
+        self.assertEqual(
+            client.requests, ['GetCellsFeed', 'GetCellsFeed', 'ExecuteBatch'])
+        self.assertEqual(client.batch_sizes, [2])
+
+    def test_sync_no_snapshot(self):
+        """sync diffs against sheet content when there is no snapshot
+        """
+        client = FakeSpreadsheetsService([['1', 'Bonner', 'Ken', 'a']])
+        rows = [['1', 'Bonner', 'Ken', 'a'], ['2', 'McGee', 'Fibber', 'b']]
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(client.batch_sizes, [4])
+
+    def test_sync_large_rider_list_round_trips(self):
+        """sync writes 150 rider list in 1 cells feed & 2 batch requests
+        """
+        client = FakeSpreadsheetsService(row_count=200)
+        rows = self._make_rows(150)
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(
+            client.requests,
+            ['GetCellsFeed', 'ExecuteBatch', 'ExecuteBatch'])
+
+    def test_sync_grows_worksheet(self):
+        """sync adds rows to worksheet that is too small for rider list
+        """
+        client = FakeSpreadsheetsService(row_count=3)
+        rows = self._make_rows(5)
+        self._make_one(client).sync(rows)
+        self.assertEqual(client.sheet_rows(self.n_columns), rows)
+        self.assertEqual(
+            client.requests,
+            ['GetCellsFeed', 'GetWorksheetsFeed', 'UpdateWorksheet',
+             'GetCellsFeed', 'ExecuteBatch'])
+
+    def test_sync_saves_snapshot(self):
+        """sync records pushed rows as snapshot for the spreadsheet
+        """
+        from ..models import RiderListSnapshot
+        client = FakeSpreadsheetsService()
+        rows = [['1', 'Bonner', 'Ken', 'a']]
+        self._make_one(client).sync(rows)
+        snapshot = RiderListSnapshot.objects.get(
+            google_doc_id='spreadsheet:foo')
+        self.assertEqual(snapshot.row_list, rows)
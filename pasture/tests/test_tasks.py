@@ -0,0 +1,37 @@
+"""Unit tests for RandoPony pasture app tasks and task routing.
+"""
+# Celery:
+from celery.registry import tasks
+# Django:
+from django.conf import settings
+from django.utils import unittest
+
+
+class TestTaskRoutes(unittest.TestCase):
+    """Unit tests for CELERY_ROUTES setting.
+    """
+    def setUp(self):
+        # Register the tasks
+        from ...pasture import tasks as pasture_tasks
+        from ...populaires import tasks as populaires_tasks
+        from ...register import tasks as register_tasks
+
+    def test_routed_tasks_exist(self):
+        """CELERY_ROUTES task names are registered tasks
+        """
+        for name in settings.CELERY_ROUTES:
+            self.assertIn(name, tasks)
+
+    def test_routes_to_known_queues(self):
+        """CELERY_ROUTES send tasks to queues in CELERY_QUEUES
+        """
+        for route in settings.CELERY_ROUTES.values():
+            self.assertIn(route['queue'], settings.CELERY_QUEUES)
+
+    def test_all_tasks_routed(self):
+        """every RandoPony task is routed to a queue
+        """
+        randopony_tasks = [
+            name for name in tasks if name.startswith('randopony.')]
+        for name in randopony_tasks:
+            self.assertIn(name, settings.CELERY_ROUTES)
@@ -0,0 +1,42 @@
+"""Unit tests for RandoPony pasture app template cache warming.
+"""
+# Mock:
+from mock import patch
+# Django:
+from django.utils import unittest
+
+
+class TestTemplateNames(unittest.TestCase):
+    """Unit tests for template_names function.
+    """
+    def test_site_and_app_templates(self):
+        """template_names includes site, app page, and email templates
+        """
+        from ..templatecache import template_names
+        names = template_names()
+        self.assertIn('page.html', names)
+        self.assertIn('register/brevet.html', names)
+        self.assertIn('populaires/email/to_rider.txt', names)
+
+    def test_contrib_app_templates_excluded(self):
+        """template_names excludes Django contrib app templates
+        """
+        from ..templatecache import template_names
+        self.assertNotIn('admin/base.html', template_names())
+
+
+class TestWarmTemplateCache(unittest.TestCase):
+    """Unit tests for warm_template_cache function.
+    """
+    def test_loads_all_templates(self):
+        """warm_template_cache loads each of the template_names
+        """
+        from .. import templatecache
+        names = ['page.html', 'register/email/to_rider.txt']
+        with patch.object(templatecache, 'template_names') as mock_names:
+            mock_names.return_value = names
+            with patch.object(templatecache, 'get_template') as mock_get:
+                templatecache.warm_template_cache(sender=None)
+        self.assertEqual(
+            mock_get.call_args_list,
+            [(('page.html',), {}), (('register/email/to_rider.txt',), {})])
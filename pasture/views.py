@@ -18,10 +18,8 @@ def home(request):
     populaires lists in the sidebar.
     """
     seven_days_ago = datetime.today().date() - timedelta(days=7)
-    brevet_list = Brevet.objects.exclude(
-        date__lt=(seven_days_ago))
-    populaire_list = Populaire.objects.exclude(
-        date__lt=(seven_days_ago))
+    brevet_list = Brevet.objects.upcoming(seven_days_ago)
+    populaire_list = Populaire.objects.upcoming(seven_days_ago)
     context = RequestContext(request, {
         'admin_email': email2words(settings.ADMINS[0][1]),
         'brevets': brevet_list,
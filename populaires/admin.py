@@ -2,21 +2,16 @@
 """
 # Django:
 from django import forms
-from django.conf import settings
 from django.contrib import admin
-from django.core import mail
-from django.core.urlresolvers import reverse
 from django.core.validators import validate_email
-from django.template.loader import render_to_string
-# Google Docs:
-from gdata.docs.client import DocsClient
 # RandoPony:
 from .models import Populaire
 from .models import Rider
-from ..pasture.helpers import get_rider_list_template
-from ..pasture.helpers import google_docs_login
-from ..pasture.helpers import share_rider_list_publicly
-from ..pasture.models import EmailAddress
+from .tasks import create_rider_list
+from .tasks import email_to_webmaster
+from .tasks import email_urls_to_organizer
+from ..pasture.admin import JobStatusAdminMixin
+from ..pasture.jobs import start_job
 
 
 class CustomBrevetAdminForm(forms.ModelForm):
@@ -33,9 +28,13 @@ class CustomBrevetAdminForm(forms.ModelForm):
         return data
 
 
-class PopulaireAdmin(admin.ModelAdmin):
+class PopulaireAdmin(JobStatusAdminMixin, admin.ModelAdmin):
     """Customize presentation of Populaire instance in admin.
     """
+    # Set the fields to display in the change-list; clicking the rider
+    # count column header sorts the populaires by popularity
+    list_display = [
+        '__unicode__', 'event_name', 'rider_count', 'has_rider_list']
     # Set the fields that appear on the edit form, and the order they
     # appear in
     fieldsets = [(None, {'fields': 'event_name '
@@ -56,30 +55,38 @@ class PopulaireAdmin(admin.ModelAdmin):
         'notify_webmaster',
     ]
 
+    def has_rider_list(self, pop):
+        return bool(pop.google_doc_id)
+    has_rider_list.boolean = True
+    has_rider_list.short_description = 'Rider list'
+
     def create_rider_list_spreadsheet(self, request, queryset):
-        """Create a Google Docs rider list spreadsheet from the rider
-        list template for the populaire(s) in the queryset.
+        """Queue a background job to create rider list spreadsheets from
+        the rider list template for the populaire(s) in the queryset
+        that don't have one.
+
+        Each populaire's rider list is created by a separate task so
+        that the worker pool creates them in parallel.
 
         Handler for create_rider_list_spreadsheet admin action.
         """
-        client = google_docs_login(DocsClient)
-        docs_count = 0
         pop_count = queryset.count()
-        for pop in queryset:
-            if not pop.google_doc_id:
-                template = get_rider_list_template(
-                    'Populaire Rider List Template', client)
-                created_doc = client.copy_resource(template, unicode(pop))
-                share_rider_list_publicly(created_doc, client)
-                pop.google_doc_id = created_doc.resource_id.text
-                pop.save()
-                docs_count += 1
+        pop_pks = list(
+            queryset.filter(google_doc_id='').values_list('pk', flat=True))
+        docs_count = len(pop_pks)
         if docs_count == 0:
             msg = 'No rider lists created!'
-        elif docs_count == 1:
-            msg = 'Rider list created for 1 populaire.'
         else:
-            msg = 'Rider lists created for {0} populaires.'.format(docs_count)
+            if docs_count == 1:
+                msg_bit = 'Rider list for 1 populaire'
+            else:
+                msg_bit = 'Rider lists for {0} populaires'.format(docs_count)
+            job_id = start_job(
+                request.user, docs_count, '{0} created'.format(msg_bit),
+                items=pop_pks)
+            for pop_pk in pop_pks:
+                create_rider_list.delay(pop_pk, job_id)
+            msg = '{0} queued for creation.'.format(msg_bit)
         diff = pop_count - docs_count
         if diff:
             if diff == 1:
@@ -87,29 +94,32 @@ class PopulaireAdmin(admin.ModelAdmin):
             else:
                 msg += ' {0} populaires already had rider lists.'.format(diff)
         self.message_user(request, msg)
-    description = 'Copy Google Docs rider list template for populaire'
+    description = 'Create rider list spreadsheet for populaire'
     create_rider_list_spreadsheet.short_description = description
 
     def notify_populaire_organizer(self, request, queryset):
-        _notify_populaire_organizer(request, queryset)
         pop_count = queryset.count()
         if pop_count == 1:
             msg_bit = 'Email for 1 populaire'
         else:
             msg_bit = 'Emails for {0} populaires'.format(pop_count)
+        _notify_populaire_organizer(
+            request, queryset, '{0} sent to organizer(s)'.format(msg_bit))
         self.message_user(
-            request, '{0} sent to organizer(s)'.format(msg_bit))
+            request, '{0} queued for sending to organizer(s)'.format(msg_bit))
     description = 'Send email with populaire URLs to event organizer(s)'
     notify_populaire_organizer.short_description = description
 
     def notify_webmaster(self, request, queryset):
-        _notify_webmaster(request, queryset)
         pop_count = queryset.count()
         if pop_count == 1:
             msg_bit = 'URL for 1 populaire'
         else:
             msg_bit = 'URLs for {0} populaires'.format(pop_count)
-        self.message_user(request, '{0} sent to webmaster'.format(msg_bit))
+        _notify_webmaster(
+            request, queryset, '{0} sent to webmaster'.format(msg_bit))
+        self.message_user(
+            request, '{0} queued for sending to webmaster'.format(msg_bit))
     description = 'Send email with URL for populaire to webmaster'
     notify_webmaster.short_description = description
 
@@ -145,9 +155,9 @@ def _clean_email_address_list(data):
     return data
 
 
-def _notify_populaire_organizer(request, queryset):
-    """Send email message to populaire organizer(s) containing the URLs
-    of the:
+def _notify_populaire_organizer(request, queryset, done_message):
+    """Queue a background job to send email message to populaire
+    organizer(s) containing the URLs of the:
 
     * pre-registration page
     * Google Docs rider list spreadsheet
@@ -155,60 +165,18 @@ def _notify_populaire_organizer(request, queryset):
 
     for the populaire(s) in the queryset.
     """
-    host = request.get_host()
-    from_randopony = EmailAddress.objects.get(key='from_randopony').email
-    for pop in queryset:
-        pop_page = reverse(
-            'populaires:populaire',
-            args=(pop.short_name, pop.date.strftime('%d%b%Y')))
-        pop_page_url = 'http://{0}{1}'.format(host, pop_page)
-        rider_list_url = (
-            'https://spreadsheets.google.com/ccc?key={0}'
-            .format(pop.google_doc_id.split(':')[1]))
-        rider_emails_url = (
-            'http://{0}{1}rider-emails/{2}/'
-            .format(host, pop_page, pop.uuid))
-        email = mail.EmailMessage(
-            subject='RandoPony URLs for {0}'.format(pop),
-            body=render_to_string(
-                'populaires/email/URLs_to_organizer.txt',
-                {'populaire': pop,
-                 'pop_page_url': pop_page_url,
-                 'rider_list_url': rider_list_url,
-                 'rider_emails_url': rider_emails_url,
-                 'admin_email': settings.ADMINS[0][1],
-                },
-            ),
-            from_email=from_randopony,
-            to=[addr.strip() for addr in pop.organizer_email.split(',')],
-        )
-        email.send()
-
-
-def _notify_webmaster(request, queryset):
-    """Send email message to club webmaster containing the URL of the
-    pre-registration page for the populaire(s) in the queryset.
+    pop_pks = list(queryset.values_list('pk', flat=True))
+    job_id = start_job(request.user, len(pop_pks), done_message)
+    email_urls_to_organizer.delay(pop_pks, request.get_host(), job_id)
+
+
+def _notify_webmaster(request, queryset, done_message):
+    """Queue a background job to send email message to club webmaster
+    containing the URL of the pre-registration page for the
+    populaire(s) in the queryset.
 
     Handler for notify_webmaster admin action.
     """
-    webmaster_email = EmailAddress.objects.get(key='webmaster').email
-    from_randopony = EmailAddress.objects.get(key='from_randopony').email
-    for pop in queryset:
-        pop_page = reverse(
-            'populaires:populaire',
-            args=(pop.short_name, pop.date.strftime('%d%b%Y')))
-        host = request.get_host()
-        pop_page_url = 'http://{0}{1}'.format(host, pop_page)
-        email = mail.EmailMessage(
-            subject='RandoPony Pre-registration Page for {0}'.format(pop),
-            body=render_to_string(
-                'populaires/email/to_webmaster.txt',
-                {'event': pop,
-                 'event_page_url': pop_page_url,
-                 'admin_email': settings.ADMINS[0][1],
-                }
-            ),
-            from_email=from_randopony,
-            to=[webmaster_email],
-        )
-        email.send()
+    pop_pks = list(queryset.values_list('pk', flat=True))
+    job_id = start_job(request.user, len(pop_pks), done_message)
+    email_to_webmaster.delay(pop_pks, request.get_host(), job_id)
@@ -0,0 +1,82 @@
+# encoding: utf-8
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        
+        # Adding field 'Populaire.rider_count'
+        db.add_column('populaires_populaire', 'rider_count', self.gf('django.db.models.fields.IntegerField')(default=0, db_index=True), keep_default=False)
+
+        # Adding field 'ArchivedPopulaire.rider_count'
+        db.add_column('populaires_archivedpopulaire', 'rider_count', self.gf('django.db.models.fields.IntegerField')(default=0, db_index=True), keep_default=False)
+
+
+    def backwards(self, orm):
+        
+        # Deleting field 'Populaire.rider_count'
+        db.delete_column('populaires_populaire', 'rider_count')
+
+        # Deleting field 'ArchivedPopulaire.rider_count'
+        db.delete_column('populaires_archivedpopulaire', 'rider_count')
+
+
+    models = {
+        'populaires.archivedpopulaire': {
+            'Meta': {'ordering': "['date']", 'object_name': 'ArchivedPopulaire'},
+            'date': ('django.db.models.fields.DateField', [], {}),
+            'distance': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'entry_form_url': ('django.db.models.fields.CharField', [], {'max_length': '200', 'blank': 'True'}),
+            'entry_form_url_label': ('django.db.models.fields.CharField', [], {'default': "'Entry Form (PDF)'", 'max_length': '30', 'blank': 'True'}),
+            'event_name': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'google_doc_id': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'location': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'organizer_email': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'registration_closes': ('django.db.models.fields.DateTimeField', [], {}),
+            'rider_count': ('django.db.models.fields.IntegerField', [], {'default': '0', 'db_index': 'True'}),
+            'short_name': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'time': ('django.db.models.fields.TimeField', [], {})
+        },
+        'populaires.archivedrider': {
+            'Meta': {'ordering': "['lowercase_last_name']", 'object_name': 'ArchivedRider'},
+            'distance': ('django.db.models.fields.IntegerField', [], {}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'lowercase_last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'populaire': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['populaires.ArchivedPopulaire']"})
+        },
+        'populaires.populaire': {
+            'Meta': {'ordering': "['date']", 'object_name': 'Populaire'},
+            'date': ('django.db.models.fields.DateField', [], {}),
+            'distance': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'entry_form_url': ('django.db.models.fields.CharField', [], {'max_length': '200', 'blank': 'True'}),
+            'entry_form_url_label': ('django.db.models.fields.CharField', [], {'default': "'Entry Form (PDF)'", 'max_length': '30', 'blank': 'True'}),
+            'event_name': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'google_doc_id': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'location': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'organizer_email': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'registration_closes': ('django.db.models.fields.DateTimeField', [], {}),
+            'rider_count': ('django.db.models.fields.IntegerField', [], {'default': '0', 'db_index': 'True'}),
+            'short_name': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'time': ('django.db.models.fields.TimeField', [], {})
+        },
+        'populaires.rider': {
+            'Meta': {'ordering': "['lowercase_last_name']", 'unique_together': "(('populaire', 'first_name', 'last_name', 'email'),)", 'object_name': 'Rider'},
+            'distance': ('django.db.models.fields.IntegerField', [], {}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'lowercase_last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'populaire': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['populaires.Populaire']"})
+        }
+    }
+
+    complete_apps = ['populaires']
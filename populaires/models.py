@@ -2,18 +2,26 @@
 """
 # Standard library:
 from datetime import datetime
+from datetime import time
 from datetime import timedelta
 import uuid
 # Django:
 from django import forms
 from django.db import models
+from django.db.models import signals
 from django.forms.util import ErrorList
+# RandoPony:
+from ..pasture.models import EventRiderManager
+from ..pasture.models import UpcomingEventsManager
+from ..pasture.pagecache import clear_event_page
+from ..pasture.riderlists import clear_rider_list
 
 
-class Populaire(models.Model):
-    """Populaire event model.
+class BasePopulaire(models.Model):
+    """Abstract base class for Populaire and ArchivedPopulaire models.
     """
     class Meta:
+        abstract = True
         ordering = ['date']
 
     event_name = models.CharField(max_length=100)
@@ -39,6 +47,10 @@ class Populaire(models.Model):
         max_length=30, blank=True,
         default='Entry Form (PDF)')
     google_doc_id = models.CharField(max_length=200)
+    rider_count = models.IntegerField(default=0, editable=False, db_index=True)
+    # Also set when riders register or are deleted; see
+    # EventRiderManager
+    modified = models.DateTimeField(auto_now=True)
 
     def __unicode__(self):
         return '{short_name} {date}'.format(
@@ -83,12 +95,54 @@ class Populaire(models.Model):
         return results_url
     in_past = property(_in_past)
 
+    def _state_changes(self):
+        """Return the datetimes at which registration_closed, started,
+        and in_past change.
+        """
+        return [
+            self.registration_closes,
+            datetime.combine(self.date, self.time),
+            datetime.combine(self.date + timedelta(days=8), time(0, 0)),
+        ]
+
+    def _next_state_change(self):
+        """Return the datetime at which the next of registration_closed,
+        started, or in_past changes, or None if they all have.
+        """
+        now = datetime.now()
+        future_changes = [
+            change for change in self._state_changes() if change >= now]
+        return min(future_changes) if future_changes else None
+    next_state_change = property(_next_state_change)
+
+    def _last_state_change(self):
+        """Return the datetime at which the last of registration_closed,
+        started, or in_past changed, or None if none of them have.
+        """
+        now = datetime.now()
+        past_changes = [
+            change for change in self._state_changes() if change < now]
+        return max(past_changes) if past_changes else None
+    last_state_change = property(_last_state_change)
+
 
-class Rider(models.Model):
-    """Rider model for people who have pre-registered to ride a
-    populaire.
+class Populaire(BasePopulaire):
+    """Populaire event model.
+    """
+    objects = UpcomingEventsManager()
+
+
+class ArchivedPopulaire(BasePopulaire):
+    """Archive model for populaires that have been moved out of the
+    Populaire table by archive_events().
+    """
+
+
+class BaseRider(models.Model):
+    """Abstract base class for Rider and ArchivedRider models.
     """
     class Meta:
+        abstract = True
         ordering = ['lowercase_last_name']
 
     first_name = models.CharField(max_length=30)
@@ -96,7 +150,6 @@ class Rider(models.Model):
     lowercase_last_name = models.CharField(max_length=30)
     email = models.EmailField()
     distance = models.IntegerField()
-    populaire = models.ForeignKey(Populaire)
 
     def __unicode__(self):
         return self.full_name
@@ -110,7 +163,55 @@ class Rider(models.Model):
         version of the last_name value.
         """
         self.lowercase_last_name = self.last_name.lower()
-        super(Rider, self).save(*args, **kwargs)
+        super(BaseRider, self).save(*args, **kwargs)
+
+
+class Rider(BaseRider):
+    """Rider model for people who have pre-registered to ride a
+    populaire.
+    """
+    class Meta(BaseRider.Meta):
+        unique_together = ('populaire', 'first_name', 'last_name', 'email')
+
+    populaire = models.ForeignKey(Populaire)
+
+    objects = EventRiderManager('populaire')
+
+
+class ArchivedRider(BaseRider):
+    """Archive model for the riders of archived populaires.
+    """
+    populaire = models.ForeignKey(ArchivedPopulaire)
+
+
+def _clear_populaire_page(sender, instance, **kwargs):
+    """Remove the cached page and rider lists of a populaire that has been
+    changed.
+    """
+    clear_event_page(Populaire, instance.pk)
+    clear_rider_list(Populaire, instance.pk)
+
+
+def _clear_rider_populaire_page(sender, instance, **kwargs):
+    """Remove the cached pages and rider lists of the populaires that a rider
+    has been added to, changed in, moved between, or removed from, and
+    the cached upcoming populaires with their rider counts.
+    """
+    event_ids = [instance.populaire_id]
+    # Set by EventRiderManager when a rider is moved to another populaire
+    moved_from_event_id = getattr(instance, '_moved_from_event_id', None)
+    if moved_from_event_id is not None:
+        event_ids.append(moved_from_event_id)
+    for event_id in event_ids:
+        clear_event_page(Populaire, event_id)
+        clear_rider_list(Populaire, event_id)
+    Populaire.objects.clear_upcoming()
+
+
+signals.post_save.connect(_clear_populaire_page, sender=Populaire)
+signals.post_delete.connect(_clear_populaire_page, sender=Populaire)
+signals.post_save.connect(_clear_rider_populaire_page, sender=Rider)
+signals.post_delete.connect(_clear_rider_populaire_page, sender=Rider)
 
 
 class RiderForm(forms.ModelForm):
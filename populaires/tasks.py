@@ -7,48 +7,105 @@ from django.conf import settings
 from django.core import mail
 from django.core.urlresolvers import reverse
 from django.template.loader import render_to_string
-# Google Docs:
-from gdata.spreadsheet.service import SpreadsheetsService
 # RandoPony:
 from .models import Populaire
 from .models import Rider
-from ..pasture.helpers import google_docs_login
+from ..pasture.helpers import clear_coalesced
+from ..pasture.jobs import finish_job_item
+from ..pasture.jobs import send_job_messages
+from ..pasture.mailer import send_messages
 from ..pasture.models import EmailAddress
+from ..pasture.riderlists import get_backend
+
+
+# Rider list spreadsheet columns:
+# rider number, last name, first name, distance
+SPREADSHEET_COLUMNS = 4
 
 
 @task(ignore_result=True)
 def update_google_spreadsheet(populaire_pk):
-    """Update the rider list spreadsheet on Google docs, preserving
-    the list's sorted by last name order.
+    """Update the rider list spreadsheet via the rider list backend,
+    preserving the list's sorted by last name order.
+
+    For Google Docs only the cells that have changed are sent, in batch
+    requests.
+
+    Queued by delay_coalesced() so that one run handles a burst of
+    registrations.
+    """
+    clear_coalesced(update_google_spreadsheet, populaire_pk)
+    populaire = Populaire.objects.get(pk=populaire_pk)
+    get_backend().update(
+        populaire, SPREADSHEET_COLUMNS, rider_list_rows(populaire))
+
+
+@task(ignore_result=True, max_retries=3, default_retry_delay=60)
+def create_rider_list(populaire_pk, job_id):
+    """Create the rider list spreadsheet for a populaire via the rider
+    list backend.
+
+    Task for the create_rider_list_spreadsheet admin action; a task is
+    queued for each populaire so that the worker pool creates the rider
+    lists in parallel. Failures are retried, and the outcome is
+    reported to the admin job.
+    """
+    populaire = Populaire.objects.get(pk=populaire_pk)
+    backend = get_backend()
+    try:
+        # The new spreadsheet's id is saved before it is shared so that
+        # a retry reuses it rather than creating another one
+        if not populaire.google_doc_id:
+            populaire.google_doc_id = backend.create(
+                populaire, 'Populaire Rider List Template')
+            populaire.save()
+        backend.share(populaire)
+    except Exception as exc:
+        if create_rider_list.request.retries >= create_rider_list.max_retries:
+            finish_job_item(job_id, populaire_pk, failed=True)
+            raise
+        create_rider_list.retry(exc=exc)
+    finish_job_item(job_id, populaire_pk)
+
+
+def rider_list_headings(populaire):
+    """Return the list of rider list spreadsheet column headings for
+    populaire.
+    """
+    return [u'Rider #', u'Last Name', u'First Name', u'Distance']
+
+
+def rider_list_rows(populaire):
+    """Return the list of rider list spreadsheet rows for populaire.
+    """
+    rider_list = Rider.objects.for_event(
+        populaire, 'first_name', 'last_name', 'distance')
+    return [_make_spreadsheet_row(rider_number, rider)
+            for rider_number, rider in enumerate(rider_list, start=1)]
+
+
+def _make_spreadsheet_row(rider_number, rider):
+    row = [
+        unicode(rider_number),
+        rider.last_name,
+        rider.first_name,
+        unicode(rider.distance),
+    ]
+    return row
+
+
+@task(ignore_result=True)
+def email_registration_notices(populaire_pk, rider_pk, host):
+    """Send pre-registration confirmation email to rider, and
+    notification email to event organizer(s), over one mail connection.
     """
     populaire = Populaire.objects.get(pk=populaire_pk)
-    client = google_docs_login(SpreadsheetsService)
-    key = populaire.google_doc_id.split(':')[1]
-    spreadsheet_list = client.GetListFeed(key)
-    spreadsheet_rows = len(spreadsheet_list.entry)
-    rider_list = Rider.objects.filter(
-        populaire__short_name=populaire.short_name,
-        populaire__date=populaire.date)
-    # Update the rows already in the spreadsheet
-    for row, rider in enumerate(rider_list[:spreadsheet_rows]):
-        rider_number = row + 1
-        new_row_data = _make_spreadsheet_row_dict(rider_number, rider)
-        client.UpdateRow(spreadsheet_list.entry[row], new_row_data)
-    # Add remaining rows
-    for row, rider in enumerate(rider_list[spreadsheet_rows:]):
-        rider_number = spreadsheet_rows + row + 1
-        row_data = _make_spreadsheet_row_dict(rider_number, rider)
-        client.InsertRow(row_data, key)
-
-
-def _make_spreadsheet_row_dict(rider_number, rider):
-        row_data = {
-            'ridernumber': str(rider_number),
-            'lastname': rider.last_name,
-            'firstname': rider.first_name,
-            'distance': str(rider.distance),
-        }
-        return row_data
+    rider = Rider.objects.get(pk=rider_pk)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    send_messages([
+        _rider_email(populaire, rider, host, from_randopony),
+        _organizer_email(populaire, rider, host, from_randopony),
+    ])
 
 
 @task(ignore_result=True)
@@ -57,40 +114,51 @@ def email_to_rider(populaire_pk, rider_pk, host):
     """
     populaire = Populaire.objects.get(pk=populaire_pk)
     rider = Rider.objects.get(pk=rider_pk)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    send_messages([_rider_email(populaire, rider, host, from_randopony)])
+
+
+@task(ignore_result=True)
+def email_to_organizer(populaire_pk, rider_pk, host):
+    """Send rider pre-registration notification email to event organizer(s).
+    """
+    populaire = Populaire.objects.get(pk=populaire_pk)
+    rider = Rider.objects.get(pk=rider_pk)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    send_messages([_organizer_email(populaire, rider, host, from_randopony)])
+
+
+def _pop_page_url(populaire, host):
     pop_page = reverse(
         'populaires:populaire',
         args=(populaire.short_name, populaire.date.strftime('%d%b%Y')))
-    pop_page_url = 'http://{0}{1}'.format(host, pop_page)
-    from_randopony = EmailAddress.objects.get(key='from_randopony').email
+    return 'http://{0}{1}'.format(host, pop_page)
+
+
+def _rider_email(populaire, rider, host, from_randopony):
+    """Return pre-registration confirmation email message for rider.
+    """
     email = mail.EmailMessage(
         subject='Pre-registration Confirmation for {0}'.format(populaire),
         body=render_to_string(
             'populaires/email/to_rider.txt',
             {'populaire': populaire,
-             'pop_page_url': pop_page_url}),
+             'pop_page_url': _pop_page_url(populaire, host)}),
         from_email=from_randopony,
         to=[rider.email],
         headers={
             'Sender': from_randopony,
             'Reply-To': populaire.organizer_email}
     )
-    email.send()
+    return email
 
 
-@task(ignore_result=True)
-def email_to_organizer(populaire_pk, rider_pk, host):
-    """Send rider pre-registration notification email to event organizer(s).
+def _organizer_email(populaire, rider, host, from_randopony):
+    """Return rider pre-registration notification email message for
+    event organizer(s).
     """
-    populaire = Populaire.objects.get(pk=populaire_pk)
-    rider = Rider.objects.get(pk=rider_pk)
-    pop_page = reverse(
-        'populaires:populaire',
-        args=(populaire.short_name, populaire.date.strftime('%d%b%Y')))
-    pop_page_url = 'http://{0}{1}'.format(host, pop_page)
-    rider_list_url = (
-        'https://spreadsheets.google.com/ccc?key={0}'
-        .format(populaire.google_doc_id.split(':')[1]))
-    from_randopony = EmailAddress.objects.get(key='from_randopony').email
+    pop_page_url = _pop_page_url(populaire, host)
+    rider_list_url = get_backend().url(populaire, pop_page_url)
     email = mail.EmailMessage(
         subject='{0} has Pre-registered for the {1}'
                 .format(rider.full_name, populaire),
@@ -104,4 +172,91 @@ def email_to_organizer(populaire_pk, rider_pk, host):
         from_email=from_randopony,
         to=[addr.strip() for addr in populaire.organizer_email.split(',')]
     )
-    email.send()
+    return email
+
+
+@task(ignore_result=True)
+def email_to_webmaster(populaire_pks, host, job_id):
+    """Send email messages to club webmaster containing the URL of the
+    pre-registration page for each of the populaires, over one mail
+    connection.
+
+    Task for the notify_webmaster admin action.
+    """
+    populaires = Populaire.objects.filter(pk__in=populaire_pks)
+    webmaster_email = EmailAddress.objects.lookup('webmaster')
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    messages = [
+        _webmaster_email(pop, host, webmaster_email, from_randopony)
+        for pop in populaires
+    ]
+    send_job_messages(job_id, messages)
+
+
+@task(ignore_result=True)
+def email_urls_to_organizer(populaire_pks, host, job_id):
+    """Send email messages to the organizer(s) of each of the
+    populaires containing the URLs of the:
+
+    * pre-registration page
+    * Google Docs rider list spreadsheet
+    * pre-registered riders email address list
+
+    over one mail connection.
+
+    Task for the notify_populaire_organizer admin action.
+    """
+    populaires = Populaire.objects.filter(pk__in=populaire_pks)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    messages = [
+        _populaire_urls_email(pop, host, from_randopony)
+        for pop in populaires
+    ]
+    send_job_messages(job_id, messages)
+
+
+def _webmaster_email(pop, host, webmaster_email, from_randopony):
+    """Return email message to club webmaster containing the URL of the
+    pre-registration page for the populaire.
+    """
+    email = mail.EmailMessage(
+        subject='RandoPony Pre-registration Page for {0}'.format(pop),
+        body=render_to_string(
+            'populaires/email/to_webmaster.txt',
+            {'event': pop,
+             'event_page_url': _pop_page_url(pop, host),
+             'admin_email': settings.ADMINS[0][1],
+            }
+        ),
+        from_email=from_randopony,
+        to=[webmaster_email],
+    )
+    return email
+
+
+def _populaire_urls_email(pop, host, from_randopony):
+    """Return email message to populaire organizer(s) containing the
+    populaire's URLs.
+    """
+    pop_page_url = _pop_page_url(pop, host)
+    rider_list_url = get_backend().url(pop, pop_page_url)
+    rider_emails_url = (
+        '{0}rider-emails/{1}/'.format(pop_page_url, pop.uuid))
+    rider_export_url = (
+        '{0}rider-export/{1}/'.format(pop_page_url, pop.uuid))
+    email = mail.EmailMessage(
+        subject='RandoPony URLs for {0}'.format(pop),
+        body=render_to_string(
+            'populaires/email/URLs_to_organizer.txt',
+            {'populaire': pop,
+             'pop_page_url': pop_page_url,
+             'rider_list_url': rider_list_url,
+             'rider_emails_url': rider_emails_url,
+             'rider_export_url': rider_export_url,
+             'admin_email': settings.ADMINS[0][1],
+            },
+        ),
+        from_email=from_randopony,
+        to=[addr.strip() for addr in pop.organizer_email.split(',')],
+    )
+    return email
@@ -7,6 +7,8 @@ from datetime import date
 from datetime import datetime
 from datetime import time
 from datetime import timedelta
+# Mock:
+from mock import patch
 # Django:
 import django.test
 from django.contrib.auth.models import User
@@ -24,6 +26,12 @@ class TestAdminPopulaire(django.test.TestCase):
             'test_admin', 'test_admin@example.com', 'foobar42')
         user.save()
         self.client.login(username='test_admin', password='foobar42')
+        # Run background job tasks in the test process
+        from .. import tasks
+        for task in (tasks.email_to_webmaster, tasks.email_urls_to_organizer):
+            patcher = patch.object(task, 'delay', task)
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
     def test_populaire_add_form_get(self):
         """GET request for add populaire form page works
@@ -8,6 +8,7 @@ import uuid
 # Mock:
 from mock import patch
 # Django:
+import django.test
 from django.utils import unittest
 
 
@@ -115,6 +116,118 @@ class TestPopulaireModel(unittest.TestCase):
                 'http://randonneurs.bc.ca/results/11_times/11_times.html')
 
 
+    def test_next_state_change_registration_closes(self):
+        """next_state_change is registration_closes before it passes
+        """
+        pop = self._make_one(
+            short_name='VicPop',
+            date=date(2011, 3, 27),
+            time=time(10, 0),
+            registration_closes=datetime(2011, 3, 24, 12, 0))
+        with patch('randopony.populaires.models.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2011, 3, 21, 11, 0)
+            mock_datetime.combine = datetime.combine
+            self.assertEqual(
+                pop.next_state_change, datetime(2011, 3, 24, 12, 0))
+
+
+    def test_next_state_change_started(self):
+        """next_state_change is start datetime after registration closes
+        """
+        pop = self._make_one(
+            short_name='VicPop',
+            date=date(2011, 3, 27),
+            time=time(10, 0),
+            registration_closes=datetime(2011, 3, 24, 12, 0))
+        with patch('randopony.populaires.models.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2011, 3, 25, 13, 0)
+            mock_datetime.combine = datetime.combine
+            self.assertEqual(
+                pop.next_state_change, datetime(2011, 3, 27, 10, 0))
+
+
+    def test_next_state_change_in_past(self):
+        """next_state_change is in_past rollover after populaire starts
+        """
+        pop = self._make_one(
+            short_name='VicPop',
+            date=date(2011, 3, 27),
+            time=time(10, 0),
+            registration_closes=datetime(2011, 3, 24, 12, 0))
+        with patch('randopony.populaires.models.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2011, 3, 27, 13, 0)
+            mock_datetime.combine = datetime.combine
+            self.assertEqual(
+                pop.next_state_change, datetime(2011, 4, 4, 0, 0))
+
+
+class TestPopulaireManager(django.test.TestCase):
+    """Unit tests for Populaire model manager.
+    """
+    fixtures = ['populaires.yaml']
+
+    def setUp(self):
+        from ..models import Populaire
+        Populaire.objects.clear_upcoming()
+
+
+    def test_upcoming(self):
+        """upcoming returns populaires on or after date in date order
+        """
+        from ..models import Populaire
+        pops = Populaire.objects.upcoming(date(2011, 3, 27))
+        self.assertEqual(
+            [pop.short_name for pop in pops],
+            ['VicPop', 'NanPop', 'RogerRide', 'CanadaDay'])
+
+
+    def test_upcoming_cached(self):
+        """repeated upcoming call does not query database
+        """
+        from ..models import Populaire
+        Populaire.objects.upcoming(date(2011, 3, 27))
+        with self.assertNumQueries(0):
+            Populaire.objects.upcoming(date(2011, 3, 27))
+
+
+    def test_upcoming_rebuilt_at_rollover(self):
+        """upcoming drops populaire that has left the window
+        """
+        from ..models import Populaire
+        Populaire.objects.upcoming(date(2011, 3, 27))
+        pops = Populaire.objects.upcoming(date(2011, 3, 28))
+        self.assertNotIn(
+            'VicPop', [pop.short_name for pop in pops])
+
+
+    def test_upcoming_read_from_default_database(self):
+        """upcoming reads from default database during replica reads
+        """
+        from django.conf import settings
+        from ...pasture.db import use_replica
+        from ..models import Populaire
+        # There is no replica connection, so reading from it would fail
+        databases = dict(settings.DATABASES, replica={})
+        use_replica(True)
+        self.addCleanup(use_replica, False)
+        with patch.object(settings, 'DATABASES', databases):
+            pops = Populaire.objects.upcoming(date(2011, 3, 27))
+        self.assertEqual(len(pops), 4)
+
+
+    def test_upcoming_cleared_by_save(self):
+        """upcoming reflects change to populaire date
+        """
+        from ..models import Populaire
+        Populaire.objects.upcoming(date(2011, 3, 27))
+        pop = Populaire.objects.get(short_name='NewYearsPop')
+        pop.date = date(2012, 1, 1)
+        pop.save()
+        pops = Populaire.objects.upcoming(date(2011, 3, 27))
+        self.assertIn(
+            'NewYearsPop', [pop.short_name for pop in pops])
+
+
 class TestRiderModel(unittest.TestCase):
     """Unit tests for Rider model object.
     """
@@ -1,5 +1,8 @@
 """Asynchronous (celeryd) task tests for RandoPony populaires app.
 """
+# Mock:
+from mock import Mock
+from mock import patch
 # Django:
 import django.test
 from django.conf import settings
@@ -318,3 +321,80 @@ class TestEmailToOrganizer(django.test.TestCase):
             'the RandoPony system please send email to '
             '<{0}>.'.format(settings.ADMINS[0][1]),
             mail.outbox[0].body)
+
+
+class TestEmailRegistrationNotices(django.test.TestCase):
+    """Unit tests for email_registration_notices task function.
+    """
+    fixtures = ['populaires.yaml', 'riders.yaml', 'email_addresses.yaml']
+
+    def _get_target_function(self):
+        from ..tasks import email_registration_notices
+        return email_registration_notices
+
+    def _send_one(self, *args, **kwargs):
+        self._get_target_function()(*args, **kwargs)
+
+    def test_emails_to_rider_and_organizer(self):
+        """registration notices go to rider and organizer
+        """
+        from ..models import Populaire
+        from ..models import Rider
+        populaire = Populaire.objects.get(short_name='VicPop')
+        rider = Rider.objects.get(
+            first_name='Mikael', last_name='Janson', populaire=populaire)
+        self._send_one(populaire.pk, rider.pk, 'testserver')
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            mail.outbox[0].subject,
+            'Pre-registration Confirmation for VicPop 27-Mar-2011')
+        self.assertEqual(
+            mail.outbox[1].subject,
+            'Mikael Janson has Pre-registered for the VicPop 27-Mar-2011')
+
+
+class TestCreateRiderList(django.test.TestCase):
+    """Unit tests for create_rider_list task.
+    """
+    fixtures = ['populaires.yaml']
+
+    def setUp(self):
+        from .. import tasks
+        from ..models import Populaire
+        self.event = Populaire.objects.get(pk=1)
+        self.event.google_doc_id = ''
+        self.event.save()
+        for name in ('get_backend', 'finish_job_item'):
+            patcher = patch.object(tasks, name)
+            setattr(self, 'mock_' + name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.backend = self.mock_get_backend.return_value
+        self.backend.create.return_value = 'spreadsheet:new'
+
+    def test_id_saved_before_share(self):
+        """rider list id is saved even if sharing it fails
+        """
+        from .. import tasks
+        from ..models import Populaire
+        self.backend.share.side_effect = Exception
+        retry_patch = patch.object(
+            tasks.create_rider_list, 'retry', Mock(side_effect=Exception))
+        with retry_patch:
+            self.assertRaises(
+                Exception, tasks.create_rider_list, 1, 'job')
+        self.assertEqual(
+            Populaire.objects.get(pk=1).google_doc_id, 'spreadsheet:new')
+
+    def test_retry_does_not_create_another(self):
+        """retry after failed share shares the saved rider list
+        """
+        from .. import tasks
+        from ..models import Populaire
+        event = Populaire.objects.get(pk=1)
+        event.google_doc_id = 'spreadsheet:new'
+        event.save()
+        tasks.create_rider_list(1, 'job')
+        self.assertFalse(self.backend.create.called)
+        shared = self.backend.share.call_args[0][0]
+        self.assertEqual(shared.google_doc_id, 'spreadsheet:new')
+        self.mock_finish_job_item.assert_called_once_with('job', 1)
@@ -172,6 +172,7 @@ class TestPopulaireView(TestCase):
             mock_datetime.today.return_value = datetime(2011, 2, 26)
             mock_datetime.now.return_value = datetime(2011, 2, 26, 12, 35)
             mock_datetime.strptime = datetime.strptime
+            mock_datetime.combine = datetime.combine
             mock_datetime.timedelta = timedelta
             response = self.client.get(url)
         self.assertContains(response, 'Be the first!')
@@ -209,6 +210,78 @@ class TestPopulaireView(TestCase):
             response = self.client.get(url)
         self.assertContains(response, '2 Pre-registered Riders')
 
+    def test_populaire_page_cache_cleared_by_registration(self):
+        """cached populaire page is replaced when a rider registers
+        """
+        from .. import models
+        from ..models import Populaire
+        from ..models import Rider
+        from ...pasture import pagecache
+        url = reverse(
+            'populaires:populaire', args=('NewYearsPop', '01Jan2011'))
+        models_patch = patch.object(models, 'datetime')
+        pagecache_patch = patch.object(pagecache, 'datetime')
+        with models_patch as mock_datetime, pagecache_patch as mock_pc_dt:
+            mock_datetime.today.return_value = datetime(2010, 12, 26)
+            mock_datetime.now.return_value = datetime(2010, 12, 26, 12, 35)
+            mock_datetime.combine = datetime.combine
+            mock_pc_dt.now.return_value = datetime(2010, 12, 26, 12, 35)
+            self.client.get(url)
+            Rider(
+                first_name='Fibber',
+                last_name='McGee',
+                email='fibber@example.com',
+                distance=60,
+                populaire=Populaire.objects.get(short_name='NewYearsPop')
+            ).save()
+            response = self.client.get(url)
+        self.assertContains(response, '2 Pre-registered Riders')
+
+    def _get_populaire_page(self, url, **headers):
+        from .. import models
+        from ...pasture import pagecache
+        models_patch = patch.object(models, 'datetime')
+        pagecache_patch = patch.object(pagecache, 'datetime')
+        with models_patch as mock_datetime, pagecache_patch as mock_pc_dt:
+            mock_datetime.today.return_value = datetime(2010, 12, 26)
+            mock_datetime.now.return_value = datetime(2010, 12, 26, 12, 35)
+            mock_datetime.combine = datetime.combine
+            mock_pc_dt.now.return_value = datetime(2010, 12, 26, 12, 35)
+            return self.client.get(url, **headers)
+
+    def test_populaire_page_not_modified(self):
+        """populaire page with matching If-None-Match is 304 w/o rendering
+        """
+        from .. import views
+        url = reverse(
+            'populaires:populaire', args=('NewYearsPop', '01Jan2011'))
+        response = self._get_populaire_page(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+        with patch.object(views, '_render_populaire_page') as mock_render:
+            response = self._get_populaire_page(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(mock_render.called)
+
+    def test_populaire_page_etag_changed_by_registration(self):
+        """populaire page with old If-None-Match is 200 after registration
+        """
+        from ..models import Populaire
+        from ..models import Rider
+        url = reverse(
+            'populaires:populaire', args=('NewYearsPop', '01Jan2011'))
+        etag = self._get_populaire_page(url)['ETag']
+        Rider(
+            first_name='Fibber',
+            last_name='McGee',
+            email='fibber@example.com',
+            distance=60,
+            populaire=Populaire.objects.get(short_name='NewYearsPop')
+        ).save()
+        response = self._get_populaire_page(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, '2 Pre-registered Riders')
+
 
 class TestRegistrationFormView(TestCase):
     """Functional tests for registration form view.
@@ -349,12 +422,18 @@ class TestRegistrationFunction(TestCase):
             response, 'You have pre-registered for this event. Cool!')
         self.assertContains(response, 'djl@example.com')
 
-    def test_registration_queues_update_google_spreadsheet_task(self):
-        """successful registration queues task to update rider list
+    def test_registration_form_handles_duplicate_entry(self):
+        """registration form rejects duplicate entry w/ msg on pop page
         """
         from .. import models
         from .. import views
-        from ..models import Populaire
+        pop = models.Populaire.objects.get(short_name='VicPop')
+        models.Rider(
+            first_name='Doug',
+            last_name='Latornell',
+            email='djl@example.com',
+            distance=100,
+            populaire=pop).save()
         url = reverse(
             'populaires:form', args=('VicPop', '27Mar2011'))
         params = {
@@ -365,24 +444,29 @@ class TestRegistrationFunction(TestCase):
             'captcha': 2
         }
         datetime_patch = patch.object(models, 'datetime')
-        task_patch = patch.object(views, 'update_google_spreadsheet')
-        with datetime_patch as mock_datetime, task_patch as mock_task:
+        ugs_patch = patch.object(views, 'update_google_spreadsheet')
+        with datetime_patch as mock_datetime, ugs_patch as mock_task:
             mock_datetime.today.return_value = datetime(2011, 3, 1)
             mock_datetime.now.return_value = datetime(2011, 3, 1, 18, 43)
             mock_datetime.combine = datetime.combine
             mock_datetime.timedelta = timedelta
-            self.client.post(url, params)
-        populaire = Populaire.objects.get(
-            short_name='VicPop')
-        mock_task.delay.assert_called_once_with(populaire.pk)
+            response = self.client.post(url, params, follow=True)
+        riders = models.Rider.objects.filter(
+            first_name='Doug', last_name='Latornell',
+            email='djl@example.com', populaire=pop)
+        self.assertEqual(len(riders), 1)
+        url = reverse(
+            'populaires:prereg-duplicate',
+            args=('VicPop', '27Mar2011', riders[0].id))
+        self.assertRedirects(response, url)
+        self.assertFalse(mock_task.apply_async.called)
 
-    def test_registration_queues_email_to_rider_task(self):
-        """successful registration queues task to send email to rider
+    def test_registration_queues_update_google_spreadsheet_task(self):
+        """successful registration queues task to update rider list
         """
         from .. import models
         from .. import views
         from ..models import Populaire
-        from ..models import Rider
         url = reverse(
             'populaires:form', args=('VicPop', '27Mar2011'))
         params = {
@@ -393,23 +477,20 @@ class TestRegistrationFunction(TestCase):
             'captcha': 2
         }
         datetime_patch = patch.object(models, 'datetime')
-        ugs_patch = patch.object(views, 'update_google_spreadsheet')
-        task_patch = patch.object(views, 'email_to_rider')
-        with datetime_patch as mock_datetime, ugs_patch, \
-             task_patch as mock_task:
+        task_patch = patch.object(views, 'delay_coalesced')
+        with datetime_patch as mock_datetime, task_patch as mock_delay:
             mock_datetime.today.return_value = datetime(2011, 3, 1)
             mock_datetime.now.return_value = datetime(2011, 3, 1, 18, 43)
             mock_datetime.combine = datetime.combine
             mock_datetime.timedelta = timedelta
             self.client.post(url, params)
-        populaire = Populaire.objects.get(short_name='VicPop')
-        rider = Rider.objects.get(
-            first_name='Doug', last_name='Latornell', populaire=populaire)
-        mock_task.delay.assert_called_once_with(
-            populaire.pk, rider.pk, 'testserver')
+        populaire = Populaire.objects.get(
+            short_name='VicPop')
+        mock_delay.assert_called_once_with(
+            views.update_google_spreadsheet, populaire.pk)
 
-    def test_registration_queues_email_to_organizer_task(self):
-        """successful registration queues task to send email to organizer
+    def test_registration_queues_email_registration_notices_task(self):
+        """successful registration queues task to email rider and organizer
         """
         from .. import models
         from .. import views
@@ -425,9 +506,9 @@ class TestRegistrationFunction(TestCase):
             'captcha': 2
         }
         datetime_patch = patch.object(models, 'datetime')
-        ugs_patch = patch.object(views, 'update_google_spreadsheet')
-        task_patch = patch.object(views, 'email_to_organizer')
-        with datetime_patch as mock_datetime, ugs_patch, \
+        delay_patch = patch.object(views, 'delay_coalesced')
+        task_patch = patch.object(views, 'email_registration_notices')
+        with datetime_patch as mock_datetime, delay_patch, \
              task_patch as mock_task:
             mock_datetime.today.return_value = datetime(2011, 3, 1)
             mock_datetime.now.return_value = datetime(2011, 3, 1, 18, 43)
@@ -507,3 +588,33 @@ class TestRiderEmailsView(TestCase):
         self.assertEqual(
             set(response.content.split(', ')),
             set('lringham@example.com rhesjedal@example.com'.split()))
+
+
+class TestRiderExportView(TestCase):
+    """Functional tests for rider list export view.
+    """
+    fixtures = ['populaires.yaml', 'riders.yaml']
+
+    def test_rider_export_bad_uuid(self):
+        """request for rider export with bad event uuid raises 404
+        """
+        url = reverse(
+            'populaires:rider-export',
+            args=('VicPop', '27Mar2011', 'f00', 'csv'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_rider_export_csv(self):
+        """rider export as CSV has header line & line per rider
+        """
+        url = reverse(
+            'populaires:rider-export',
+            args=('NanPop', '25Jun2011',
+                  '97b2109c-3281-5263-90fd-c782c17e7cf8', 'csv'))
+        with patch('randopony.populaires.models.datetime') as mock_datetime:
+            mock_datetime.today.return_value = datetime(2011, 3, 6)
+            mock_datetime.timedelta = timedelta
+            response = self.client.get(url)
+        lines = response.content.splitlines()
+        self.assertEqual(lines[0], 'first_name,last_name,email,distance')
+        self.assertEqual(len(lines), 3)
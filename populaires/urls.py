@@ -39,4 +39,14 @@ urlpatterns = patterns(
     # List of rider email addresses for populaire
     url('{0}/rider-emails/(?P<uuid>[a-f0-9\-]+)/$'.format(event_pattern),
         views.rider_emails, name='rider-emails'),
+
+    # Rider list download for populaire
+    url('{0}/rider-export/(?P<uuid>[a-f0-9\-]+)/(?P<format>csv|json)/$'
+        .format(event_pattern),
+        views.rider_export, name='rider-export'),
+
+    # Rider list spreadsheet download for populaire
+    url('{0}/rider-list/(?P<uuid>[a-f0-9\-]+)/(?P<format>csv|ods|xlsx)/$'
+        .format(event_pattern),
+        views.rider_list, name='rider-list'),
 )
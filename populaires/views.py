@@ -6,6 +6,8 @@ from datetime import timedelta
 # Django:
 from django.conf import settings
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError
+from django.db import transaction
 from django.http import Http404
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
@@ -13,13 +15,19 @@ from django.shortcuts import redirect
 from django.shortcuts import render_to_response
 from django.template import RequestContext
 # RandoPony:
+from .models import ArchivedPopulaire
 from .models import Populaire
 from .models import Rider
 from .models import RiderForm
 from .tasks import update_google_spreadsheet
-from .tasks import email_to_rider
-from .tasks import email_to_organizer
+from .tasks import email_registration_notices
+from .tasks import rider_list_headings
+from .tasks import rider_list_rows
+from ..pasture.export import rider_export_response
+from ..pasture.helpers import delay_coalesced
 from ..pasture.helpers import email2words
+from ..pasture.pagecache import conditional_event_page
+from ..pasture.riderlists import cached_rider_list
 
 
 def populaires_list(request):
@@ -27,7 +35,7 @@ def populaires_list(request):
     list of events in the sidebar.
     """
     seven_days_ago = datetime.today().date() - timedelta(days=7)
-    pop_list = Populaire.objects.exclude(date__lt=(seven_days_ago))
+    pop_list = Populaire.objects.upcoming(seven_days_ago)
     context = RequestContext(request, {
         'events': pop_list,
         'admin_email': email2words(settings.ADMINS[0][1]),
@@ -41,9 +49,26 @@ def populaire(request, short_name, date, rider_id=None):
     and sometime the registration confirmation, or duplicate
     registration flash message.
     """
-    pop = get_object_or_404(
-        Populaire, short_name=short_name,
-        date=datetime.strptime(date, '%d%b%Y').date())
+    pop_date = datetime.strptime(date, '%d%b%Y').date()
+    try:
+        pop = Populaire.objects.get(short_name=short_name, date=pop_date)
+    except Populaire.DoesNotExist:
+        # Archived populaires only have a past event page
+        pop = get_object_or_404(
+            ArchivedPopulaire, short_name=short_name, date=pop_date)
+    if rider_id is None:
+        # Plain populaire page without flash message is the same for
+        # everyone, so it is cached, and revalidated by clients with
+        # conditional GET requests
+        return conditional_event_page(
+            request, pop,
+            lambda pop: _render_populaire_page(request, pop, rider_id))
+    return _render_populaire_page(request, pop, rider_id)
+
+
+def _render_populaire_page(request, pop, rider_id):
+    """Render the populaire page.
+    """
     if pop.in_past:
         template = 'pasture/past_event.html'
         context = RequestContext(request, {
@@ -51,8 +76,8 @@ def populaire(request, short_name, date, rider_id=None):
             'results_url': pop.in_past,
         })
     else:
-        rider_list = Rider.objects.filter(
-            populaire__short_name=short_name, populaire__date=pop.date)
+        rider_list = Rider.objects.for_event(
+            pop, 'first_name', 'last_name', 'distance')
         try:
             rider = Rider.objects.get(pk=int(rider_id))
         except (Rider.DoesNotExist, TypeError):
@@ -65,7 +90,7 @@ def populaire(request, short_name, date, rider_id=None):
             'rider': rider,
             'duplicate_registration': request.path.endswith('duplicate/'),
             'rider_list': rider_list,
-            'show_filler_photo': len(rider_list) < 15,
+            'show_filler_photo': pop.rider_count < 15,
         })
     response = render_to_response(template, context)
     return response
@@ -111,8 +136,14 @@ def registration_form(request, short_name, date):
 def _process_registration(populaire, rider, request):
     """Process rider pre-registration for populaire.
     """
+    # Save new rider pre-registration; the unique constraint on the
+    # rider's populaire, name, and email rejects duplicate registrations
+    sid = transaction.savepoint()
     try:
-        # Check for duplicate registration
+        rider.save(force_insert=True)
+        transaction.savepoint_commit(sid)
+    except IntegrityError:
+        transaction.savepoint_rollback(sid)
         check_rider = Rider.objects.get(
             first_name=rider.first_name, last_name=rider.last_name,
             email=rider.email, populaire=populaire)
@@ -120,13 +151,11 @@ def _process_registration(populaire, rider, request):
             'populaires:prereg-duplicate',
             args=(populaire.short_name, populaire.date.strftime('%d%b%Y'),
                   check_rider.id))
-    except Rider.DoesNotExist:
-        # Save new rider pre-registration and send emails to
-        # rider and brevet organizer
-        rider.save()
-        update_google_spreadsheet.delay(populaire.pk)
-        email_to_rider.delay(populaire.pk, rider.pk, request.get_host())
-        email_to_organizer.delay(populaire.pk, rider.pk, request.get_host())
+    else:
+        # Send emails to rider and brevet organizer
+        delay_coalesced(update_google_spreadsheet, populaire.pk)
+        email_registration_notices.delay(
+            populaire.pk, rider.pk, request.get_host())
         url = reverse(
             'populaires:prereg-confirm',
             args=(populaire.short_name, populaire.date.strftime('%d%b%Y'),
@@ -150,8 +179,46 @@ def rider_emails(request, short_name, date, uuid):
         date=datetime.strptime(date, '%d%b%Y').date())
     if uuid != str(pop.uuid) or pop.in_past:
         raise Http404
-    rider_list = Rider.objects.filter(
-        populaire__short_name=short_name, populaire__date=pop.date)
+    rider_list = Rider.objects.for_event(pop, 'email')
     email_list = (', '.join(rider.email for rider in rider_list)
                   or 'No riders have registered yet!')
     return HttpResponse(email_list, mimetype='text/plain')
+
+
+def rider_export(request, short_name, date, uuid, format):
+    """Stream the list of riders that have pre-registered for a
+    populaire as a CSV or JSON download.
+
+    The URL that requests this view includes the same namespace UUID
+    for the populaire as the rider email address list.
+
+    Requests for this view more than 7 days after the populaire will
+    fail with a 404.
+    """
+    pop = get_object_or_404(
+        Populaire, short_name=short_name,
+        date=datetime.strptime(date, '%d%b%Y').date())
+    if uuid != str(pop.uuid) or pop.in_past:
+        raise Http404
+    return rider_export_response(
+        Rider.objects.for_event(pop),
+        ('first_name', 'last_name', 'email', 'distance'),
+        format, '{0.short_name}_{0.date:%d%b%Y}_riders'.format(pop))
+
+
+def rider_list(request, short_name, date, uuid, format):
+    """Download the rider list spreadsheet for a populaire as a CSV,
+    ODS, or XLSX file rendered from the database.
+
+    The URL that requests this view includes the same namespace UUID
+    for the populaire as the rider email address list.
+    """
+    pop = get_object_or_404(
+        Populaire, short_name=short_name,
+        date=datetime.strptime(date, '%d%b%Y').date())
+    if uuid != str(pop.uuid):
+        raise Http404
+    return cached_rider_list(
+        pop, format,
+        lambda pop: [rider_list_headings(pop)] + rider_list_rows(pop),
+        '{0.short_name}_{0.date:%d%b%Y}_rider_list'.format(pop))
@@ -11,9 +11,57 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': path.join(project_path, 'randopony-production.db')
+    },
+    # Public page reads go to a 'replica' database alias if there is
+    # one; see REPLICA_DATABASE in settings.py. SQLite has no
+    # replication, so add one when the database moves to a server that
+    # does.
+}
+
+# The Apache processes, the admin, and the celery workers share the
+# database file. Write-ahead logging lets reads proceed while a
+# registration is being written, and with it synchronous = NORMAL only
+# syncs at checkpoints. The WAL mode is stored in the database file;
+# the other pragmas apply to each connection. busy_timeout is the ms
+# that a connection waits for another process's write lock before
+# raising "database is locked", mmap_size is in bytes, and the negative
+# cache_size is in KiB.
+# See benchmarks/registration_load.py
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('busy_timeout', 20000),
+    ('synchronous', 'NORMAL'),
+    ('mmap_size', 64 * 1024 * 1024),
+    ('cache_size', -8000),
+)
+
+# The cache is shared by the Apache processes and the celery worker
+# so it has to be outside of the process; it's also kept outside of the
+# project directory so that deployment doesn't clear it
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': path.join(path.dirname(project_path), 'randopony_cache'),
+        # The file based cache deletes a third of its entries when it
+        # has more than MAX_ENTRIES, which can include the status of
+        # background jobs that are in progress, so keep it well above
+        # the number of cached pages and rider lists
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
+# Keep compiled templates in each process instead of reading and
+# parsing them for every request and email; the web and worker
+# processes compile them all at startup with
+# pasture.templatecache.warm_template_cache(). Template changes need
+# a restart. See benchmarks/template_loading.py
+TEMPLATE_LOADERS = (
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    )),
+)
+
 STATIC_ROOT = path.join(project_path, 'static')
 STATIC_URL = 'http://randopony.randonneurs.bc.ca/static/'
 ADMIN_MEDIA_PREFIX = 'http://randopony.randonneurs.bc.ca/static/admin/'
@@ -21,3 +69,10 @@ ADMIN_MEDIA_PREFIX = 'http://randopony.randonneurs.bc.ca/static/admin/'
 EMAIL_HOST = 'smtp.webfaction.com'
 EMAIL_HOST_USER = 'randopony'
 SERVER_EMAIL = 'randopony@randonneurs.bc.ca'
+
+# Celery task message transport
+#
+# A dedicated Redis broker instead of the django transport so that the
+# workers don't poll the database that the web app writes
+# registrations to; see benchmarks/broker_latency.py
+BROKER_URL = 'redis://localhost:6379/0'
@@ -0,0 +1,76 @@
+# encoding: utf-8
+import datetime
+from south.db import db
+from south.v2 import DataMigration
+from django.db import models
+
+class Migration(DataMigration):
+
+    def forwards(self, orm):
+        # Remove duplicate registrations, keeping the first one, so that
+        # the unique constraint can be added
+        registrations = set()
+        for rider in orm.BrevetRider.objects.order_by('pk'):
+            registration = (
+                rider.brevet_id, rider.first_name, rider.last_name, rider.email)
+            if registration in registrations:
+                rider.delete()
+            else:
+                registrations.add(registration)
+
+
+    def backwards(self, orm):
+        pass
+
+
+    models = {
+        'register.brevet': {
+            'Meta': {'ordering': "['date']", 'object_name': 'Brevet'},
+            'alt_start_time': ('django.db.models.fields.TimeField', [], {'null': 'True', 'blank': 'True'}),
+            'date': ('django.db.models.fields.DateField', [], {}),
+            'event': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'google_doc_id': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_question': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'location': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'organizer_email': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'region': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'route_name': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'time': ('django.db.models.fields.TimeField', [], {})
+        },
+        'register.brevetrider': {
+            'Meta': {'ordering': "['lowercase_last_name']", 'object_name': 'BrevetRider'},
+            'brevet': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['register.Brevet']"}),
+            'club_member': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_answer': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'lowercase_last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'})
+        },
+        'register.clubevent': {
+            'Meta': {'ordering': "['date']", 'object_name': 'ClubEvent'},
+            'date': ('django.db.models.fields.DateField', [], {}),
+            'event': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'google_doc_id': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_question': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'location': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'organizer_email': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'region': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'time': ('django.db.models.fields.TimeField', [], {})
+        },
+        'register.eventparticipant': {
+            'Meta': {'ordering': "['lowercase_last_name']", 'object_name': 'EventParticipant'},
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75'}),
+            'event': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['register.ClubEvent']"}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_answer': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'lowercase_last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'})
+        }
+    }
+
+    complete_apps = ['register']
@@ -0,0 +1,77 @@
+# encoding: utf-8
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        
+        # Removing index on 'BrevetRider', fields ['brevet', 'last_name', 'first_name', 'email']
+        db.delete_index('register_brevetrider', ['brevet_id', 'last_name', 'first_name', 'email'])
+
+        # Adding unique constraint on 'BrevetRider', fields ['brevet', 'first_name', 'last_name', 'email']
+        db.create_unique('register_brevetrider', ['brevet_id', 'first_name', 'last_name', 'email'])
+
+
+    def backwards(self, orm):
+        
+        # Removing unique constraint on 'BrevetRider', fields ['brevet', 'first_name', 'last_name', 'email']
+        db.delete_unique('register_brevetrider', ['brevet_id', 'first_name', 'last_name', 'email'])
+
+        # Adding index on 'BrevetRider', fields ['brevet', 'last_name', 'first_name', 'email']
+        db.create_index('register_brevetrider', ['brevet_id', 'last_name', 'first_name', 'email'])
+
+
+    models = {
+        'register.brevet': {
+            'Meta': {'ordering': "['date']", 'object_name': 'Brevet'},
+            'alt_start_time': ('django.db.models.fields.TimeField', [], {'null': 'True', 'blank': 'True'}),
+            'date': ('django.db.models.fields.DateField', [], {}),
+            'event': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'google_doc_id': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_question': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'location': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'organizer_email': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'region': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'route_name': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'time': ('django.db.models.fields.TimeField', [], {})
+        },
+        'register.brevetrider': {
+            'Meta': {'ordering': "['lowercase_last_name']", 'unique_together': "(('brevet', 'first_name', 'last_name', 'email'),)", 'object_name': 'BrevetRider'},
+            'brevet': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['register.Brevet']"}),
+            'club_member': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_answer': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'lowercase_last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'})
+        },
+        'register.clubevent': {
+            'Meta': {'ordering': "['date']", 'object_name': 'ClubEvent'},
+            'date': ('django.db.models.fields.DateField', [], {}),
+            'event': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'google_doc_id': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_question': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'location': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'organizer_email': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'region': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'time': ('django.db.models.fields.TimeField', [], {})
+        },
+        'register.eventparticipant': {
+            'Meta': {'ordering': "['lowercase_last_name']", 'object_name': 'EventParticipant'},
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75'}),
+            'event': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['register.ClubEvent']"}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'info_answer': ('django.db.models.fields.CharField', [], {'max_length': '100', 'blank': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'}),
+            'lowercase_last_name': ('django.db.models.fields.CharField', [], {'max_length': '30'})
+        }
+    }
+
+    complete_apps = ['register']
@@ -10,7 +10,14 @@ import uuid
 from django import forms
 from django.conf import settings
 from django.db import models
+from django.db.models import signals
 from django.forms.util import ErrorList
+# RandoPony:
+from ..pasture.models import EventRiderManager
+from ..pasture.models import Link
+from ..pasture.models import UpcomingEventsManager
+from ..pasture.pagecache import clear_event_page
+from ..pasture.riderlists import clear_rider_list
 
 
 REGIONS = dict(
@@ -46,6 +53,10 @@ class BaseEvent(models.Model):
         help_text='Optional question that will appear on the '
                   'pre-registration form')
     google_doc_id = models.CharField(max_length=200)
+    rider_count = models.IntegerField(default=0, editable=False, db_index=True)
+    # Also set when riders register or are deleted; see
+    # EventRiderManager
+    modified = models.DateTimeField(auto_now=True)
 
     def __unicode__(self):
         event_id = '{region}{event} {date}'.format(
@@ -68,9 +79,29 @@ class BaseEvent(models.Model):
         return '/register/{0}'.format(url_id)
 
 
-class Brevet(BaseEvent):
-    """Brevet event model.
+class BrevetManager(UpcomingEventsManager):
+    """Model manager for brevets.
+    """
+    def upcoming_regions(self, since):
+        """Return a list of (region, number of brevets, number of
+        riders) tuples, in region order, for the brevets on or after
+        the date since.
+        """
+        counts = {}
+        for brevet in self.upcoming(since):
+            n_brevets, n_riders = counts.get(brevet.region, (0, 0))
+            counts[brevet.region] = (
+                n_brevets + 1, n_riders + brevet.rider_count)
+        return [(region, n_brevets, n_riders)
+                for region, (n_brevets, n_riders) in sorted(counts.items())]
+
+
+class BaseBrevet(BaseEvent):
+    """Abstract base class for Brevet and ArchivedBrevet models.
     """
+    class Meta(BaseEvent.Meta):
+        abstract = True
+
     EVENT_CHOICES = (
         ('200',  '200 km'),
         ('300',  '300 km'),
@@ -118,6 +149,48 @@ class Brevet(BaseEvent):
         return brevet_started
     started = property(_started)
 
+    def _state_changes(self):
+        """Return the datetimes at which registration_closed, started,
+        and in_past change.
+        """
+        return [
+            datetime.combine(self.date - timedelta(days=1), time(12, 0)),
+            datetime.combine(self.date, self.time) + timedelta(hours=1),
+            datetime.combine(self.date + timedelta(days=8), time(0, 0)),
+        ]
+
+    def _next_state_change(self):
+        """Return the datetime at which the next of registration_closed,
+        started, or in_past changes, or None if they all have.
+        """
+        now = datetime.now()
+        future_changes = [
+            change for change in self._state_changes() if change > now]
+        return min(future_changes) if future_changes else None
+    next_state_change = property(_next_state_change)
+
+    def _last_state_change(self):
+        """Return the datetime at which the last of registration_closed,
+        started, or in_past changed, or None if none of them have.
+        """
+        now = datetime.now()
+        past_changes = [
+            change for change in self._state_changes() if change <= now]
+        return max(past_changes) if past_changes else None
+    last_state_change = property(_last_state_change)
+
+
+class Brevet(BaseBrevet):
+    """Brevet event model.
+    """
+    objects = BrevetManager()
+
+
+class ArchivedBrevet(BaseBrevet):
+    """Archive model for brevets that have been moved out of the
+    Brevet table by archive_events().
+    """
+
 
 class ClubEvent(BaseEvent):
     """Non-brevet club event model.
@@ -167,9 +240,21 @@ class BrevetRider(Person):
     """Brevet rider model for people who have pre-registered to ride
     in a brevet.
     """
+    class Meta(Person.Meta):
+        unique_together = ('brevet', 'first_name', 'last_name', 'email')
+
     club_member = models.BooleanField('club member?', default=False)
     brevet = models.ForeignKey(Brevet)
 
+    objects = EventRiderManager('brevet')
+
+
+class ArchivedBrevetRider(Person):
+    """Archive model for the riders of archived brevets.
+    """
+    club_member = models.BooleanField('club member?', default=False)
+    brevet = models.ForeignKey(ArchivedBrevet)
+
 
 class EventParticipant(Person):
     """Event participant model for people who have pre-registered for
@@ -177,6 +262,55 @@ class EventParticipant(Person):
     """
     event = models.ForeignKey(ClubEvent)
 
+    objects = EventRiderManager('event')
+
+
+def _clear_brevet_page(sender, instance, **kwargs):
+    """Remove the cached page and rider lists of a brevet that has been
+    changed.
+    """
+    clear_event_page(Brevet, instance.pk)
+    clear_rider_list(Brevet, instance.pk)
+
+
+def _clear_rider_brevet_page(sender, instance, **kwargs):
+    """Remove the cached pages and rider lists of the brevets that a rider
+    has been added to, changed in, moved between, or removed from, and
+    the cached upcoming brevets with their rider counts.
+    """
+    event_ids = [instance.brevet_id]
+    # Set by EventRiderManager when a rider is moved to another brevet
+    moved_from_event_id = getattr(instance, '_moved_from_event_id', None)
+    if moved_from_event_id is not None:
+        event_ids.append(moved_from_event_id)
+    for event_id in event_ids:
+        clear_event_page(Brevet, event_id)
+        clear_rider_list(Brevet, event_id)
+    Brevet.objects.clear_upcoming()
+
+
+def _clear_link_brevet_pages(sender, **kwargs):
+    """Mark the brevets modified, and remove their cached pages, when a
+    Link that the brevet pages show has been changed.
+
+    Brevets more than 7 days in the past have past event pages that
+    show no Links, so they are left alone.
+    """
+    brevets = Brevet.objects.filter(
+        date__gte=datetime.today().date() - timedelta(days=7))
+    brevet_pks = list(brevets.values_list('pk', flat=True))
+    Brevet.objects.filter(pk__in=brevet_pks).update(modified=datetime.now())
+    for brevet_pk in brevet_pks:
+        clear_event_page(Brevet, brevet_pk)
+
+
+signals.post_save.connect(_clear_brevet_page, sender=Brevet)
+signals.post_delete.connect(_clear_brevet_page, sender=Brevet)
+signals.post_save.connect(_clear_rider_brevet_page, sender=BrevetRider)
+signals.post_delete.connect(_clear_rider_brevet_page, sender=BrevetRider)
+signals.post_save.connect(_clear_link_brevet_pages, sender=Link)
+signals.post_delete.connect(_clear_link_brevet_pages, sender=Link)
+
 
 class BaseRiderForm(forms.ModelForm):
     """Base class for rider pre-registration ModelForm.
@@ -6,52 +6,113 @@ from celery.task import task
 from django.conf import settings
 from django.core import mail
 from django.core.urlresolvers import reverse
+from django.db.models import get_model
 from django.template.loader import render_to_string
-# Google Docs:
-from gdata.spreadsheet.service import SpreadsheetsService
 # RandoPony:
 from .models import Brevet
 from .models import BrevetRider
-from ..pasture.helpers import google_docs_login
+from ..pasture.helpers import clear_coalesced
+from ..pasture.jobs import finish_job_item
+from ..pasture.jobs import send_job_messages
+from ..pasture.mailer import send_messages
 from ..pasture.models import EmailAddress
 from ..pasture.models import Link
+from ..pasture.riderlists import get_backend
+
+
+# Rider list spreadsheet columns:
+# rider number, last name, first name, club member, info answer
+SPREADSHEET_COLUMNS = 5
 
 
 @task(ignore_result=True)
 def update_google_spreadsheet(brevet_pk):
-    """Update the rider list spreadsheet on Google docs, preserving
-    the list's sorted by last name order.
+    """Update the rider list spreadsheet via the rider list backend,
+    preserving the list's sorted by last name order.
+
+    For Google Docs only the cells that have changed are sent, in batch
+    requests.
+
+    Queued by delay_coalesced() so that one run handles a burst of
+    registrations.
+    """
+    clear_coalesced(update_google_spreadsheet, brevet_pk)
+    brevet = Brevet.objects.get(pk=brevet_pk)
+    get_backend().update(brevet, SPREADSHEET_COLUMNS, rider_list_rows(brevet))
+
+
+@task(ignore_result=True, max_retries=3, default_retry_delay=60)
+def create_rider_list(brevet_pk, job_id):
+    """Create the rider list spreadsheet for a brevet via the rider
+    list backend, and set its info question heading.
+
+    Task for the create_rider_list_spreadsheet admin action; a task is
+    queued for each brevet so that the worker pool creates the rider
+    lists in parallel. Failures are retried, and the outcome is
+    reported to the admin job.
+    """
+    brevet = Brevet.objects.get(pk=brevet_pk)
+    backend = get_backend()
+    try:
+        # The new spreadsheet's id is saved before it is shared so that
+        # a retry reuses it rather than creating another one
+        if not brevet.google_doc_id:
+            brevet.google_doc_id = backend.create(
+                brevet, 'Brevet Rider List Template')
+            brevet.save()
+        backend.share(brevet)
+        # Rider list column 5 is the info question answer
+        backend.set_heading(brevet, 5, brevet.info_question)
+    except Exception as exc:
+        if create_rider_list.request.retries >= create_rider_list.max_retries:
+            finish_job_item(job_id, brevet_pk, failed=True)
+            raise
+        create_rider_list.retry(exc=exc)
+    finish_job_item(job_id, brevet_pk)
+
+
+def rider_list_headings(brevet):
+    """Return the list of rider list spreadsheet column headings for
+    brevet.
+    """
+    return [
+        u'Rider #', u'Last Name', u'First Name', u'Club Member',
+        brevet.info_question or u'Info',
+    ]
+
+
+def rider_list_rows(brevet):
+    """Return the list of rider list spreadsheet rows for brevet.
+    """
+    rider_list = BrevetRider.objects.for_event(
+        brevet, 'first_name', 'last_name', 'club_member', 'info_answer')
+    return [_make_spreadsheet_row(rider_number, rider)
+            for rider_number, rider in enumerate(rider_list, start=1)]
+
+
+def _make_spreadsheet_row(rider_number, rider):
+    row = [
+        unicode(rider_number),
+        rider.last_name,
+        rider.first_name,
+        u'Y' if rider.club_member else u'N',
+        rider.info_answer,
+    ]
+    return row
+
+
+@task(ignore_result=True)
+def email_registration_notices(brevet_pk, rider_pk, host):
+    """Send pre-registration confirmation email to rider, and
+    notification email to event organizer(s), over one mail connection.
     """
     brevet = Brevet.objects.get(pk=brevet_pk)
-    client = google_docs_login(SpreadsheetsService)
-    key = brevet.google_doc_id.split(':')[1]
-    spreadsheet_list = client.GetListFeed(key)
-    spreadsheet_rows = len(spreadsheet_list.entry)
-    rider_list = BrevetRider.objects.filter(
-        brevet__region=brevet.region, brevet__event=brevet.event,
-        brevet__date=brevet.date)
-    # Update the rows already in the spreadsheet
-    for row, rider in enumerate(rider_list[:spreadsheet_rows]):
-        rider_number = row + 1
-        new_row_data = _make_spreadsheet_row_dict(rider_number, rider)
-        client.UpdateRow(spreadsheet_list.entry[row], new_row_data)
-        client.UpdateCell(rider_number + 1, 5, rider.info_answer, key)
-    # Add remaining rows
-    for row, rider in enumerate(rider_list[spreadsheet_rows:]):
-        rider_number = spreadsheet_rows + row + 1
-        row_data = _make_spreadsheet_row_dict(rider_number, rider)
-        client.InsertRow(row_data, key)
-        client.UpdateCell(rider_number + 1, 5, rider.info_answer, key)
-
-
-def _make_spreadsheet_row_dict(rider_number, rider):
-    row_data = {
-        'ridernumber': str(rider_number),
-        'lastname': rider.last_name,
-        'firstname': rider.first_name,
-        'clubmember': 'Y' if rider.club_member else 'N',
-    }
-    return row_data
+    rider = BrevetRider.objects.get(pk=rider_pk)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    send_messages([
+        _rider_email(brevet, rider, host, from_randopony),
+        _organizer_email(brevet, rider, host, from_randopony),
+    ])
 
 
 @task(ignore_result=True)
@@ -60,13 +121,32 @@ def email_to_rider(brevet_pk, rider_pk, host):
     """
     brevet = Brevet.objects.get(pk=brevet_pk)
     rider = BrevetRider.objects.get(pk=rider_pk)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    send_messages([_rider_email(brevet, rider, host, from_randopony)])
+
+
+@task(ignore_result=True)
+def email_to_organizer(brevet_pk, rider_pk, host):
+    """Send rider pre-registration notification email to event organizer(s).
+    """
+    brevet = Brevet.objects.get(pk=brevet_pk)
+    rider = BrevetRider.objects.get(pk=rider_pk)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    send_messages([_organizer_email(brevet, rider, host, from_randopony)])
+
+
+def _brevet_page_url(brevet, host):
     brevet_page = reverse(
         'register:brevet',
         args=(brevet.region, brevet.event, brevet.date.strftime('%d%b%Y')))
-    brevet_page_url = 'http://{0}{1}'.format(host, brevet_page)
-    event_waiver_url = Link.objects.get(key='event_waiver_url').url
-    membership_form_url = Link.objects.get(key='membership_form_url').url
-    from_randopony = EmailAddress.objects.get(key='from_randopony').email
+    return 'http://{0}{1}'.format(host, brevet_page)
+
+
+def _rider_email(brevet, rider, host, from_randopony):
+    """Return pre-registration confirmation email message for rider.
+    """
+    event_waiver_url = Link.objects.lookup('event_waiver_url')
+    membership_form_url = Link.objects.lookup('membership_form_url')
     email = mail.EmailMessage(
         subject='Pre-registration Confirmation for {0} Brevet'
                 .format(brevet),
@@ -74,7 +154,7 @@ def email_to_rider(brevet_pk, rider_pk, host):
             'register/email/to_rider.txt',
             {'brevet': brevet,
              'rider': rider,
-             'brevet_page_url': brevet_page_url,
+             'brevet_page_url': _brevet_page_url(brevet, host),
              'event_waiver_url': event_waiver_url,
              'membership_form_url': membership_form_url,
              }),
@@ -84,23 +164,15 @@ def email_to_rider(brevet_pk, rider_pk, host):
             'Sender': from_randopony,
             'Reply-To': brevet.organizer_email}
     )
-    email.send()
+    return email
 
 
-@task(ignore_result=True)
-def email_to_organizer(brevet_pk, rider_pk, host):
-    """Send rider pre-registration notification email to event organizer(s).
+def _organizer_email(brevet, rider, host, from_randopony):
+    """Return rider pre-registration notification email message for
+    event organizer(s).
     """
-    brevet = Brevet.objects.get(pk=brevet_pk)
-    rider = BrevetRider.objects.get(pk=rider_pk)
-    brevet_page = reverse(
-        'register:brevet',
-        args=(brevet.region, brevet.event, brevet.date.strftime('%d%b%Y')))
-    brevet_page_url = 'http://{0}{1}'.format(host, brevet_page)
-    rider_list_url = (
-        'https://spreadsheets.google.com/ccc?key={0}'
-        .format(brevet.google_doc_id.split(':')[1]))
-    from_randopony = EmailAddress.objects.get(key='from_randopony').email
+    brevet_page_url = _brevet_page_url(brevet, host)
+    rider_list_url = get_backend().url(brevet, brevet_page_url)
     email = mail.EmailMessage(
         subject='{0} has Pre-registered for the {1}'
                 .format(rider.full_name, brevet),
@@ -114,4 +186,95 @@ def email_to_organizer(brevet_pk, rider_pk, host):
         from_email=from_randopony,
         to=[addr.strip() for addr in brevet.organizer_email.split(',')]
     )
-    email.send()
+    return email
+
+
+@task(ignore_result=True)
+def email_to_webmaster(model_name, event_pks, host, job_id):
+    """Send email messages to club webmaster containing the URL of the
+    pre-registration page for each of the events, over one mail
+    connection.
+
+    model_name is the name of the register app event model; e.g.
+    Brevet, or ClubEvent.
+
+    Task for the notify_webmaster admin actions.
+    """
+    events = get_model('register', model_name).objects.filter(
+        pk__in=event_pks)
+    webmaster_email = EmailAddress.objects.lookup('webmaster')
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    messages = [
+        _webmaster_email(event, host, webmaster_email, from_randopony)
+        for event in events
+    ]
+    send_job_messages(job_id, messages)
+
+
+@task(ignore_result=True)
+def email_urls_to_organizer(brevet_pks, host, job_id):
+    """Send email messages to the organizer(s) of each of the brevets
+    containing the URLs of the:
+
+    * pre-registration page
+    * Google Docs rider list spreadsheet
+    * pre-registered riders email address list
+
+    over one mail connection.
+
+    Task for the notify_brevet_organizer admin action.
+    """
+    brevets = Brevet.objects.filter(pk__in=brevet_pks)
+    from_randopony = EmailAddress.objects.lookup('from_randopony')
+    messages = [
+        _brevet_urls_email(brevet, host, from_randopony)
+        for brevet in brevets
+    ]
+    send_job_messages(job_id, messages)
+
+
+def _webmaster_email(event, host, webmaster_email, from_randopony):
+    """Return email message to club webmaster containing the URL of the
+    pre-registration page for the event.
+    """
+    email = mail.EmailMessage(
+        subject='RandoPony Pre-registration Page for {0}'.format(event),
+        body=render_to_string(
+            'register/email/to_webmaster.txt',
+            {'event': event,
+             'event_page_url': _brevet_page_url(event, host),
+             'admin_email': settings.ADMINS[0][1],
+            }
+        ),
+        from_email=from_randopony,
+        to=[webmaster_email],
+    )
+    return email
+
+
+def _brevet_urls_email(brevet, host, from_randopony):
+    """Return email message to brevet organizer(s) containing the
+    brevet's URLs.
+    """
+    brevet_page_url = _brevet_page_url(brevet, host)
+    rider_list_url = get_backend().url(brevet, brevet_page_url)
+    rider_emails_url = (
+        '{0}rider-emails/{1}/'.format(brevet_page_url, brevet.uuid))
+    rider_export_url = (
+        '{0}rider-export/{1}/'.format(brevet_page_url, brevet.uuid))
+    email = mail.EmailMessage(
+        subject='RandoPony URLs for {0}'.format(brevet),
+        body=render_to_string(
+            'register/email/URLs_to_organizer.txt',
+            {'brevet': brevet,
+             'brevet_page_url': brevet_page_url,
+             'rider_list_url': rider_list_url,
+             'rider_emails_url': rider_emails_url,
+             'rider_export_url': rider_export_url,
+             'admin_email': settings.ADMINS[0][1],
+            },
+        ),
+        from_email=from_randopony,
+        to=[addr.strip() for addr in brevet.organizer_email.split(',')],
+    )
+    return email
@@ -5,6 +5,8 @@ register app.
 from datetime import date
 from datetime import time
 from datetime import timedelta
+# Mock:
+from mock import patch
 # Django:
 import django.test
 from django.contrib.auth.models import User
@@ -22,6 +24,12 @@ class TestAdminBrevet(django.test.TestCase):
             'test_admin', 'test_admin@example.com', 'foobar42')
         user.save()
         self.client.login(username='test_admin', password='foobar42')
+        # Run background job tasks in the test process
+        from .. import tasks
+        for task in (tasks.email_to_webmaster, tasks.email_urls_to_organizer):
+            patcher = patch.object(task, 'delay', task)
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
     def test_brevet_add_form_get(self):
         """GET request for add brevet form page works
@@ -139,6 +147,26 @@ class TestAdminBrevet(django.test.TestCase):
             mail.outbox[1].subject,
             'RandoPony Pre-registration Page for LM400 22-May-2010')
 
+    def test_brevet_notify_webmaster_queued(self):
+        """notify webmaster admin action reports queued background job
+        """
+        from .. import tasks
+        params = {
+            u'action': [u'notify_webmaster'],
+            u'_selected_action': [u'1', u'2'],
+        }
+        with patch.object(tasks.email_to_webmaster, 'delay') as mock_delay:
+            response = self.client.post(
+                '/admin/register/brevet/', params, follow=True)
+        self.assertContains(
+            response, 'URLs for 2 brevets queued for sending to webmaster')
+        self.assertContains(
+            response,
+            'In progress (0 of 2 done): URLs for 2 brevets sent to webmaster')
+        self.assertEqual(len(mail.outbox), 0)
+        args = mock_delay.call_args[0]
+        self.assertEqual(args[:3], ('Brevet', [1, 2], 'testserver'))
+
     def test_brevet_notify_brevet_organizer_1_brevet(self):
         """notify brevet organizer(s) admin action sends email for 1 brevet
         """
@@ -175,6 +203,35 @@ class TestAdminBrevet(django.test.TestCase):
             'please send email to {0}'.format(settings.ADMINS[0][1])
             in body)
 
+    def test_create_rider_list_spreadsheet(self):
+        """create rider list admin action queues task per brevet w/o list
+        """
+        from .. import tasks
+        from ..models import Brevet
+        brevet = Brevet.objects.create(
+            region='LM', event='200', date=date(2010, 6, 5),
+            location='Tsawwassen', time=time(7, 0),
+            organizer_email='lm@example.com', google_doc_id='')
+        params = {
+            u'action': [u'create_rider_list_spreadsheet'],
+            u'_selected_action': [u'1', unicode(brevet.pk)],
+        }
+        backend_patch = patch.object(
+            settings, 'RIDER_LIST_BACKEND',
+            'randopony.pasture.riderlists.LocalBackend')
+        delay_patch = patch.object(
+            tasks.create_rider_list, 'delay', tasks.create_rider_list)
+        with backend_patch, delay_patch:
+            response = self.client.post(
+                '/admin/register/brevet/', params, follow=True)
+        self.assertContains(
+            response,
+            'Rider list for 1 brevet queued for creation. '
+            'Brevet already had a rider list.')
+        self.assertContains(response, 'Rider list for 1 brevet created')
+        brevet = Brevet.objects.get(pk=brevet.pk)
+        self.assertEqual(brevet.google_doc_id, 'local:{0}'.format(brevet.uuid))
+
 
 class TestAdminClubEvent(django.test.TestCase):
     """Functional tests for the add/change brevet admin form.
@@ -186,6 +243,12 @@ class TestAdminClubEvent(django.test.TestCase):
             'test_admin', 'test_admin@example.com', 'foobar42')
         user.save()
         self.client.login(username='test_admin', password='foobar42')
+        # Run background job tasks in the test process
+        from .. import tasks
+        for task in (tasks.email_to_webmaster, tasks.email_urls_to_organizer):
+            patcher = patch.object(task, 'delay', task)
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
     def test_club_event_add_form_get(self):
         """GET request for add brevet form page works
@@ -9,6 +9,7 @@ import uuid
 # Mock:
 from mock import patch
 # Django:
+import django.test
 from django.conf import settings
 from django.utils import unittest
 
@@ -121,6 +122,144 @@ class TestBrevet(unittest.TestCase):
             mock_datetime.timedelta = timedelta
             self.assertTrue(brevet.started)
 
+    def test_next_state_change_registration_closes(self):
+        """next_state_change is registration close week before brevet
+        """
+        from .. import models
+        brevet = self._make_one(
+            region='LM', event='200', date=date(2010, 4, 17), time=time(7, 0))
+        with patch.object(models, 'datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2010, 4, 10, 11, 0)
+            mock_datetime.combine = datetime.combine
+            self.assertEqual(
+                brevet.next_state_change, datetime(2010, 4, 16, 12, 0))
+
+    def test_next_state_change_started(self):
+        """next_state_change is 1 hr after start once registration closes
+        """
+        from .. import models
+        brevet = self._make_one(
+            region='LM', event='200', date=date(2010, 4, 17), time=time(7, 0))
+        with patch.object(models, 'datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2010, 4, 16, 20, 0)
+            mock_datetime.combine = datetime.combine
+            self.assertEqual(
+                brevet.next_state_change, datetime(2010, 4, 17, 8, 0))
+
+    def test_next_state_change_in_past(self):
+        """next_state_change is in_past rollover after brevet has started
+        """
+        from .. import models
+        brevet = self._make_one(
+            region='LM', event='200', date=date(2010, 4, 17), time=time(7, 0))
+        with patch.object(models, 'datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2010, 4, 18, 11, 0)
+            mock_datetime.combine = datetime.combine
+            self.assertEqual(
+                brevet.next_state_change, datetime(2010, 4, 25, 0, 0))
+
+    def test_next_state_change_none_for_past_brevet(self):
+        """next_state_change is None for brevet more than 7 days ago
+        """
+        from .. import models
+        brevet = self._make_one(
+            region='LM', event='200', date=date(2010, 4, 17), time=time(7, 0))
+        with patch.object(models, 'datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2010, 4, 25, 11, 0)
+            mock_datetime.combine = datetime.combine
+            self.assertIsNone(brevet.next_state_change)
+
+
+class TestBrevetManager(django.test.TestCase):
+    """Unit tests for Brevet model manager.
+    """
+    fixtures = ['brevets.yaml']
+
+    def setUp(self):
+        from ..models import Brevet
+        Brevet.objects.clear_upcoming()
+
+    def test_upcoming_regions(self):
+        """upcoming_regions returns regions, brevet & rider counts from date
+        """
+        from ..models import Brevet
+        regions = Brevet.objects.upcoming_regions(date(2010, 3, 25))
+        self.assertEqual(regions, [('LM', 5, 4), ('VI', 1, 1)])
+
+    def test_upcoming_regions_excludes_past_brevets(self):
+        """upcoming_regions omits brevets before date
+        """
+        from ..models import Brevet
+        regions = Brevet.objects.upcoming_regions(date(2010, 6, 1))
+        self.assertEqual(regions, [('LM', 2, 1), ('VI', 1, 1)])
+
+    def test_upcoming_regions_cached(self):
+        """repeated upcoming_regions call does not query database
+        """
+        from ..models import Brevet
+        Brevet.objects.upcoming_regions(date(2010, 3, 25))
+        with self.assertNumQueries(0):
+            Brevet.objects.upcoming_regions(date(2010, 3, 25))
+
+    def test_upcoming_regions_recomputed_for_new_date(self):
+        """upcoming_regions queries database when date changes
+        """
+        from ..models import Brevet
+        Brevet.objects.upcoming_regions(date(2010, 3, 25))
+        with self.assertNumQueries(1):
+            Brevet.objects.upcoming_regions(date(2010, 3, 26))
+
+    def test_upcoming_regions_cleared_by_brevet_save(self):
+        """upcoming_regions includes region of newly added brevet
+        """
+        from ..models import Brevet
+        Brevet.objects.upcoming_regions(date(2010, 3, 25))
+        Brevet.objects.create(
+            region='SI', event='200', date=date(2010, 5, 1),
+            location='Kelowna', time=time(7, 0),
+            organizer_email='si@example.com', google_doc_id='')
+        regions = Brevet.objects.upcoming_regions(date(2010, 3, 25))
+        self.assertIn(('SI', 1, 0), regions)
+
+    def test_link_change_clears_brevet_pages(self):
+        """changing a link marks brevets modified and clears their pages
+        """
+        from ...pasture.models import Link
+        from .. import models
+        clear_patch = patch.object(models, 'clear_event_page')
+        datetime_patch = patch.object(models, 'datetime')
+        with clear_patch as mock_clear, datetime_patch as mock_datetime:
+            mock_datetime.today.return_value = datetime(2010, 4, 1)
+            mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
+            Link(key='event_waiver_url', url='http://example.com/').save()
+        brevets = models.Brevet.objects.filter(date__gte=date(2010, 3, 25))
+        self.assertTrue(brevets)
+        self.assertEqual(
+            set(brevet.modified for brevet in brevets),
+            set([datetime(2010, 4, 1, 11, 0)]))
+        self.assertEqual(
+            sorted(mock_clear.call_args_list),
+            sorted(((models.Brevet, brevet.pk), {}) for brevet in brevets))
+
+    def test_link_change_skips_past_brevets(self):
+        """changing a link leaves brevets more than 7 days past alone
+        """
+        from ...pasture.models import Link
+        from .. import models
+        past_brevets = models.Brevet.objects.filter(date__lt=date(2010, 6, 1))
+        modified = dict(past_brevets.values_list('pk', 'modified'))
+        self.assertTrue(modified)
+        clear_patch = patch.object(models, 'clear_event_page')
+        datetime_patch = patch.object(models, 'datetime')
+        with clear_patch as mock_clear, datetime_patch as mock_datetime:
+            mock_datetime.today.return_value = datetime(2010, 6, 8)
+            mock_datetime.now.return_value = datetime(2010, 6, 8, 11, 0)
+            Link(key='event_waiver_url', url='http://example.com/').save()
+        self.assertEqual(
+            dict(past_brevets.values_list('pk', 'modified')), modified)
+        cleared = [args[1] for args, kwargs in mock_clear.call_args_list]
+        self.assertFalse(set(cleared) & set(modified))
+
 
 class TestClubEvent(unittest.TestCase):
     """Unit tests for ClubEvent model object.
@@ -177,6 +316,124 @@ class TestBrevetRider(unittest.TestCase):
         self.assertEqual(rider.full_name, u'Doug Latornell')
 
 
+class TestBrevetRiderManager(django.test.TestCase):
+    """Unit tests for BrevetRider model manager.
+    """
+    fixtures = ['brevets.yaml', 'riders.yaml']
+
+    def test_for_event(self):
+        """for_event returns brevet's riders in last name order
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        brevet = Brevet.objects.get(pk=3)
+        riders = BrevetRider.objects.for_event(brevet)
+        self.assertEqual(
+            [rider.last_name for rider in riders], ['Allen', 'McGee'])
+
+    def test_for_event_no_join(self):
+        """for_event query doesn't join to brevet table
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        brevet = Brevet.objects.get(pk=3)
+        query = str(BrevetRider.objects.for_event(brevet).query)
+        self.assertNotIn('JOIN', query)
+
+    def test_for_event_only_fields(self):
+        """for_event loads only requested fields
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        brevet = Brevet.objects.get(pk=3)
+        query = str(BrevetRider.objects.for_event(brevet, 'email').query)
+        self.assertIn('email', query)
+        self.assertNotIn('info_answer', query)
+
+    def test_new_rider_counted(self):
+        """adding a rider increments brevet rider_count
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        BrevetRider.objects.create(
+            first_name='Fibber', last_name='McGee',
+            email='fibber@example.com', brevet_id=2)
+        self.assertEqual(Brevet.objects.get(pk=2).rider_count, 2)
+
+    def test_changed_rider_not_counted(self):
+        """saving an existing rider leaves brevet rider_count unchanged
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        rider = BrevetRider.objects.get(brevet=2)
+        rider.info_answer = 'LM300 8-May-2010'
+        rider.save()
+        self.assertEqual(Brevet.objects.get(pk=2).rider_count, 1)
+
+    def test_deleted_rider_uncounted(self):
+        """deleting a rider decrements brevet rider_count
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        BrevetRider.objects.filter(brevet=3)[0].delete()
+        self.assertEqual(Brevet.objects.get(pk=3).rider_count, 1)
+
+    def test_moved_rider_recounted(self):
+        """moving a rider to another brevet moves its rider_count
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        rider = BrevetRider.objects.get(brevet=2)
+        rider.brevet_id = 5
+        rider.save()
+        self.assertEqual(Brevet.objects.get(pk=2).rider_count, 0)
+        self.assertEqual(Brevet.objects.get(pk=5).rider_count, 2)
+
+    def test_changed_rider_marks_brevet_modified(self):
+        """changing a rider sets brevet modified but not its rider_count
+        """
+        from ...pasture import models as pasture_models
+        from ..models import Brevet
+        from ..models import BrevetRider
+        rider = BrevetRider.objects.get(brevet=2)
+        rider.first_name = 'Fibber'
+        with patch.object(pasture_models, 'datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
+            rider.save()
+        brevet = Brevet.objects.get(pk=2)
+        self.assertEqual(brevet.modified, datetime(2010, 4, 1, 11, 0))
+        self.assertEqual(brevet.rider_count, 1)
+
+    def test_moved_rider_clears_old_brevet_page(self):
+        """moving a rider to another brevet clears the old brevet's page
+        """
+        from .. import models
+        from ..models import BrevetRider
+        rider = BrevetRider.objects.get(brevet=2)
+        rider.brevet_id = 5
+        with patch.object(models, 'clear_event_page') as mock_clear:
+            rider.save()
+        self.assertEqual(
+            mock_clear.call_args_list,
+            [((models.Brevet, 5), {}), ((models.Brevet, 2), {})])
+
+
+class TestBrevetRiderUniqueRegistration(django.test.TestCase):
+    """Unit tests for BrevetRider registration unique constraint.
+    """
+    fixtures = ['brevets.yaml', 'riders.yaml']
+
+    def test_duplicate_registration_rejected(self):
+        """saving 2nd rider w/ same brevet, name & email raises IntegrityError
+        """
+        from django.db import IntegrityError
+        from ..models import BrevetRider
+        rider = BrevetRider(
+            first_name='Doug', last_name='Latornell',
+            email='djl@douglatornell.ca', brevet_id=2)
+        self.assertRaises(IntegrityError, rider.save)
+
+
 class TestEventParticipant(unittest.TestCase):
     """Unit tests for EventParticipant model object.
     """
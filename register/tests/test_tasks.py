@@ -2,6 +2,9 @@
 """
 # Standard library:
 from datetime import date
+# Mock:
+from mock import Mock
+from mock import patch
 # Django:
 import django.test
 from django.conf import settings
@@ -379,3 +382,102 @@ class TestEmailToOrganizer(django.test.TestCase):
         self.assertIn(
             'please send email to <{0}>'.format(settings.ADMINS[0][1]),
             mail.outbox[0].body)
+
+
+class TestEmailRegistrationNotices(django.test.TestCase):
+    """Unit tests for email_registration_notices task function.
+    """
+    fixtures = ['brevets.yaml', 'riders.yaml',
+                'email_addresses.yaml', 'links.yaml']
+
+    def _get_target_function(self):
+        from ..tasks import email_registration_notices
+        return email_registration_notices
+
+    def _send_one(self, *args, **kwargs):
+        self._get_target_function()(*args, **kwargs)
+
+    def test_emails_to_rider_and_organizer(self):
+        """registration notices go to rider and organizer
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        brevet = Brevet.objects.get(
+            region='LM', event=400, date=date(2010, 5, 22))
+        rider = BrevetRider.objects.get(
+            first_name='Doug', last_name='Latornell', brevet=brevet)
+        self._send_one(brevet.pk, rider.pk, 'testserver')
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            mail.outbox[0].subject,
+            'Pre-registration Confirmation for LM400 22-May-2010 Brevet')
+        self.assertEqual(
+            mail.outbox[1].subject,
+            'Doug Latornell has Pre-registered for the LM400 22-May-2010')
+
+    def test_emails_sent_over_1_connection(self):
+        """registration notices are sent over 1 mail connection
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        from ...pasture import mailer
+        brevet = Brevet.objects.get(
+            region='VI', event=600, date=date(2010, 8, 7))
+        rider = BrevetRider.objects.get(
+            first_name='Ken', last_name='Bonner', brevet=brevet)
+        mailer.close_connection()
+        # Don't leave the mock connection open for the tests that follow
+        self.addCleanup(mailer.close_connection)
+        with patch.object(mailer.mail, 'get_connection') as mock_get_conn:
+            mock_get_conn.return_value.send_messages.return_value = 1
+            self._send_one(brevet.pk, rider.pk, 'testserver')
+        self.assertEqual(mock_get_conn.call_count, 1)
+        self.assertEqual(
+            mock_get_conn.return_value.send_messages.call_count, 2)
+
+
+class TestCreateRiderList(django.test.TestCase):
+    """Unit tests for create_rider_list task.
+    """
+    fixtures = ['brevets.yaml']
+
+    def setUp(self):
+        from .. import tasks
+        from ..models import Brevet
+        self.event = Brevet.objects.get(pk=1)
+        self.event.google_doc_id = ''
+        self.event.save()
+        for name in ('get_backend', 'finish_job_item'):
+            patcher = patch.object(tasks, name)
+            setattr(self, 'mock_' + name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.backend = self.mock_get_backend.return_value
+        self.backend.create.return_value = 'spreadsheet:new'
+
+    def test_id_saved_before_share(self):
+        """rider list id is saved even if sharing it fails
+        """
+        from .. import tasks
+        from ..models import Brevet
+        self.backend.share.side_effect = Exception
+        retry_patch = patch.object(
+            tasks.create_rider_list, 'retry', Mock(side_effect=Exception))
+        with retry_patch:
+            self.assertRaises(
+                Exception, tasks.create_rider_list, 1, 'job')
+        self.assertEqual(
+            Brevet.objects.get(pk=1).google_doc_id, 'spreadsheet:new')
+
+    def test_retry_does_not_create_another(self):
+        """retry after failed share shares the saved rider list
+        """
+        from .. import tasks
+        from ..models import Brevet
+        event = Brevet.objects.get(pk=1)
+        event.google_doc_id = 'spreadsheet:new'
+        event.save()
+        tasks.create_rider_list(1, 'job')
+        self.assertFalse(self.backend.create.called)
+        shared = self.backend.share.call_args[0][0]
+        self.assertEqual(shared.google_doc_id, 'spreadsheet:new')
+        self.mock_finish_job_item.assert_called_once_with('job', 1)
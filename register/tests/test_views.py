@@ -246,6 +246,125 @@ class TestBrevetView(django.test.TestCase):
             response = self.client.get(url)
         self.assertContains(response, 'Hmm... Someone using the name')
 
+    def test_brevet_page_cached(self):
+        """brevet page is served from cache on repeat request
+        """
+        from .. import models
+        from ...pasture import pagecache
+        url = reverse('register:brevet', args=('LM', 400, '22May2010'))
+        models_patch = patch.object(models, 'datetime')
+        pagecache_patch = patch.object(pagecache, 'datetime')
+        with models_patch as mock_datetime, pagecache_patch as mock_pc_dt:
+            mock_datetime.today.return_value = datetime(2010, 4, 1)
+            mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
+            mock_datetime.combine = datetime.combine
+            mock_pc_dt.now.return_value = datetime(2010, 4, 1, 11, 0)
+            self.client.get(url)
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+        self.assertContains(response, 'Doug Latornell')
+
+    def test_brevet_page_cache_cleared_by_registration(self):
+        """cached brevet page is replaced when a rider registers
+        """
+        from .. import models
+        from ..models import Brevet
+        from ..models import BrevetRider
+        from ...pasture import pagecache
+        url = reverse('register:brevet', args=('LM', 400, '22May2010'))
+        models_patch = patch.object(models, 'datetime')
+        pagecache_patch = patch.object(pagecache, 'datetime')
+        with models_patch as mock_datetime, pagecache_patch as mock_pc_dt:
+            mock_datetime.today.return_value = datetime(2010, 4, 1)
+            mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
+            mock_datetime.combine = datetime.combine
+            mock_pc_dt.now.return_value = datetime(2010, 4, 1, 11, 0)
+            self.client.get(url)
+            BrevetRider(
+                first_name='Fibber',
+                last_name='McGee',
+                email='fibber@example.com',
+                brevet=Brevet.objects.get(
+                    region='LM', event=400, date=date(2010, 5, 22))).save()
+            response = self.client.get(url)
+        self.assertContains(response, '2 Pre-registered')
+
+    def _get_brevet_page(self, url, **headers):
+        from .. import models
+        from ...pasture import pagecache
+        models_patch = patch.object(models, 'datetime')
+        pagecache_patch = patch.object(pagecache, 'datetime')
+        with models_patch as mock_datetime, pagecache_patch as mock_pc_dt:
+            mock_datetime.today.return_value = datetime(2010, 4, 1)
+            mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
+            mock_datetime.combine = datetime.combine
+            mock_pc_dt.now.return_value = datetime(2010, 4, 1, 11, 0)
+            return self.client.get(url, **headers)
+
+    def test_brevet_page_validators(self):
+        """brevet page response has validators and cache control headers
+        """
+        url = reverse('register:brevet', args=('LM', 400, '22May2010'))
+        response = self._get_brevet_page(url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_brevet_page_not_modified_etag(self):
+        """brevet page with matching If-None-Match is 304 w/o rendering
+        """
+        from .. import views
+        url = reverse('register:brevet', args=('LM', 400, '22May2010'))
+        etag = self._get_brevet_page(url)['ETag']
+        with patch.object(views, '_render_brevet_page') as mock_render:
+            response = self._get_brevet_page(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(mock_render.called)
+
+    def test_brevet_page_not_modified_since(self):
+        """brevet page with later If-Modified-Since is 304
+        """
+        url = reverse('register:brevet', args=('LM', 400, '22May2010'))
+        last_modified = self._get_brevet_page(url)['Last-Modified']
+        response = self._get_brevet_page(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_brevet_page_etag_changed_by_registration(self):
+        """brevet page with old If-None-Match is 200 after registration
+        """
+        from ..models import Brevet
+        from ..models import BrevetRider
+        url = reverse('register:brevet', args=('LM', 400, '22May2010'))
+        etag = self._get_brevet_page(url)['ETag']
+        BrevetRider(
+            first_name='Fibber',
+            last_name='McGee',
+            email='fibber@example.com',
+            brevet=Brevet.objects.get(
+                region='LM', event=400, date=date(2010, 5, 22))).save()
+        response = self._get_brevet_page(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, '2 Pre-registered')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_brevet_page_etag_changed_by_link_change(self):
+        """brevet page with old If-None-Match is 200 after link change
+        """
+        from ...pasture.models import Link
+        from .. import models
+        url = reverse('register:brevet', args=('LM', 400, '22May2010'))
+        etag = self._get_brevet_page(url)['ETag']
+        link = Link.objects.get(key='event_waiver_url')
+        link.url = 'http://example.com/new_waiver.pdf'
+        with patch.object(models, 'datetime') as mock_datetime:
+            mock_datetime.today.return_value = datetime(2010, 4, 1)
+            mock_datetime.now.return_value = datetime.now()
+            link.save()
+        response = self._get_brevet_page(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'http://example.com/new_waiver.pdf')
+        self.assertNotEqual(response['ETag'], etag)
+
 
 class TestRegistrationFormView(django.test.TestCase):
     """Functional tests for registration form view.
@@ -642,37 +761,8 @@ class TestRegistrationFunction(django.test.TestCase):
             'captcha': 400
         }
         datetime_patch = patch.object(models, 'datetime')
-        task_patch = patch.object(views, 'update_google_spreadsheet')
-        with datetime_patch as mock_datetime, task_patch as mock_task:
-            mock_datetime.today.return_value = datetime(2010, 4, 1)
-            mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
-            mock_datetime.combine = datetime.combine
-            mock_datetime.timedelta = timedelta
-            self.client.post(url, params)
-        brevet = Brevet.objects.get(
-            region='LM', event=300, date=date(2010, 5, 1))
-        mock_task.delay.assert_called_once_with(brevet.pk)
-
-    def test_registration_queues_email_to_rider_task(self):
-        """successful registration queues task to send email to rider
-        """
-        from .. import models
-        from .. import views
-        from ..models import Brevet
-        from ..models import BrevetRider
-        url = reverse('register:form', args=('LM', 300, '01May2010'))
-        params = {
-            'first_name': 'Doug',
-            'last_name': 'Latornell',
-            'email': 'djl@example.com',
-            'club_member': True,
-            'captcha': 400
-        }
-        datetime_patch = patch.object(models, 'datetime')
-        ugs_patch = patch.object(views, 'update_google_spreadsheet')
-        task_patch = patch.object(views, 'email_to_rider')
-        with datetime_patch as mock_datetime, ugs_patch, \
-             task_patch as mock_task:
+        task_patch = patch.object(views, 'delay_coalesced')
+        with datetime_patch as mock_datetime, task_patch as mock_delay:
             mock_datetime.today.return_value = datetime(2010, 4, 1)
             mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
             mock_datetime.combine = datetime.combine
@@ -680,13 +770,11 @@ class TestRegistrationFunction(django.test.TestCase):
             self.client.post(url, params)
         brevet = Brevet.objects.get(
             region='LM', event=300, date=date(2010, 5, 1))
-        rider = BrevetRider.objects.get(
-            first_name='Doug', last_name='Latornell', brevet=brevet)
-        mock_task.delay.assert_called_once_with(
-            brevet.pk, rider.pk, 'testserver')
+        mock_delay.assert_called_once_with(
+            views.update_google_spreadsheet, brevet.pk)
 
-    def test_registration_queues_email_to_organizer_task(self):
-        """successful registration queues task to send email to organizer
+    def test_registration_queues_email_registration_notices_task(self):
+        """successful registration queues task to email rider and organizer
         """
         from .. import models
         from .. import views
@@ -701,9 +789,9 @@ class TestRegistrationFunction(django.test.TestCase):
             'captcha': 400
         }
         datetime_patch = patch.object(models, 'datetime')
-        ugs_patch = patch.object(views, 'update_google_spreadsheet')
-        task_patch = patch.object(views, 'email_to_organizer')
-        with datetime_patch as mock_datetime, ugs_patch, \
+        delay_patch = patch.object(views, 'delay_coalesced')
+        task_patch = patch.object(views, 'email_registration_notices')
+        with datetime_patch as mock_datetime, delay_patch, \
              task_patch as mock_task:
             mock_datetime.today.return_value = datetime(2010, 4, 1)
             mock_datetime.now.return_value = datetime(2010, 4, 1, 11, 0)
@@ -788,3 +876,86 @@ class TestRiderEmailsView(django.test.TestCase):
         self.assertEqual(
             set(response.content.split(', ')),
             set('sea@susanallen.ca fibber.mcgee@example.com'.split()))
+
+
+class TestRiderExportView(django.test.TestCase):
+    """Functional tests for rider list export view.
+    """
+    fixtures = ['brevets.yaml', 'riders.yaml']
+
+    def _get(self, format, uuid='eb45e7d4-46b5-5efc-9d17-8d25a74fcae0'):
+        from .. import models
+        url = reverse(
+            'register:rider-export',
+            args=('LM', '200', '17Apr2010', uuid, format))
+        with patch.object(models, 'datetime') as mock_datetime:
+            mock_datetime.today.return_value = datetime(2010, 4, 1)
+            mock_datetime.timedelta = timedelta
+            return self.client.get(url)
+
+    def test_rider_export_bad_uuid(self):
+        """request for rider export with bad brevet uuid raises 404
+        """
+        response = self._get('csv', uuid='f00')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rider_export_csv(self):
+        """rider export as CSV has header line & line per rider
+        """
+        response = self._get('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename=LM200_17Apr2010_riders.csv')
+        lines = response.content.splitlines()
+        self.assertEqual(
+            lines[0], 'first_name,last_name,email,club_member,info_answer')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Fibber,McGee,fibber.mcgee@example.com', lines[2])
+
+    def test_rider_export_json(self):
+        """rider export as JSON is list of rider objects
+        """
+        import json
+        response = self._get('json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        riders = json.loads(response.content)
+        self.assertEqual(
+            [rider['last_name'] for rider in riders], ['Allen', 'McGee'])
+
+    def test_rider_export_streamed(self):
+        """rider export response content is an iterator
+        """
+        response = self._get('csv')
+        self.assertFalse(response._is_string)
+        self.assertNotIsInstance(response._container, (list, str))
+
+
+class TestRiderListView(django.test.TestCase):
+    """Functional tests for rider list spreadsheet download view.
+    """
+    fixtures = ['brevets.yaml', 'riders.yaml']
+
+    def test_rider_list_bad_uuid(self):
+        """request for rider list with bad brevet uuid raises 404
+        """
+        url = reverse(
+            'register:rider-list',
+            args=('LM', '200', '17Apr2010', 'f00', 'csv'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_rider_list_csv(self):
+        """rider list CSV has headings & numbered rider rows in name order
+        """
+        from django.core.cache import cache
+        cache.clear()
+        url = reverse(
+            'register:rider-list',
+            args=('LM', '200', '17Apr2010',
+                  'eb45e7d4-46b5-5efc-9d17-8d25a74fcae0', 'csv'))
+        response = self.client.get(url)
+        lines = response.content.splitlines()
+        self.assertTrue(lines[0].startswith('Rider #,Last Name,First Name'))
+        # Riders are in lowercase_last_name order, not pk order
+        self.assertEqual(lines[1:], ['1,Allen,Susan,Y,', '2,McGee,Fibber,Y,'])
@@ -52,4 +52,16 @@ urlpatterns = patterns('',
     url('{0}/rider-emails/(?P<uuid>[a-f0-9\-]+)/$'.format(event_pattern),
         views.brevet_rider_emails,
         name='rider-emails'),
+
+    # Rider list download for brevet
+    url('{0}/rider-export/(?P<uuid>[a-f0-9\-]+)/(?P<format>csv|json)/$'
+        .format(event_pattern),
+        views.brevet_rider_export,
+        name='rider-export'),
+
+    # Rider list spreadsheet download for brevet
+    url('{0}/rider-list/(?P<uuid>[a-f0-9\-]+)/(?P<format>csv|ods|xlsx)/$'
+        .format(event_pattern),
+        views.brevet_rider_list,
+        name='rider-list'),
 )
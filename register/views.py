@@ -5,6 +5,8 @@ from datetime import datetime
 from datetime import timedelta
 # Django:
 from django.conf import settings
+from django.db import IntegrityError
+from django.db import transaction
 from django.http import Http404
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
@@ -12,28 +14,35 @@ from django.shortcuts import render_to_response
 from django.shortcuts import redirect
 from django.template import RequestContext
 # RandoPony:
+from .models import ArchivedBrevet
 from .models import Brevet
 from .models import BrevetRider
 from .models import REGIONS
 from .models import RiderForm
 from .models import RiderFormWithoutInfoQuestion
-from .tasks import email_to_rider
-from .tasks import email_to_organizer
+from .tasks import email_registration_notices
+from .tasks import rider_list_headings
+from .tasks import rider_list_rows
 from .tasks import update_google_spreadsheet
+from ..pasture.export import rider_export_response
+from ..pasture.helpers import delay_coalesced
 from ..pasture.helpers import email2words
 from ..pasture.models import Link
+from ..pasture.pagecache import conditional_event_page
+from ..pasture.riderlists import cached_rider_list
 
 
 def home(request):
     """Display the welcome information and list of regions in the sidebar.
     """
     seven_days_ago = datetime.today().date() - timedelta(days=7)
-    brevet_list = Brevet.objects.exclude(date__lt=(seven_days_ago))
-    regions = sorted(list(set([brevet.region for brevet in brevet_list])))
+    regions = Brevet.objects.upcoming_regions(seven_days_ago)
     region_list = [{
         'abbrev': region,
-        'long_name': REGIONS[region]
-        } for region in regions]
+        'long_name': REGIONS[region],
+        'n_brevets': n_brevets,
+        'n_riders': n_riders,
+        } for region, n_brevets, n_riders in regions]
     context = RequestContext(request, {
         'regions': region_list,
         'admin_email': email2words(settings.ADMINS[0][1])
@@ -46,11 +55,8 @@ def region_brevets(request, region):
     """Display a region image and the list of brevets in the sidebar.
     """
     seven_days_ago = datetime.today().date() - timedelta(days=7)
-    brevet_list = Brevet.objects.filter(
-            region=region
-        ).exclude(
-            date__lt=(seven_days_ago)
-        )
+    brevet_list = [brevet for brevet in Brevet.objects.upcoming(seven_days_ago)
+                   if brevet.region == region]
     mapping = {
         'Club': {
             'file': 'AGM-Brunch.jpg',
@@ -89,9 +95,28 @@ def brevet(request, region, event, date, rider_id=None):
     sometimes the registration confirmation, or duplicate registration
     flash message.
     """
-    brevet = get_object_or_404(
-        Brevet, region=region, event=event,
-        date=datetime.strptime(date, '%d%b%Y').date())
+    brevet_date = datetime.strptime(date, '%d%b%Y').date()
+    try:
+        brevet = Brevet.objects.get(
+            region=region, event=event, date=brevet_date)
+    except Brevet.DoesNotExist:
+        # Archived brevets only have a past event page
+        brevet = get_object_or_404(
+            ArchivedBrevet, region=region, event=event, date=brevet_date)
+    if rider_id is None:
+        # Plain brevet page without flash message is the same for
+        # everyone, so it is cached, and revalidated by clients with
+        # conditional GET requests
+        return conditional_event_page(
+            request, brevet,
+            lambda brevet: _render_brevet_page(request, brevet, rider_id))
+    return _render_brevet_page(request, brevet, rider_id)
+
+
+def _render_brevet_page(request, brevet, rider_id):
+    """Render the brevet page.
+    """
+    region = brevet.region
     if brevet.in_past:
         template = 'pasture/past_event.html'
         context = RequestContext(request, {
@@ -99,23 +124,22 @@ def brevet(request, region, event, date, rider_id=None):
             'results_url': brevet.in_past
         })
     else:
-        rider_list = BrevetRider.objects.filter(
-            brevet__region=region, brevet__event=event,
-            brevet__date=brevet.date)
+        rider_list = BrevetRider.objects.for_event(
+            brevet, 'first_name', 'last_name', 'info_answer')
         try:
             rider = BrevetRider.objects.get(pk=int(rider_id))
             rider_email = rider.email
         except (TypeError, BrevetRider.DoesNotExist, AttributeError):
             rider = rider_email = None
         template = 'register/brevet.html'
-        event_waiver_url = Link.objects.get(key='event_waiver_url').url
-        membership_form_url = Link.objects.get(key='membership_form_url').url
+        event_waiver_url = Link.objects.lookup('event_waiver_url')
+        membership_form_url = Link.objects.lookup('membership_form_url')
         context = RequestContext(request, {
             'brevet': brevet,
             'region': dict(abbrev=region, long_name=REGIONS[region]),
             'registration_closed': brevet.registration_closed,
             'brevet_started': brevet.started,
-            'show_filler_photo': len(rider_list) < 15,
+            'show_filler_photo': brevet.rider_count < 15,
             'rider_list': rider_list,
             'rider': rider,
             'rider_email': rider_email,
@@ -153,8 +177,8 @@ def registration_form(request, region, event, date):
     else:
         # Unbound form to render entry form
         form = form_class()
-    event_waiver_url = Link.objects.get(key='event_waiver_url').url
-    membership_form_url = Link.objects.get(key='membership_form_url').url
+    event_waiver_url = Link.objects.lookup('event_waiver_url')
+    membership_form_url = Link.objects.lookup('membership_form_url')
     context = RequestContext(request, {
         'brevet': brevet,
         'region_name': REGIONS[region],
@@ -183,33 +207,75 @@ def brevet_rider_emails(request, region, event, date, uuid):
         Brevet, region=region, event=event, date=brevet_date)
     if uuid != str(brevet.uuid) or brevet.in_past:
         raise Http404
-    rider_list = BrevetRider.objects.filter(
-        brevet__region=region, brevet__event=event, brevet__date=brevet_date)
+    rider_list = BrevetRider.objects.for_event(brevet, 'email')
     email_list = (', '.join(rider.email for rider in rider_list)
                   or 'No riders have registered yet!')
     return HttpResponse(email_list, mimetype='text/plain')
 
 
+def brevet_rider_export(request, region, event, date, uuid, format):
+    """Stream the list of riders that have pre-registered for a brevet
+    as a CSV or JSON download.
+
+    The URL that requests this view includes the same namespace UUID
+    for the brevet as the rider email address list.
+
+    Requests for this view more than 7 days after the brevet will fail
+    with a 404.
+    """
+    brevet_date = datetime.strptime(date, '%d%b%Y').date()
+    brevet = get_object_or_404(
+        Brevet, region=region, event=event, date=brevet_date)
+    if uuid != str(brevet.uuid) or brevet.in_past:
+        raise Http404
+    return rider_export_response(
+        BrevetRider.objects.for_event(brevet),
+        ('first_name', 'last_name', 'email', 'club_member', 'info_answer'),
+        format, '{0.region}{0.event}_{0.date:%d%b%Y}_riders'.format(brevet))
+
+
+def brevet_rider_list(request, region, event, date, uuid, format):
+    """Download the rider list spreadsheet for a brevet as a CSV, ODS,
+    or XLSX file rendered from the database.
+
+    The URL that requests this view includes the same namespace UUID
+    for the brevet as the rider email address list.
+    """
+    brevet_date = datetime.strptime(date, '%d%b%Y').date()
+    brevet = get_object_or_404(
+        Brevet, region=region, event=event, date=brevet_date)
+    if uuid != str(brevet.uuid):
+        raise Http404
+    return cached_rider_list(
+        brevet, format,
+        lambda brevet: (
+            [rider_list_headings(brevet)] + rider_list_rows(brevet)),
+        '{0.region}{0.event}_{0.date:%d%b%Y}_rider_list'.format(brevet))
+
+
 def _process_registration(brevet, rider, request):
     """Process rider pre-registration for brevet.
     """
     brevet_page = 'register/{0.region}{0.event}/{0.date:%d%b%Y}'.format(brevet)
-    # Check for duplicate registration
+    # Save new rider pre-registration; the unique constraint on the
+    # rider's brevet, name, and email rejects duplicate registrations
+    sid = transaction.savepoint()
     try:
+        rider.save(force_insert=True)
+        transaction.savepoint_commit(sid)
+    except IntegrityError:
+        transaction.savepoint_rollback(sid)
         check_rider = BrevetRider.objects.get(
             first_name=rider.first_name, last_name=rider.last_name,
             email=rider.email, brevet=brevet)
         # Redirect to brevet page with duplicate flag to
         # trigger appropriate flash message
         return '/{0}/{1:d}/duplicate/'.format(brevet_page, check_rider.pk)
-    except BrevetRider.DoesNotExist:
-        # Save new rider pre-registration and send emails to
-        # rider and brevet organizer
-        rider.save()
-        update_google_spreadsheet.delay(brevet.pk)
+    else:
+        # Send emails to rider and brevet organizer
+        delay_coalesced(update_google_spreadsheet, brevet.pk)
         host = request.get_host()
-        email_to_rider.delay(brevet.pk, rider.pk, host)
-        email_to_organizer.delay(brevet.pk, rider.pk, host)
+        email_registration_notices.delay(brevet.pk, rider.pk, host)
         # Redirect to brevet page with rider record id to
         # trigger registration confirmation flash message
         return '/{0}/{1:d}/'.format(brevet_page, rider.pk)
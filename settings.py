@@ -12,9 +12,44 @@ if project_path not in sys.path:
     sys.path.append(project_path)
 
 djcelery.setup_loader()
+# Default task message transport; the dev and production settings
+# choose the broker for their environments
 BROKER_URL = 'django://'
 CELERYD_CONCURRENCY = 1
 CELERY_SEND_TASK_ERROR_EMAILS = True
+# Tasks are routed to separate queues, each with its own worker in
+# supervisord.conf, so that rider confirmation emails don't wait
+# behind slow Google Docs calls or admin bulk jobs
+CELERY_QUEUES = {
+    'celery': {'exchange': 'celery', 'binding_key': 'celery'},
+    'email': {'exchange': 'email', 'binding_key': 'email'},
+    'spreadsheets':
+        {'exchange': 'spreadsheets', 'binding_key': 'spreadsheets'},
+    'admin': {'exchange': 'admin', 'binding_key': 'admin'},
+}
+CELERY_ROUTES = {
+    # Rider pre-registration notices
+    'randopony.register.tasks.email_registration_notices': {'queue': 'email'},
+    'randopony.register.tasks.email_to_rider': {'queue': 'email'},
+    'randopony.register.tasks.email_to_organizer': {'queue': 'email'},
+    'randopony.populaires.tasks.email_registration_notices':
+        {'queue': 'email'},
+    'randopony.populaires.tasks.email_to_rider': {'queue': 'email'},
+    'randopony.populaires.tasks.email_to_organizer': {'queue': 'email'},
+    # Rider list spreadsheet sync
+    'randopony.register.tasks.update_google_spreadsheet':
+        {'queue': 'spreadsheets'},
+    'randopony.populaires.tasks.update_google_spreadsheet':
+        {'queue': 'spreadsheets'},
+    # Admin actions and scheduled maintenance
+    'randopony.register.tasks.create_rider_list': {'queue': 'admin'},
+    'randopony.register.tasks.email_to_webmaster': {'queue': 'admin'},
+    'randopony.register.tasks.email_urls_to_organizer': {'queue': 'admin'},
+    'randopony.populaires.tasks.create_rider_list': {'queue': 'admin'},
+    'randopony.populaires.tasks.email_to_webmaster': {'queue': 'admin'},
+    'randopony.populaires.tasks.email_urls_to_organizer': {'queue': 'admin'},
+    'randopony.pasture.tasks.archive_past_events': {'queue': 'admin'},
+}
 
 ADMINS = (
     ('Doug Latornell', 'djl@douglatornell.ca'),
@@ -41,6 +76,9 @@ TEMPLATE_LOADERS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    # First, so that it sees the responses of all of the other
+    # middleware
+    'randopony.pasture.db.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -50,6 +88,8 @@ MIDDLEWARE_CLASSES = (
 
 ROOT_URLCONF = 'randopony.urls'
 
+DATABASE_ROUTERS = ('randopony.pasture.db.ReplicaRouter',)
+
 STATICFILES_DIRS = (
     # Always use absolute paths.
     os.path.join(project_path, 'site_static'),
@@ -88,26 +128,55 @@ REGISTRATION_FORM_CAPTCHA_QUESTION = (
 )
 REGISTRATION_FORM_CAPTCHA_ANSWER = 400
 
+# Seconds to wait before running a rider list spreadsheet update so
+# that the registrations made during a rush are handled by one update
+COALESCE_TASK_WINDOW = 30
+
+# Rider list spreadsheet backend; LocalBackend renders the rider lists
+# from the database instead of keeping them in Google Docs
+RIDER_LIST_BACKEND = 'randopony.pasture.riderlists.GoogleDocsBackend'
+
+# Age in days after which events and their riders are moved to the
+# archive tables by the archive_events management command and task
+ARCHIVE_EVENTS_AFTER_DAYS = 365
+
+# DATABASES alias of a read replica of the default database for
+# public page reads, and seconds to keep a client's reads on the
+# default database after it posts a form; the replica is only used if
+# the alias is in DATABASES
+REPLICA_DATABASE = 'replica'
+REPLICA_PIN_SECONDS = 30
+
+# PRAGMA (name, value) pairs run on each new SQLite database connection
+# by the pasture.db.set_sqlite_pragmas receiver
+SQLITE_PRAGMAS = ()
+
 # Settings that differ between development and production environments
 try:
     from dev_settings import DEBUG
     from dev_settings import TEMPLATE_DEBUG
     from dev_settings import DATABASES
+    from dev_settings import CACHES
     from dev_settings import STATIC_URL
     # Use the Python standard library SMTP DebuggingServer to handle email
     # by printing it to stdout. Run the server with:
     #    python -m smtpd -n -c DebuggingServer <EMAIL_HOST>:<EMAIL_PORT>
     from dev_settings import EMAIL_HOST
     from dev_settings import EMAIL_PORT
+    from dev_settings import BROKER_URL
 except ImportError:
     from production_settings import DEBUG
     from production_settings import DATABASES
+    from production_settings import CACHES
     from production_settings import STATIC_ROOT
     from production_settings import STATIC_URL
     from production_settings import ADMIN_MEDIA_PREFIX
     from production_settings import EMAIL_HOST
     from production_settings import EMAIL_HOST_USER
     from production_settings import SERVER_EMAIL
+    from production_settings import BROKER_URL
+    from production_settings import SQLITE_PRAGMAS
+    from production_settings import TEMPLATE_LOADERS
 
 # Settings that should be kept secret:
 from private_settings import SECRET_KEY
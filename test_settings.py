@@ -0,0 +1,19 @@
+"""Django settings for running the RandoPony test suite.
+
+Use them with:
+   ./manage.py test --settings=test_settings
+"""
+from settings import *
+
+
+# Queued tasks use kombu's in-process transport so that the tests
+# don't need a broker, or write messages to the database
+BROKER_URL = 'memory://'
+
+# Keep the tests' cached pages and job status out of the development
+# cache that runserver and celeryd share
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}